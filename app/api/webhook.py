@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+import asyncio
+import time
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 from app.core.config import settings
 from app.services import tradingview_service
 from app.core.logging import logger
+from app.core import metrics
 
 router = APIRouter()
 
@@ -12,9 +16,13 @@ class WebhookPayload(BaseModel):
     alert: str
     price: float
     key: str
+    idempotency_key: Optional[str] = None  # e.g. "{{strategy.order.id}}-{{timenow}}"
+    bar_time: Optional[str] = None  # "{{time}}"; part of the fallback dedupe hash
+    dry_run: bool = False  # answer with the order plan instead of queueing the alert
 
 @router.post("/webhook")
 async def webhook(payload: WebhookPayload):
+    started = time.perf_counter()
     try:
         # Validate Key
         if payload.key != settings.ALERT_KEY:
@@ -29,19 +37,41 @@ async def webhook(payload: WebhookPayload):
         if payload.price <= 0:
              raise HTTPException(status_code=400, detail="Invalid price")
 
-        # Process
-        success = tradingview_service.add_to_queue(payload.symbol, payload.alert, payload.price)
-        
-        if success:
-            # Trigger queue processing (fire and forget for now, or background task)
-            # In FastAPI, we can use BackgroundTasks, but `tradingview_service` 
-            # has its own thread/logic. 
-            # We'll call the trigger function which spawns thread if needed.
-            tradingview_service.trigger_queue_processing()
-            return {"status": "success", "message": f"{payload.symbol} {payload.alert} added"}
-        else:
+        labels = {"symbol": payload.symbol, "type": payload.alert}
+        validated = time.perf_counter()
+        metrics.webhook_validation_seconds.observe(validated - started, **labels)
+
+        # Dry run: size the trade now and return the plan; nothing is journaled or sent
+        if payload.dry_run:
+            from app.services import trade_service
+            plan = await run_in_threadpool(trade_service.plan_trade, payload.symbol, payload.alert)
+            if plan is None:
+                return {"status": "dry_run", "message": f"{payload.symbol} {payload.alert} would not trade", "plan": None}
+            return {"status": "dry_run", "message": f"{payload.symbol} {payload.alert} planned", "plan": plan.to_dict()}
+
+        # Retries and double-fires: acknowledge without journaling a second alert
+        dedupe_key, durable = tradingview_service.dedupe_key(
+            payload.symbol, payload.alert, payload.price, payload.bar_time, payload.idempotency_key)
+        if not tradingview_service.claim_alert(dedupe_key):
+            metrics.alerts_duplicate_total.inc(**labels)
+            return {"status": "duplicate", "message": f"{payload.symbol} {payload.alert} already received"}
+
+        # Process: respond as soon as the alert is durable in the journal.
+        # The indexer writes the alerts row and wakes the dispatcher behind it.
+        try:
+            await asyncio.wrap_future(
+                tradingview_service.journal_alert(
+                    payload.symbol, payload.alert, payload.price, dedupe_key=dedupe_key if durable else None)
+            )
+            metrics.alert_persist_seconds.observe(time.perf_counter() - validated, **labels)
+            metrics.alerts_total.inc(**labels)
+        except Exception as e:
+            tradingview_service.release_alert(dedupe_key)
+            logger.error(f"[webhook] Journal Error: {e}")
             raise HTTPException(status_code=500, detail="Failed to add to queue")
 
+        return {"status": "success", "message": f"{payload.symbol} {payload.alert} added"}
+
     except HTTPException as he:
         raise he
     except Exception as e:
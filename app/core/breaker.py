@@ -0,0 +1,145 @@
+import random
+import threading
+import time
+
+# Constants
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an endpoint whose breaker is open.
+    """
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"circuit open for {name} (retry in {retry_in:.1f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one endpoint.
+
+    After `threshold` failures in a row the circuit opens and calls fail fast
+    for `reset_timeout` seconds (or longer if `trip()` asks for it). Then a
+    single trial call is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.name = name
+        self.threshold = max(int(threshold), 1)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_until = 0.0
+        self._trial = False
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() >= self._opened_until:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Raises CircuitOpenError while open; admits one trial call once the timeout has passed.
+        """
+        with self._lock:
+            now = self._clock()
+            if self._state == OPEN and now >= self._opened_until:
+                self._state = HALF_OPEN
+                self._trial = False
+            if self._state == OPEN or (self._state == HALF_OPEN and self._trial):
+                self.rejected += 1
+                raise CircuitOpenError(self.name, max(self._opened_until - now, 0.0))
+            if self._state == HALF_OPEN:
+                self._trial = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.threshold:
+                self._open(self.reset_timeout)
+
+    def trip(self, duration: float) -> None:
+        """
+        Opens the circuit for at least `duration` seconds (e.g. a Retry-After).
+        """
+        with self._lock:
+            self._open(max(duration, self.reset_timeout))
+
+    def _open(self, duration: float) -> None:
+        if self._state != OPEN:
+            self.opened += 1
+        self._state = OPEN
+        self._trial = False
+        self._opened_until = max(self._opened_until, self._clock() + duration)
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {"state": state, "failures": self._failures, "opened": self.opened, "rejected": self.rejected}
+
+class RetryBudget:
+    """
+    Caps retries at `ratio` of recent calls (plus `min_per_second`), so a
+    degraded exchange sees at most (1 + ratio) times normal traffic instead
+    of every caller retrying at once.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_tokens: float = 10.0,
+                 clock=time.monotonic):
+        self.ratio = max(float(ratio), 0.0)
+        self.min_per_second = max(float(min_per_second), 0.0)
+        self.max_tokens = max_tokens
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = max_tokens
+        self._last = clock()
+        self.retries = 0
+        self.exhausted = 0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last) * self.min_per_second)
+        self._last = now
+
+    def record_call(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_retry(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.retries += 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill()
+            return {"tokens": round(self._tokens, 2), "retries": self.retries, "exhausted": self.exhausted}
+
+def backoff(attempt: int, base: float, cap: float) -> float:
+    """
+    Jittered exponential delay for retry `attempt` (0-based): half fixed, half random.
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
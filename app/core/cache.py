@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+from app.core.logging import logger
+
+class RefreshingSnapshot:
+    """
+    Process-wide snapshot of slow-changing exchange data.
+
+    The first lookup loads the snapshot synchronously. After that, lookups are
+    served from memory and a stale snapshot is refreshed on a background thread,
+    so callers never wait on the network once the cache is warm. If a refresh
+    fails the last good snapshot is kept.
+    Subclasses implement `_load()` and return a dict keyed by symbol.
+    """
+    name = "snapshot"
+
+    def __init__(self, ttl: float, retry_interval: float = 30.0):
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._data = {}
+        self._loaded_at = 0.0
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def _load(self) -> dict:
+        raise NotImplementedError
+
+    def refresh(self) -> bool:
+        """
+        Reloads the snapshot synchronously. Keeps the previous data on failure.
+        """
+        with self._lock:
+            self._last_attempt = time.monotonic()
+        try:
+            data = self._load()
+            if not data:
+                raise ValueError("empty snapshot")
+            with self._lock:
+                self._data = data
+                self._loaded_at = time.monotonic()
+                self.refreshes += 1
+            return True
+        except Exception as e:
+            with self._lock:
+                self.refresh_failures += 1
+            logger.error(f"[{self.name}.refresh] Error: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def refresh_async(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            if time.monotonic() - self._last_attempt < self.retry_interval and self._data:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name=f"{self.name}-refresh", daemon=True).start()
+
+    def is_stale(self) -> bool:
+        return not self._data or time.monotonic() - self._loaded_at > self.ttl
+
+    def get(self, key: str):
+        if not self._data:
+            # Cold cache: nothing to serve yet, so load on the caller's thread.
+            with self._load_lock:
+                if not self._data:
+                    self.refresh()
+        elif self.is_stale():
+            self.refresh_async()
+
+        value = self._data.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is None and self._data:
+            # Unknown key may be a new listing; schedule a reload (rate limited).
+            self.refresh_async()
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "age": round(time.monotonic() - self._loaded_at, 1) if self._data else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_failures": self.refresh_failures,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data = {}
+            self._loaded_at = 0.0
+            self._last_attempt = 0.0
+
+class TTLSet:
+    """
+    Bounded set of recently seen keys. A key is remembered for `ttl` seconds;
+    past `max_size` keys the oldest are evicted first.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max(int(max_size), 1)
+        self._keys = OrderedDict()  # key -> monotonic expiry, oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.evicted = 0
+
+    def _expire(self, now: float) -> None:
+        while self._keys:
+            key, expires = next(iter(self._keys.items()))
+            if expires > now and len(self._keys) <= self.max_size:
+                break
+            self._keys.popitem(last=False)
+            if expires > now:
+                self.evicted += 1
+
+    def add(self, key: str, age: float = 0.0) -> bool:
+        """
+        Remembers `key` (already `age` seconds old). Returns False if it was
+        already present and unexpired, i.e. a duplicate.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expires = self._keys.get(key)
+            if expires is not None and expires > now:
+                self.hits += 1
+                return False
+            self._keys.pop(key, None)
+            self._keys[key] = now + self.ttl - age
+            self._expire(now)
+            return True
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._keys), "hits": self.hits, "evicted": self.evicted}
@@ -0,0 +1,77 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+class FanOut:
+    """
+    Bounded thread pool for independent blocking calls (REST requests).
+
+    `gather(*calls, timeout=...)` runs the zero-argument callables in
+    parallel and returns their results in order, so the caller waits for the
+    slowest call rather than the sum of all of them. All calls share one
+    deadline; if it passes, or any call raises, `gather` raises right away
+    (TimeoutError or the call's exception) without waiting for the rest.
+
+    A gather issued from inside a pool worker runs its calls inline, so
+    nested fan-outs can never deadlock a saturated pool.
+    Calls run in a copy of the caller's context, so context variables
+    (e.g. the Binance request priority) carry over to the workers.
+    """
+
+    def __init__(self, max_workers: int = 8, timeout: float = 10.0, name: str = "FanOut"):
+        self.max_workers = max(int(max_workers), 1)
+        self.timeout = timeout
+        self.name = name
+        self._pool = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.calls = 0
+        self.timeouts = 0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.name,
+                    initializer=self._mark_worker
+                )
+            return self._pool
+
+    def _mark_worker(self) -> None:
+        self._local.worker = True
+
+    def gather(self, *calls, timeout: float = None) -> list:
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self.calls += len(calls)
+        if len(calls) <= 1 or getattr(self._local, "worker", False):
+            return [call() for call in calls]
+
+        deadline = time.monotonic() + timeout
+        pool = self._get_pool()
+        futures = [pool.submit(contextvars.copy_context().run, call) for call in calls]
+        done, pending = wait(futures, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_EXCEPTION)
+        for f in futures:
+            if f in done and f.exception() is not None:
+                for p in pending:
+                    p.cancel()
+                raise f.exception()
+        if pending:
+            for p in pending:
+                p.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"{len(pending)} of {len(calls)} calls exceeded {timeout}s")
+        return [f.result() for f in futures]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"workers": self.max_workers, "calls": self.calls, "timeouts": self.timeouts}
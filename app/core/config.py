@@ -5,15 +5,27 @@ class Settings(BaseSettings):
     # Binance
     BINANCE_API_KEY: str
     BINANCE_SECRET_KEY: str
+    BINANCE_BASE_URL: str = ""  # REST endpoint override (default: live or testnet by key)
     
     # Telegram
     TELEGRAM_BOT_TOKEN: str
     TELEGRAM_USER_ID: str
+    TELEGRAM_GLOBAL_RATE: float = 30.0  # messages/second across all chats
+    TELEGRAM_CHAT_RATE: float = 1.0     # messages/second per chat
+    TELEGRAM_CHAT_BURST: int = 3
+    TELEGRAM_API_URL: str = "https://api.telegram.org"
+    TELEGRAM_MAX_CONNECTIONS: int = 8   # keep-alive connections shared by polling and sends
+    TELEGRAM_PROBE_INTERVAL: float = 60.0  # seconds between getMe latency probes (0 disables)
 
     # Webhook Server
     WEBHOOK_IP: str = "127.0.0.1"
     WEBHOOK_PORT: int = 5001
     WEBHOOK_DOMAIN: str = "localhost"
+    WEB_WORKERS: int = 1  # uvicorn processes; >1 elects one leader for dispatch and Telegram
+
+    # Multi-worker coordination (seconds)
+    LEADER_LEASE_TTL: float = 15.0      # a silent leader is replaced after this long
+    ALERT_CLAIM_TIMEOUT: float = 120.0  # claimed-but-unfinished alerts of a dead leader are retried after this
 
     # Security
     ALERT_KEY: str
@@ -22,12 +34,69 @@ class Settings(BaseSettings):
     ORDER_BALANCE_PERCENT: int = 100
     ORDER_LEVERAGE: int = 2
     MARGIN_TYPE: str = "isolated"
+    ORDER_DRY_RUN: bool = False  # plan and log orders without sending them
+
+    # Alert ingest journal
+    ALERT_JOURNAL_PATH: str = os.path.join("data", "alerts.journal")
+    ALERT_JOURNAL_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # Webhook dedupe: repeats of an idempotency key / content hash within the TTL are ignored
+    ALERT_DEDUPE_TTL: float = 300.0
+    ALERT_DEDUPE_MAX_KEYS: int = 10000
+
+    # Alert dispatch (seconds). Debounce may be 0 to execute immediately.
+    ALERT_DEBOUNCE_SECONDS: float = 1.0
+    ALERT_SWEEP_INTERVAL: float = 30.0
+
+    # SQLite profile
+    DB_POOL_SIZE: int = 10
+    DB_POOL_OVERFLOW: int = 10
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_CACHE_SIZE_KB: int = 16384
+    DB_MMAP_SIZE: int = 268435456
+
+    # Logging pipeline (records are written to file/DB in background batches)
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 200
+    LOG_FLUSH_INTERVAL: float = 1.0
+    LOG_EXPORT_MAX_LINES: int = 100000  # /getlog upper bound
+
+    # Log retention: older rows are archived (gzip), rolled up per day and deleted
+    LOG_RETENTION_DAYS: int = 14  # 0 keeps logs forever
+    LOG_RETENTION_INTERVAL: float = 3600.0
+    LOG_RETENTION_BATCH: int = 5000
+    LOG_ARCHIVE_DIR: str = os.path.join("data", "log_archive")  # empty: no archive files
+    LOG_VACUUM_PAGES: int = 1000
+
+    # Trade execution: symbols run in parallel, same symbol stays ordered
+    DISPATCH_WORKERS: int = 4
+    BINANCE_MAX_CONCURRENT_REQUESTS: int = 8
+    BINANCE_REQUESTS_PER_SECOND: float = 20.0
+    BINANCE_FANOUT_TIMEOUT: float = 10.0
+    BINANCE_WEIGHT_LIMIT: int = 2400       # REQUEST_WEIGHT per minute for the account's IP
+    BINANCE_BREAKER_THRESHOLD: int = 5      # consecutive failures that open an endpoint's circuit
+    BINANCE_BREAKER_RESET: float = 30.0     # seconds open before a trial call
+    BINANCE_RETRY_ATTEMPTS: int = 3         # per call, for retryable error classes
+    BINANCE_RETRY_BUDGET_RATIO: float = 0.1  # retries allowed per call made (plus 1/s)
+
+    # Account state (user-data stream + REST reconcile, seconds)
+    ACCOUNT_STREAM_ENABLED: bool = True
+    ACCOUNT_RECONCILE_INTERVAL: int = 60
+    BINANCE_WS_URL: str = ""
+
+    # Market data (bookTicker/markPrice streams; older quotes fall back to REST)
+    MARKET_DATA_STREAM_ENABLED: bool = True
+    MARKET_DATA_MAX_AGE: float = 3.0
+
+    # Exchange metadata cache (seconds)
+    SYMBOL_INFO_TTL: int = 3600
+    LEVERAGE_BRACKETS_TTL: int = 1800
 
     # Alert payloads (optional, can be defaults)
-    ALERT_LONG_OPEN: str = '{"symbol": "{{ticker}}", "alert": "long_open", "price": "{{close}}", "key": "YOUR_KEY"}'
-    ALERT_LONG_CLOSE: str = '{"symbol": "{{ticker}}", "alert": "long_close", "price": "{{close}}", "key": "YOUR_KEY"}'
-    ALERT_SHORT_OPEN: str = '{"symbol": "{{ticker}}", "alert": "short_open", "price": "{{close}}", "key": "YOUR_KEY"}'
-    ALERT_SHORT_CLOSE: str = '{"symbol": "{{ticker}}", "alert": "short_close", "price": "{{close}}", "key": "YOUR_KEY"}'
+    ALERT_LONG_OPEN: str = '{"symbol": "{{ticker}}", "alert": "long_open", "price": "{{close}}", "bar_time": "{{time}}", "key": "YOUR_KEY"}'
+    ALERT_LONG_CLOSE: str = '{"symbol": "{{ticker}}", "alert": "long_close", "price": "{{close}}", "bar_time": "{{time}}", "key": "YOUR_KEY"}'
+    ALERT_SHORT_OPEN: str = '{"symbol": "{{ticker}}", "alert": "short_open", "price": "{{close}}", "bar_time": "{{time}}", "key": "YOUR_KEY"}'
+    ALERT_SHORT_CLOSE: str = '{"symbol": "{{ticker}}", "alert": "short_close", "price": "{{close}}", "bar_time": "{{time}}", "key": "YOUR_KEY"}'
 
     model_config = SettingsConfigDict(
         env_file=".env",
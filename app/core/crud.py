@@ -1,7 +1,11 @@
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from app.models.log import Log
 from app.models.order import Order
 from app.models.alert import Alert
+from app.models.lease import Lease
+import time
 from datetime import datetime
 
 # Logs
@@ -12,9 +16,41 @@ def create_log(db: Session, type: str, func: str, desc: str):
     db.refresh(db_log)
     return db_log
 
+def create_logs(db: Session, rows: list):
+    """
+    Inserts many log rows in a single transaction.
+    rows: dicts with datetime, type, func, desc
+    """
+    if not rows:
+        return
+    db.execute(insert(Log), rows)
+    db.commit()
+
 def get_logs(db: Session, skip: int = 0, limit: int = 100):
     return db.query(Log).order_by(Log.datetime.desc()).offset(skip).limit(limit).all()
 
+def iter_logs(db: Session, level: str = None, func: str = None, since: datetime = None, until: datetime = None,
+              limit: int = None, chunk_size: int = 1000):
+    """
+    Yields (datetime, type, func, desc) tuples, newest first, without loading
+    ORM objects: rows are fetched from a streamed cursor `chunk_size` at a time.
+    """
+    query = select(Log.datetime, Log.type, Log.func, Log.desc).order_by(Log.datetime.desc())
+    if level:
+        query = query.where(Log.type == level.lower())
+    if func:
+        query = query.where(Log.func.like(f"%{func}%"))
+    if since:
+        query = query.where(Log.datetime >= since)
+    if until:
+        query = query.where(Log.datetime < until)
+    if limit:
+        query = query.limit(limit)
+    result = db.execute(query.execution_options(stream_results=True, yield_per=chunk_size))
+    for partition in result.partitions():
+        for row in partition:
+            yield tuple(row)
+
 # Alerts
 def create_alert(db: Session, symbol: str, type: str, price: float):
     db_alert = Alert(symbol=symbol, type=type, price=price)
@@ -23,8 +59,100 @@ def create_alert(db: Session, symbol: str, type: str, price: float):
     db.refresh(db_alert)
     return db_alert
 
-def get_pending_alerts(db: Session):
-    return db.query(Alert).filter(Alert.is_processed == False).all()
+def create_alerts_from_journal(db: Session, rows: list):
+    """
+    Inserts journaled alerts in one transaction, ignoring already-indexed
+    entries and duplicates of an existing dedupe_key.
+    rows: dicts with journal_id, dedupe_key, datetime, symbol, type, price
+    Returns (id, symbol, type) of the rows actually inserted.
+    """
+    if not rows:
+        return []
+    # No conflict target: skips rows that hit either unique index
+    stmt = sqlite_insert(Alert).on_conflict_do_nothing().returning(Alert.id, Alert.symbol, Alert.type)
+    inserted = [tuple(r) for r in db.execute(stmt, rows)]
+    db.commit()
+    return inserted
+
+def get_recent_dedupe_keys(db: Session, since: datetime):
+    """
+    Returns (dedupe_key, datetime) of alerts received since `since`, oldest first.
+    """
+    rows = (db.query(Alert.dedupe_key, Alert.datetime)
+            .filter(Alert.dedupe_key.isnot(None), Alert.datetime >= since)
+            .order_by(Alert.datetime).all())
+    return [(r[0], r[1]) for r in rows]
+
+def get_pending_alerts(db: Session, symbol: str = None):
+    query = db.query(Alert).filter(Alert.is_processed == False)
+    if symbol:
+        query = query.filter(Alert.symbol == symbol)
+    return query.order_by(Alert.id).all()
+
+def claim_pending_alerts(db: Session, symbol: str, owner: str):
+    """
+    Atomically claims the symbol's unclaimed pending alerts for `owner` and
+    returns every pending alert it holds, oldest first. A row is claimed by
+    one worker only, so no alert is executed twice.
+    """
+    (db.query(Alert)
+     .filter(Alert.symbol == symbol, Alert.is_processed == False, Alert.claimed_by.is_(None))
+     .update({"claimed_by": owner, "claimed_at": datetime.utcnow()}, synchronize_session=False))
+    db.commit()
+    return (db.query(Alert)
+            .filter(Alert.symbol == symbol, Alert.is_processed == False, Alert.claimed_by == owner)
+            .order_by(Alert.id).all())
+
+def claim_alerts(db: Session, alert_ids: list, owner: str) -> int:
+    """
+    Claims the given pending alerts for `owner` (unclaimed or already its own).
+    Returns how many were claimed; fewer than asked means another worker got some.
+    """
+    if not alert_ids:
+        return 0
+    claimed = (db.query(Alert)
+               .filter(Alert.id.in_(alert_ids), Alert.is_processed == False,
+                       (Alert.claimed_by.is_(None)) | (Alert.claimed_by == owner))
+               .update({"claimed_by": owner, "claimed_at": datetime.utcnow()}, synchronize_session=False))
+    db.commit()
+    return claimed
+
+def get_unclaimed_alert_types(db: Session, symbol: str = None):
+    """
+    Returns (id, symbol, type) of unclaimed pending alerts, oldest first, without loading ORM objects.
+    """
+    query = (select(Alert.id, Alert.symbol, Alert.type)
+             .where(Alert.is_processed == False, Alert.claimed_by.is_(None)).order_by(Alert.id))
+    if symbol:
+        query = query.where(Alert.symbol == symbol)
+    return [tuple(r) for r in db.execute(query)]
+
+def count_unclaimed_alerts(db: Session) -> dict:
+    """
+    Returns {symbol: number of unclaimed pending alerts}.
+    """
+    rows = (db.query(Alert.symbol, func.count(Alert.id))
+            .filter(Alert.is_processed == False, Alert.claimed_by.is_(None))
+            .group_by(Alert.symbol).all())
+    return {symbol: count for symbol, count in rows}
+
+def release_alert_claims(db: Session, before: datetime = None, exclude_owner: str = None) -> int:
+    """
+    Returns pending alerts claimed before `before` (default: all) to the queue,
+    e.g. those left by a worker that died mid-run. Returns the number released.
+    """
+    query = db.query(Alert).filter(Alert.is_processed == False, Alert.claimed_by.isnot(None))
+    if before is not None:
+        query = query.filter(Alert.claimed_at < before)
+    if exclude_owner:
+        query = query.filter(Alert.claimed_by != exclude_owner)
+    released = query.update({"claimed_by": None, "claimed_at": None}, synchronize_session=False)
+    db.commit()
+    return released
+
+def get_pending_symbols(db: Session):
+    rows = db.query(Alert.symbol).filter(Alert.is_processed == False).distinct().all()
+    return [r[0] for r in rows]
 
 def mark_alert_processed(db: Session, alert_id: int):
     alert = db.query(Alert).filter(Alert.id == alert_id).first()
@@ -32,6 +160,12 @@ def mark_alert_processed(db: Session, alert_id: int):
         alert.is_processed = True
         db.commit()
         
+def mark_alerts_processed(db: Session, alert_ids: list):
+    if not alert_ids:
+        return
+    db.query(Alert).filter(Alert.id.in_(alert_ids)).update({"is_processed": True}, synchronize_session=False)
+    db.commit()
+
 def mark_alerts_processed_by_symbol(db: Session, symbol: str):
     # This matches the legacy logic which sets "que" to false for a symbol
     db.query(Alert).filter(Alert.symbol == symbol, Alert.is_processed == False).update({"is_processed": True})
@@ -74,3 +208,33 @@ def close_order(db: Session, symbol: str, side: str, exit_price: float, pnl: flo
         order.pnl = pnl
         
     db.commit()
+
+# Leases
+def acquire_lease(db: Session, name: str, owner: str, ttl: float, address: str = "", now: float = None) -> bool:
+    """
+    Takes or renews the named lease for `ttl` seconds. Succeeds if it is
+    free, expired or already held by `owner`; the upsert is one statement,
+    so two workers never both win.
+    """
+    now = now if now is not None else time.time()
+    stmt = sqlite_insert(Lease).values(name=name, owner=owner, address=address, expires_at=now + ttl)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"owner": stmt.excluded.owner, "address": stmt.excluded.address, "expires_at": stmt.excluded.expires_at},
+        where=(Lease.owner == stmt.excluded.owner) | (Lease.expires_at < now)
+    )
+    db.execute(stmt)
+    db.commit()
+    held = db.query(Lease.owner).filter(Lease.name == name).scalar()
+    return held == owner
+
+def release_lease(db: Session, name: str, owner: str) -> None:
+    db.query(Lease).filter(Lease.name == name, Lease.owner == owner).delete(synchronize_session=False)
+    db.commit()
+
+def get_lease(db: Session, name: str, now: float = None):
+    """
+    Returns the unexpired lease row, or None.
+    """
+    now = now if now is not None else time.time()
+    return db.query(Lease).filter(Lease.name == name, Lease.expires_at >= now).first()
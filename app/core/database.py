@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 import os
@@ -8,9 +8,35 @@ DB_DIR = os.path.join(os.getcwd(), 'data')
 os.makedirs(DB_DIR, exist_ok=True)
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(DB_DIR, 'bot_database.db')}"
 
+# Production profile: WAL lets the webhook, dispatcher, log writer and Telegram
+# threads read while one of them writes; NORMAL sync is durable in WAL mode
+# except for the last commits on power loss (alerts are covered by the journal).
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": settings.DB_BUSY_TIMEOUT_MS,
+    "cache_size": -settings.DB_CACHE_SIZE_KB,
+    "mmap_size": settings.DB_MMAP_SIZE,
+    "temp_store": "MEMORY",
+}
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": settings.DB_BUSY_TIMEOUT_MS / 1000},
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_POOL_OVERFLOW,
+    pool_timeout=30,
+    pool_pre_ping=False
 )
+event.listen(engine, "connect", apply_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -21,3 +47,78 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Columns added after the first release. create_all() only creates missing
+# tables, so existing database files get these through ALTER TABLE.
+COLUMN_MIGRATIONS = [
+    ("alerts", "journal_id", "VARCHAR"),
+    ("alerts", "dedupe_key", "VARCHAR"),
+    ("alerts", "claimed_by", "VARCHAR"),
+    ("alerts", "claimed_at", "DATETIME"),
+]
+
+# Indexes for the hot query shapes; these mirror the models' __table_args__.
+INDEX_MIGRATIONS = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_alerts_journal_id ON alerts (journal_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_alerts_dedupe_key ON alerts (dedupe_key)",
+    # get_pending_alerts / get_pending_symbols
+    "CREATE INDEX IF NOT EXISTS ix_alerts_pending ON alerts (symbol, id) WHERE is_processed = 0",
+    # crud.close_order / get_open_orders
+    "CREATE INDEX IF NOT EXISTS ix_orders_open ON orders (symbol, side) WHERE is_open = 1",
+    # get_logs ordering
+    "CREATE INDEX IF NOT EXISTS ix_logs_datetime ON logs (datetime)",
+]
+
+def enable_incremental_vacuum(bind) -> bool:
+    """
+    Asks for auto_vacuum=INCREMENTAL so freed pages can be returned in small
+    steps (PRAGMA incremental_vacuum) instead of a full VACUUM. This takes
+    effect on a new, empty file only. Existing files stay as they are until
+    convert_incremental_vacuum() rewrites them (scripts/upgrade_db.py).
+    Returns True if the file is in INCREMENTAL mode.
+    """
+    with bind.connect() as conn:
+        if conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+            return True
+        has_tables = conn.execute(text("SELECT count(*) FROM sqlite_master WHERE type = 'table'")).scalar()
+        if has_tables:
+            return False
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        conn.commit()
+        return True
+
+def convert_incremental_vacuum(bind) -> bool:
+    """
+    Switches an existing file to auto_vacuum=INCREMENTAL with one full VACUUM.
+    This rewrites the whole file, so run it offline, not while the bot is
+    writing. Returns False if the file was already converted.
+    """
+    with bind.connect() as conn:
+        if conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+            return False
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        conn.execute(text("VACUUM"))
+        conn.commit()
+    # Other pooled connections keep reporting the old auto_vacuum mode
+    bind.dispose()
+    return True
+
+def init_db(bind=None):
+    """
+    Creates missing tables and applies column/index migrations.
+    """
+    bind = bind or engine
+    # Register models on Base.metadata
+    from app.models import alert, lease, log, log_rollup, order  # noqa: F401
+
+    enable_incremental_vacuum(bind)
+    Base.metadata.create_all(bind=bind)
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table, column, ddl_type in COLUMN_MIGRATIONS:
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+        for ddl in INDEX_MIGRATIONS:
+            conn.execute(text(ddl))
+        conn.execute(text("ANALYZE"))
@@ -0,0 +1,246 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from app.core.logging import logger
+
+class Journal:
+    """
+    Append-only JSON-lines journal with group-commit fsync.
+
+    `append()` buffers one line and returns a Future that resolves once the
+    line is on disk. A single committer thread fsyncs whatever accumulated
+    since the previous fsync, so concurrent appends share one fsync.
+
+    An indexer thread feeds durable entries, in order, to a consumer callback
+    and records the consumed offset in a checkpoint file. On start the
+    journal replays everything after the checkpoint, so entries acknowledged
+    before a crash are never lost. The consumer must be idempotent (entries
+    carry a unique "id"), because a crash between consume and checkpoint
+    replays the last batch.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 16 * 1024 * 1024, batch_size: int = 500):
+        self.path = path
+        self.checkpoint_path = path + ".ckpt"
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self._cond = threading.Condition()
+        self._file = None
+        self._waiters = []
+        self._durable = 0
+        self._committer = None
+        self._indexer = None
+        self._consumer = None
+        self._running = False
+        self._index_event = threading.Event()
+        self._index_lock = threading.Lock()
+        self.appended = 0
+        self.fsyncs = 0
+        self.indexed = 0
+
+    # Writing
+
+    def _open(self) -> None:
+        if self._file is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._repair_tail()
+        self._durable = self._file.tell()
+        self._running = True
+        self._committer = threading.Thread(target=self._commit_loop, name="JournalCommitter", daemon=True)
+        self._committer.start()
+
+    def _repair_tail(self) -> None:
+        # A torn last line was never acknowledged; cut it off.
+        size = self._file.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(max(size - 65536, 0))
+            tail = f.read()
+        if tail.endswith(b"\n"):
+            return
+        cut = tail.rfind(b"\n")
+        keep = size - len(tail) + cut + 1 if cut >= 0 else max(size - len(tail), 0)
+        self._file.truncate(keep)
+        self._file.seek(0, os.SEEK_END)
+        logger.warning(f"[Journal] Truncated torn tail of {self.path} ({size - keep} bytes)")
+
+    def append(self, entry: dict) -> Future:
+        future = Future()
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._cond:
+            self._open()
+            self._file.write(line)
+            self._waiters.append(future)
+            self.appended += 1
+            self._cond.notify()
+        return future
+
+    def _commit_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._waiters and self._running:
+                    self._cond.wait()
+                if not self._waiters:
+                    return
+                waiters, self._waiters = self._waiters, []
+                try:
+                    self._file.flush()
+                    end = self._file.tell()
+                    fd = self._file.fileno()
+                except Exception as e:
+                    for w in waiters:
+                        w.set_exception(e)
+                    continue
+            # fsync outside the lock so new appends keep buffering meanwhile
+            try:
+                os.fsync(fd)
+                with self._cond:
+                    self._durable = max(self._durable, end)
+                    self.fsyncs += 1
+                for w in waiters:
+                    w.set_result(True)
+                self._index_event.set()
+            except Exception as e:
+                logger.error(f"[Journal] fsync failed: {e}")
+                for w in waiters:
+                    w.set_exception(e)
+
+    # Indexing
+
+    def _read_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_checkpoint(self, offset: int) -> None:
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+        os.replace(tmp, self.checkpoint_path)
+
+    def _read_entries(self, offset: int, end: int) -> tuple:
+        """
+        Returns (entries, new_offset) for complete lines in [offset, end).
+        """
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while offset < end and len(entries) < self.batch_size:
+                line = f.readline()
+                if not line.endswith(b"\n") or offset + len(line) > end:
+                    break
+                offset += len(line)
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    logger.error(f"[Journal] Skipping corrupt entry at {offset - len(line)}")
+        return entries, offset
+
+    def _compact(self, offset: int) -> int:
+        """
+        Truncates the journal once everything in it has been indexed.
+        """
+        with self._cond:
+            if self._waiters or self._durable != offset or offset < self.max_bytes:
+                return offset
+            self._file.flush()
+            if self._file.tell() != offset:
+                return offset
+            self._file.truncate(0)
+            self._file.seek(0)
+            os.fsync(self._file.fileno())
+            self._durable = 0
+            self._write_checkpoint(0)
+        logger.info(f"[Journal] Compacted {self.path} ({offset} bytes indexed)")
+        return 0
+
+    def catch_up(self) -> int:
+        """
+        Feeds all durable, unconsumed entries to the consumer. Returns count.
+        """
+        with self._index_lock:
+            return self._catch_up()
+
+    def _catch_up(self) -> int:
+        count = 0
+        offset = self._read_checkpoint()
+        while True:
+            with self._cond:
+                end = self._durable
+            if offset > end:
+                # Checkpoint is ahead of the file (e.g. file replaced); start over.
+                offset = 0
+            entries, new_offset = self._read_entries(offset, end)
+            if new_offset == offset:
+                break
+            if entries:
+                self._consumer(entries)
+            self._write_checkpoint(new_offset)
+            offset = new_offset
+            count += len(entries)
+            self.indexed += len(entries)
+        self._compact(offset)
+        return count
+
+    def _index_loop(self) -> None:
+        while self._running:
+            self._index_event.wait(1.0)
+            self._index_event.clear()
+            if not self._running:
+                break
+            try:
+                self.catch_up()
+            except Exception as e:
+                logger.error(f"[Journal] Indexing failed: {e}")
+                time.sleep(1.0)
+
+    def start(self, consumer) -> int:
+        """
+        Opens the journal, replays unconsumed entries and starts the indexer.
+        Returns the number of replayed entries.
+        """
+        with self._cond:
+            self._open()
+        self._consumer = consumer
+        replayed = self.catch_up()
+        if self._indexer is None:
+            self._indexer = threading.Thread(target=self._index_loop, name="JournalIndexer", daemon=True)
+            self._indexer.start()
+        return replayed
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._index_event.set()
+        for t in (self._committer, self._indexer):
+            if t:
+                t.join(timeout)
+        self._committer = None
+        self._indexer = None
+        if self._consumer is not None:
+            try:
+                self.catch_up()
+            except Exception as e:
+                logger.error(f"[Journal] Final indexing failed: {e}")
+        with self._cond:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> dict:
+        with self._cond:
+            durable = self._durable
+        return {
+            "appended": self.appended,
+            "fsyncs": self.fsyncs,
+            "indexed": self.indexed,
+            "lag_bytes": max(durable - self._read_checkpoint(), 0),
+        }
@@ -1,59 +1,235 @@
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler
 import sys
 import threading
+import queue
+import time
+import atexit
+from datetime import datetime, timezone
 
 # Ensure logs directory exists
 LOG_DIR = os.path.join(os.getcwd(), 'logs')
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE = os.path.join(LOG_DIR, 'bot.log')
 
+# Pipeline defaults (overridden from settings in setup_logging)
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 200
+LOG_FLUSH_INTERVAL = 1.0
+
 # Custom Handler for SQLite
-# We import crud/db lazily or inside emit to avoid circular imports during setup?
-# Usually logging setup happens early. DB setup happens early too.
-# But `logging.py` is in `app/core`. `database.py` is in `app/core`.
-# Checks circular dependency: logging -> database -> config. Safe.
+# crud/database are imported lazily: logging is set up before the DB layer.
+# logging -> database -> config. Safe.
 # logging -> crud -> models -> database. Safe.
 
 class DBHandler(logging.Handler):
+    """
+    Writes log records to the `logs` table.
+    Used as a sink of the LogPipeline, which hands it whole batches so that
+    many records share a single transaction.
+    """
+    def record_to_row(self, record) -> dict:
+        # Map log level to "type"
+        log_type = record.levelname.lower()
+
+        # Use funcName or name
+        func_name = record.funcName
+        if func_name == '<module>':
+            func_name = record.name
+
+        return {
+            "datetime": datetime.fromtimestamp(record.created, timezone.utc).replace(tzinfo=None),
+            "type": log_type,
+            "func": func_name,
+            "desc": self.format(record),
+        }
+
+    def emit_batch(self, records: list):
+        rows = [self.record_to_row(r) for r in records if r.levelno >= self.level]
+        if not rows:
+            return
+        from app.core.database import SessionLocal
+        from app.core import crud
+
+        # We don't want to crash if DB write fails
+        db = SessionLocal()
+        try:
+            crud.create_logs(db, rows)
+        finally:
+            db.close()
+
     def emit(self, record):
-        # Run in a separate thread to avoid blocking main execution? 
-        # Or just write synchronously. SQLite is fast enough for low volume logs.
-        # But if lock is held, it might block.
-        # For safety/performance, maybe simple print if DB fails.
         try:
-            from app.core.database import SessionLocal
-            from app.core import crud
-            
-            # Map log level to "type"
-            log_type = record.levelname.lower()
-            
-            # Use funcName or name
-            func_name = record.funcName
-            if func_name == '<module>':
-                func_name = record.name
-                
-            msg = self.format(record)
-            
-            # We don't want to crash if DB write fails
-            try:
-                db = SessionLocal()
-                crud.create_log(db, log_type, func_name, msg)
-                db.close()
-            except Exception:
-                pass # Fail silently for logging
-                
+            self.emit_batch([record])
         except Exception:
             self.handleError(record)
 
+class LogPipeline:
+    """
+    Bounded queue drained by one background writer.
+
+    Callers only pay for a `put_nowait`. The writer pulls batches of up to
+    `batch_size` records (or whatever arrived within `flush_interval`) and
+    hands them to the sinks: file handlers record by record, the DBHandler as
+    one multi-row transaction. When the queue is full, records are dropped
+    and counted, and a summary line is written with the next batch.
+    """
+
+    def __init__(self, sinks: list, db_sink: DBHandler = None, maxsize: int = LOG_QUEUE_SIZE,
+                 batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.sinks = sinks
+        self.db_sink = db_sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self._dropped_reported = 0
+        self.written = 0
+        self.batches = 0
+        self.db_errors = 0
+
+    def put(self, record) -> None:
+        try:
+            self.queue.put_nowait(record)
+            with self._lock:
+                self.enqueued += 1
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="LogPipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        # Flush anything left behind
+        self.flush()
+
+    def _collect(self) -> list:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> list:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _drop_summary(self):
+        with self._lock:
+            missed = self.dropped - self._dropped_reported
+            self._dropped_reported = self.dropped
+        if missed <= 0:
+            return None
+        return logging.LogRecord(
+            logger.name, logging.WARNING, __file__, 0,
+            f"[LogPipeline] Dropped {missed} log records (queue full)", None, None, func="LogPipeline"
+        )
+
+    def write_batch(self, batch: list) -> None:
+        summary = self._drop_summary()
+        if summary is not None:
+            batch = batch + [summary]
+        if not batch:
+            return
+
+        for sink in self.sinks:
+            for record in batch:
+                if record.levelno >= sink.level:
+                    sink.handle(record)
+            try:
+                sink.flush()
+            except Exception:
+                pass
+
+        if self.db_sink is not None:
+            try:
+                self.db_sink.emit_batch(batch)
+            except Exception:
+                with self._lock:
+                    self.db_errors += 1 # Fail silently for logging
+
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+
+    def flush(self) -> None:
+        while True:
+            batch = self._drain()
+            self.write_batch(batch)
+            if not batch:
+                return
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.write_batch(self._collect())
+            except Exception as e:
+                sys.stderr.write(f"[LogPipeline] Error: {e}\n")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self.queue.qsize(),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "db_errors": self.db_errors,
+            }
+
+class PipelineHandler(QueueHandler):
+    """
+    Hot-path handler: queues the record as is. Formatting (message args,
+    tracebacks) is left to the sinks on the writer thread.
+    """
+    def __init__(self, pipeline: LogPipeline):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record):
+        # QueueHandler.prepare would format the record here, on the caller's thread
+        return record
+
+    def enqueue(self, record):
+        self.pipeline.put(record)
+
 logger = logging.getLogger("TradingViewBot")
 logger.setLevel(logging.INFO)
 
+pipeline = None
+
 def setup_logging():
     """
     Configures the logging system.
     """
+    global pipeline
+    from app.core.config import settings
+
     # File Handler
     file_handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8')
     file_handler.setLevel(logging.INFO)
@@ -65,26 +241,41 @@ def setup_logging():
     console_handler.setLevel(logging.INFO)
     console_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     console_handler.setFormatter(console_formatter)
-    
-    # DB Handler (Only for Warnings/Errors? or Info too?)
-    # Legacy logged everything? MD_Logs.F_Add_Logs was called manually.
-    # We'll log INFO+ to DB to match legacy "audit trail" likely.
-    # But standard logging can be chatty.
-    # Let's log WARNING and above to DB, plus specific INFOs if needed?
-    # User /getlog shows "logs". Legacy manually added "ERROR" and "INFO".
-    # We will log INFO+.
+
+    # DB Handler
+    # Legacy manually added "ERROR" and "INFO" to the logs DB, so we keep INFO+.
     db_handler = DBHandler()
-    db_handler.setLevel(logging.INFO) 
+    db_handler.setLevel(logging.INFO)
     # We don't need formatter for DB, as we store separate fields, but emit uses format() for 'desc'
     # So we set a simple message formatter
     db_formatter = logging.Formatter('%(message)s')
     db_handler.setFormatter(db_formatter)
 
     if not logger.handlers:
-        logger.addHandler(file_handler)
+        # File and DB sinks are drained by the background pipeline;
+        # the console stays synchronous so stdout is never delayed.
+        pipeline = LogPipeline(
+            sinks=[file_handler],
+            db_sink=db_handler,
+            maxsize=settings.LOG_QUEUE_SIZE,
+            batch_size=settings.LOG_BATCH_SIZE,
+            flush_interval=settings.LOG_FLUSH_INTERVAL
+        )
+        pipeline.start()
+        atexit.register(shutdown_logging)
+
+        queue_handler = PipelineHandler(pipeline)
+        queue_handler.setLevel(logging.INFO)
+        logger.addHandler(queue_handler)
         logger.addHandler(console_handler)
-        logger.addHandler(db_handler)
-    
+
     # Set levels for third-party libs
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+def shutdown_logging():
+    """
+    Flushes queued records to the file and DB sinks.
+    """
+    if pipeline is not None:
+        pipeline.stop()
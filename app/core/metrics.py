@@ -0,0 +1,178 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Constants
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: tuple, value) -> list:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    """
+    Set explicitly, or computed at scrape time by `fn()` (returns a number or
+    a {label values tuple: number} dict).
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), fn=None):
+        super().__init__(name, help_text, labels)
+        self.fn = fn
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> list:
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception:
+                value = None
+            with self._lock:
+                if isinstance(value, dict):
+                    self._values = {tuple(k) if isinstance(k, tuple) else (k,): v for k, v in value.items()}
+                elif value is not None:
+                    self._values = {(): value}
+        return super().render()
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> dict:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return {"count": 0, "sum": 0.0}
+            return {"count": state[2], "sum": state[1]}
+
+    def _render_sample(self, key: tuple, value) -> list:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = _format_labels(self.label_names, key, f'le="{_format_value(float(bound))}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        inf = _format_labels(self.label_names, key, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{inf} {count}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# Alert -> order pipeline stages
+webhook_validation_seconds = registry.register(Histogram(
+    "bot_webhook_validation_seconds", "Time spent validating a webhook payload", ("symbol", "type")))
+alert_persist_seconds = registry.register(Histogram(
+    "bot_alert_persist_seconds", "Time until an alert is durable in the journal", ("symbol", "type")))
+queue_wait_seconds = registry.register(Histogram(
+    "bot_queue_wait_seconds", "First alert of a window to execution start", ("symbol",)))
+dispatch_seconds = registry.register(Histogram(
+    "bot_dispatch_seconds", "Netting and executing one symbol's pending alerts", ("symbol", "type")))
+sizing_seconds = registry.register(Histogram(
+    "bot_sizing_seconds", "Lookups and chunk sizing before the first order", ("symbol", "type")))
+binance_request_seconds = registry.register(Histogram(
+    "bot_binance_request_seconds", "Binance REST call latency by endpoint", ("endpoint",)))
+binance_request_errors = registry.register(Counter(
+    "bot_binance_request_errors_total", "Failed Binance REST calls by endpoint and error class",
+    ("endpoint", "error_class")))
+binance_retries = registry.register(Counter(
+    "bot_binance_retries_total", "Binance REST calls retried after a retryable error", ("endpoint", "error_class")))
+order_ack_seconds = registry.register(Histogram(
+    "bot_order_ack_seconds", "Order submit to exchange acknowledgement", ("symbol", "type")))
+telegram_send_seconds = registry.register(Histogram(
+    "bot_telegram_send_seconds", "Telegram sendMessage latency", ("method",)))
+alerts_total = registry.register(Counter(
+    "bot_alerts_total", "Alerts accepted by the webhook", ("symbol", "type")))
+alerts_duplicate_total = registry.register(Counter(
+    "bot_alerts_duplicate_total", "Webhook retries/double-fires answered without a new alert", ("symbol", "type")))
+lock_hold_seconds = registry.register(Histogram(
+    "bot_symbol_lock_hold_seconds", "Time a symbol lock is held while processing alerts", ("symbol",)))
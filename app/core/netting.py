@@ -0,0 +1,140 @@
+import threading
+
+# Constants
+# alert type -> (long delta, short delta)
+ALERT_DELTAS = {
+    "long_open": (1, 0),
+    "long_close": (-1, 0),
+    "short_open": (0, 1),
+    "short_close": (0, -1),
+}
+
+def net_action(long_pos: int, short_pos: int) -> str:
+    """
+    Single action for net long/short alert counts, or "" if they cancel out.
+    """
+    if long_pos != short_pos:
+        if long_pos > 0: return "long_open"
+        elif short_pos > 0: return "short_open"
+        elif long_pos < 0: return "long_close"
+        elif short_pos < 0: return "short_close"
+    return ""
+
+class SymbolNet:
+    """
+    Net long/short counts of one symbol's pending alerts and their ids.
+    """
+    __slots__ = ("long", "short", "ids")
+
+    def __init__(self):
+        self.long = 0
+        self.short = 0
+        self.ids = {}   # alert id -> type
+
+    def add(self, alert_id: int, alert_type: str) -> None:
+        if alert_id in self.ids:
+            return
+        long_delta, short_delta = ALERT_DELTAS.get(alert_type, (0, 0))
+        self.long += long_delta
+        self.short += short_delta
+        self.ids[alert_id] = alert_type
+
+    @property
+    def action(self) -> str:
+        return net_action(self.long, self.short)
+
+class NettingTable:
+    """
+    In-memory net intent of the pending alerts, per symbol.
+
+    Alerts are added in O(1) as they are indexed; the dispatcher `take()`s a
+    symbol's net action together with the ids it covers, so a run neither
+    loads nor re-nets the alert rows. Alerts this process did not see (other
+    workers, released claims) make a symbol stale: `take()` then returns
+    None and the caller rebuilds from the database. `load()` replaces the
+    whole table from (id, symbol, type) rows, e.g. on startup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._symbols = {}
+        self._stale = set()
+        self.added = 0
+        self.taken = 0
+        self.rebuilds = 0
+
+    def add(self, symbol: str, alert_id: int, alert_type: str) -> None:
+        with self._lock:
+            entry = self._symbols.get(symbol)
+            if entry is None:
+                entry = self._symbols[symbol] = SymbolNet()
+            entry.add(alert_id, alert_type)
+            self.added += 1
+
+    def take(self, symbol: str):
+        """
+        Removes and returns the symbol's SymbolNet; None if it is stale or unknown.
+        """
+        with self._lock:
+            entry = self._symbols.pop(symbol, None)
+            if symbol in self._stale:
+                self._stale.discard(symbol)
+                return None
+            if entry is not None:
+                self.taken += 1
+            return entry
+
+    def invalidate(self, symbol: str) -> None:
+        with self._lock:
+            self._stale.add(symbol)
+
+    def load(self, rows) -> int:
+        """
+        Replaces the table with (id, symbol, type) rows of pending alerts.
+        Alerts added meanwhile with a newer id than the rows are kept.
+        """
+        symbols = {}
+        newest = 0
+        for alert_id, symbol, alert_type in rows:
+            entry = symbols.get(symbol)
+            if entry is None:
+                entry = symbols[symbol] = SymbolNet()
+            entry.add(alert_id, alert_type)
+            newest = max(newest, alert_id)
+        with self._lock:
+            for symbol, current in self._symbols.items():
+                for alert_id, alert_type in current.ids.items():
+                    if alert_id > newest:
+                        symbols.setdefault(symbol, SymbolNet()).add(alert_id, alert_type)
+            self._symbols = symbols
+            self._stale.clear()
+            self.rebuilds += 1
+        return len(symbols)
+
+    def reconcile(self, counts: dict) -> list:
+        """
+        Marks symbols whose pending count differs from `counts` (symbol ->
+        rows pending in the database) as stale. Returns the stale symbols.
+        """
+        with self._lock:
+            for symbol in set(counts) | set(self._symbols):
+                entry = self._symbols.get(symbol)
+                if len(entry.ids if entry else ()) != counts.get(symbol, 0):
+                    self._stale.add(symbol)
+            return sorted(self._stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._symbols = {}
+            self._stale.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "symbols": len(self._symbols),
+                "alerts": sum(len(e.ids) for e in self._symbols.values()),
+                "stale": len(self._stale),
+                "added": self.added,
+                "taken": self.taken,
+                "rebuilds": self.rebuilds,
+            }
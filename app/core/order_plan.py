@@ -0,0 +1,98 @@
+from typing import NamedTuple
+from app.core.precision import QuantityRules
+
+# Constants
+MIN_BALANCE = 10.0  # quote asset; below this no position is opened
+
+class OrderPlan(NamedTuple):
+    """
+    Everything needed to send one trade, computed before any order goes out.
+    `retries[i]` is the one-step-smaller quantity for `chunks[i]` ("" = no retry).
+    """
+    symbol: str
+    action: str            # long_open, short_open, long_close, short_close
+    position_side: str     # LONG / SHORT
+    order_side: str        # BUY / SELL
+    reduce_only: bool
+    quantity: str          # total, formatted to the lot step
+    chunks: tuple
+    retries: tuple
+    price: float
+    notional: float        # quantity * price, in the quote asset
+    leverage: str
+
+    def shrink(self, quantity: str) -> str:
+        """
+        Retry quantity for a failed chunk (place_chunks' `shrink` hook).
+        """
+        for chunk, retry in zip(self.chunks, self.retries):
+            if chunk == quantity:
+                return retry
+        return ""
+
+    def to_dict(self) -> dict:
+        data = self._asdict()
+        data["chunks"] = list(self.chunks)
+        data["retries"] = list(self.retries)
+        data["notional"] = round(self.notional, 8)
+        return data
+
+def _build(symbol: str, action: str, position_side: str, order_side: str, reduce_only: bool, rules: QuantityRules,
+           total: int, price: float, leverage: str) -> OrderPlan:
+    chunks = tuple(rules.split(total))
+    if not chunks:
+        raise ValueError(f"{symbol} quantity {rules.format(total)} is below the lot limits")
+    # Full chunks share one string, so each distinct size is shrunk once
+    shrunk = {c: rules.shrink(c) for c in set(chunks)}
+    return OrderPlan(
+        symbol=symbol,
+        action=action,
+        position_side=position_side,
+        order_side=order_side,
+        reduce_only=reduce_only,
+        quantity=rules.format(total),
+        chunks=chunks,
+        retries=tuple(shrunk[c] for c in chunks),
+        price=price,
+        notional=total / rules.scale * price,
+        leverage=leverage,
+    )
+
+def plan_open(symbol: str, action: str, rules: QuantityRules, price: float, balance: float,
+              balance_percent: float, leverage: str) -> OrderPlan:
+    """
+    Sizes a new position: `balance_percent` of the quote balance times leverage, at `price`.
+    Raises ValueError when nothing can be opened.
+    """
+    if action not in ("long_open", "short_open"):
+        raise ValueError(f"Not an open action: {action}")
+    if balance < MIN_BALANCE or price <= 0:
+        raise ValueError(f"Insufficient balance or price. {symbol} bal={balance} price={price}")
+
+    percent = max(min(balance_percent, 100), 1)
+    try:
+        lev_num = float(leverage)
+        if lev_num <= 0: lev_num = 1.0
+    except ValueError:
+        lev_num = 1.0
+
+    desired = (balance * (percent / 100.0) * lev_num) / price
+    total = rules.floor(max(rules.to_units(desired), rules.min))
+    if total < rules.min or total <= 0:
+        raise ValueError(f"Total qty below min after step adjust. {symbol} qty={rules.format(total)}")
+
+    long = action == "long_open"
+    return _build(symbol, action, "LONG" if long else "SHORT", "BUY" if long else "SELL", False,
+                  rules, total, price, str(leverage))
+
+def plan_close(symbol: str, position_side: str, rules: QuantityRules, position_amt, price: float = 0.0) -> OrderPlan:
+    """
+    Reduce-only plan that flattens `position_amt` (signed or absolute) of a LONG/SHORT position.
+    Raises ValueError when there is nothing to close.
+    """
+    total = rules.floor(rules.to_units(abs(float(position_amt))))
+    if total <= 0:
+        raise ValueError(f"No {position_side} position to close for {symbol}")
+    action = "long_close" if position_side == "LONG" else "short_close"
+    order_side = "SELL" if position_side == "LONG" else "BUY"
+    return _build(symbol, action, position_side, order_side, True, rules, total, price, "")
@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+def _decimals(text: str) -> int:
+    """
+    Number of significant fractional digits in a plain decimal string ("0.00100" -> 3).
+    """
+    if "." not in text:
+        return 0
+    return len(text.split(".", 1)[1].rstrip("0"))
+
+def _plain(value) -> str:
+    """
+    Plain decimal text for a str/int/float (floats by their shortest repr, like Decimal(str(x))).
+    """
+    text = value if isinstance(value, str) else repr(value)
+    text = text.strip()
+    if "e" in text or "E" in text:
+        text = format(Decimal(text), "f")
+    return text
+
+class QuantityRules:
+    """
+    One symbol's lot filter as integers in units of 10**-decimals.
+
+    Built once per exchange-info refresh; rounding, clamping and chunking are
+    then integer arithmetic, and only the final quantity is formatted. Output
+    strings match format(Decimal(...).normalize(), "f").
+    """
+    __slots__ = ("decimals", "scale", "step", "min", "max")
+
+    def __init__(self, step_size, min_qty=None, max_qty=None):
+        step_text = _plain(step_size or "0")
+        min_text = _plain(min_qty or "0")
+        max_text = _plain(max_qty or "0")
+        self.decimals = max(_decimals(step_text), _decimals(min_text), _decimals(max_text))
+        self.scale = 10 ** self.decimals
+        self.step = self.to_units(step_text)
+        self.min = self.to_units(min_text)
+        max_units = self.to_units(max_text)
+        self.max = self.floor(max_units) if max_units > 0 else None
+
+    def to_units(self, value) -> int:
+        """
+        Converts a quantity to integer units, truncating digits below the scale.
+        """
+        text = _plain(value)
+        negative = text.startswith("-")
+        whole, _, frac = text.lstrip("+-").partition(".")
+        units = int(whole or "0") * self.scale + int((frac[:self.decimals]).ljust(self.decimals, "0") or "0")
+        return -units if negative else units
+
+    def floor(self, units: int) -> int:
+        if self.step <= 0:
+            return units
+        return units - units % self.step
+
+    def format(self, units: int) -> str:
+        if units < 0:
+            return "-" + self.format(-units)
+        whole, frac = divmod(units, self.scale)
+        if not frac:
+            return str(whole)
+        return f"{whole}.{str(frac).rjust(self.decimals, '0').rstrip('0')}"
+
+    def clamp(self, quantity) -> int:
+        """
+        Order quantity for `quantity`: capped at max, raised to min, floored to step.
+        """
+        units = self.to_units(quantity)
+        if self.max is not None and units > self.max:
+            units = self.max
+        if units < self.min:
+            units = self.min
+        units = self.floor(units)
+        if units < self.min:
+            units = self.min
+        return units
+
+    def split(self, total: int, chunk: int = None) -> list:
+        """
+        Splits `total` units into chunks of at most `chunk` (default: max) units.
+        Returns formatted quantities; a remainder below min is dropped.
+        """
+        chunk = self.floor(chunk if chunk is not None else (self.max or total))
+        if chunk <= 0 or chunk < self.min:
+            return []
+        remain = self.floor(total)
+        if remain < self.min:
+            return []
+        full, remain = divmod(remain, chunk)
+        parts = [self.format(chunk)] * full
+        if remain and remain >= self.min:
+            parts.append(self.format(remain))
+        return parts
+
+    def shrink(self, quantity: str) -> str:
+        """
+        One step less than `quantity`, or "" once that would fall below min.
+        """
+        units = self.floor(self.to_units(quantity) - self.step)
+        return self.format(units) if units >= self.min else ""
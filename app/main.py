@@ -1,8 +1,5 @@
-import threading
-import time
 import sys
 import os
-import uvicorn
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
@@ -12,13 +9,56 @@ sys.path.append(os.getcwd())
 from app.core import logging
 from app.core.config import settings
 from app.services import telegram_service
+from app.services import binance_service
+from app.services import dispatch_service
+from app.services import tradingview_service
+from app.services import account_service
+from app.services import market_service
+from app.services import retention_service
+from app.services import coordination_service
+from app.core.database import init_db
 from app.api import webhook
+from app.api import metrics
 from app.core import state
 
 # Initialize Logging
 logging.setup_logging()
 logger = logging.logger
 
+def start_leader_services():
+    """
+    Everything that must run in exactly one process: trading, Telegram polling, streams, retention.
+    """
+    if coordination_service.multi_worker():
+        tradingview_service.replay_orphaned_journals()
+
+    # Start Telegram Service Thread
+    telegram_service.start_telegram_service()
+    logger.info("[Main] Telegram Service Started")
+
+    # Warm exchange metadata in the background so the first alert hits the cache
+    binance_service.symbol_index.refresh_async()
+    binance_service.leverage_brackets.refresh_async()
+
+    # Account balances/positions and quotes from Binance streams
+    account_service.start_account_stream()
+    market_service.start_market_stream()
+
+    # Alert Dispatcher (drains pending alerts immediately) over a fresh netting table
+    tradingview_service.load_netting()
+    dispatch_service.start_dispatcher()
+
+    # Background log retention (archive, roll up, incremental vacuum)
+    retention_service.start_retention()
+
+def stop_leader_services():
+    retention_service.stop_retention()
+    dispatch_service.stop_dispatcher()
+    tradingview_service.netting.clear()
+    account_service.stop_account_stream()
+    market_service.stop_market_stream()
+    telegram_service.stop_telegram_service()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
@@ -26,17 +66,26 @@ async def lifespan(app: FastAPI):
     logger.info("= Bot Starting...                     =")
     logger.info("=======================================")
     state.bot_running = True
-    
-    # Start Telegram Service Thread
-    telegram_thread = threading.Thread(target=telegram_service.run_telegram_service, daemon=True)
-    telegram_thread.start()
-    logger.info("[Main] Telegram Service Started")
-    
+
+    # Create tables / apply migrations before anything touches the DB
+    init_db()
+
+    # Every worker takes webhooks: replay this worker's ingest journal first
+    tradingview_service.start_alert_journal()
+
+    # One worker (elected when WEB_WORKERS > 1) dispatches trades and polls Telegram
+    coordination_service.start_coordination(start_leader_services, stop_leader_services)
+
     yield
     
     # Shutdown
     logger.info("[Main] Stopping...")
     state.bot_running = False
+    tradingview_service.stop_alert_journal()
+    coordination_service.stop_coordination(stop_leader_services)
+    binance_service.fan_out.shutdown()
+    telegram_service.stop_outbox()
+    logging.shutdown_logging()
 
 # FastAPI App
 app = FastAPI(
@@ -47,12 +96,19 @@ app = FastAPI(
 
 # Include Routers
 app.include_router(webhook.router)
+app.include_router(metrics.router)
 
 def main():
     # Use uvicorn to run the app
     # Host 0.0.0.0 is better for Docker/remote access
     import uvicorn
-    uvicorn.run(app, host=settings.WEBHOOK_IP, port=settings.WEBHOOK_PORT)
+    if settings.WEB_WORKERS > 1:
+        # Workers import the app themselves; each runs the lifespan above.
+        # Migrate once here so the workers' init_db() calls find nothing to create.
+        init_db()
+        uvicorn.run("app.main:app", host=settings.WEBHOOK_IP, port=settings.WEBHOOK_PORT, workers=settings.WEB_WORKERS)
+    else:
+        uvicorn.run(app, host=settings.WEBHOOK_IP, port=settings.WEBHOOK_PORT)
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Index, text
 from datetime import datetime
 from app.core.database import Base
 
@@ -11,3 +11,14 @@ class Alert(Base):
     type = Column(String) # long_open, etc.
     price = Column(Float)
     is_processed = Column(Boolean, default=False)
+    journal_id = Column(String, nullable=True) # Ingest journal entry id (dedupes replays)
+    dedupe_key = Column(String, nullable=True) # Idempotency key or bar-time content hash (dedupes retries)
+    claimed_by = Column(String, nullable=True) # Worker executing the alert (see crud.claim_pending_alerts)
+    claimed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_alerts_journal_id", "journal_id", unique=True),
+        Index("ix_alerts_dedupe_key", "dedupe_key", unique=True),
+        # Pending alerts per symbol (partial: processed rows are never scanned)
+        Index("ix_alerts_pending", "symbol", "id", sqlite_where=text("is_processed = 0")),
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Float
+from app.core.database import Base
+
+class Lease(Base):
+    """
+    Named, expiring ownership record shared by all worker processes (e.g. the dispatch leader).
+    """
+    __tablename__ = "leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    address = Column(String, nullable=False, default="")  # how followers reach the owner
+    expires_at = Column(Float, nullable=False)  # unix time
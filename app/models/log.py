@@ -6,7 +6,7 @@ class Log(Base):
     __tablename__ = "logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    datetime = Column(DateTime, default=datetime.utcnow)
+    datetime = Column(DateTime, default=datetime.utcnow, index=True)
     type = Column(String, index=True)
     func = Column(String, index=True)
     desc = Column(String)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Date, Index
+from app.core.database import Base
+
+class LogRollup(Base):
+    """
+    Daily log counts per function and level, kept after raw logs expire.
+    """
+    __tablename__ = "log_rollups"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    func = Column(String, nullable=False, default="")
+    type = Column(String, nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_log_rollups_key", "day", "func", "type", unique=True),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Index, text
 from datetime import datetime
 from app.core.database import Base
 
@@ -16,3 +16,8 @@ class Order(Base):
     entry_price = Column(Float)
     exit_price = Column(Float, nullable=True)
     pnl = Column(Float, nullable=True)
+
+    __table_args__ = (
+        # Open orders by (symbol, side), used when closing positions
+        Index("ix_orders_open", "symbol", "side", sqlite_where=text("is_open = 1")),
+    )
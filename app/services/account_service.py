@@ -0,0 +1,262 @@
+import threading
+import time
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.stream_service import StreamClient, ws_base_url
+
+# Constants
+LISTEN_KEY_KEEPALIVE = 30 * 60  # Binance expires listenKeys after 60 minutes
+
+def _fmt(value) -> str:
+    return str(value) if value is not None else "0"
+
+class AccountState:
+    """
+    In-process cache of balances (per asset) and positions (per symbol).
+
+    Kept current by the futures user-data stream (ACCOUNT_UPDATE events) and
+    reconciled against REST every `reconcile_interval` seconds. Entries are
+    stored in the same shape as `client.balance()` / `client.get_position_risk()`
+    items so readers don't care where the data came from. While the stream is
+    down the cache is not trusted and reads fall through to REST.
+
+    The bot's own orders mark their symbol dirty (`mark_traded`): the fill
+    reaches the stream only later, so the next position read for that
+    symbol goes to REST once, and the bot always sees its own writes.
+    """
+
+    def __init__(self, client_factory, ws_url=None, reconcile_interval: float = 60.0):
+        self.client_factory = client_factory
+        self.ws_url = ws_url
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._balances = {}
+        self._positions = {}
+        self._updated = {}  # key -> receive time (ms) of the last stream update
+        self._traded = {}   # symbol -> time (ms) of the bot's last order, until re-read from REST
+        self._reconciled_at = 0.0
+        self._listen_key = None
+        self._stream = None
+        self._worker = None
+        self._stop = threading.Event()
+        self.events = 0
+        self.rest_reads = 0
+
+    # Lifecycle
+
+    def _stream_url(self) -> str:
+        client = self.client_factory()
+        self._listen_key = client.new_listen_key().get("listenKey")
+        base = self.ws_url() if callable(self.ws_url) else self.ws_url
+        return f"{base.rstrip('/')}/ws/{self._listen_key}"
+
+    def _on_open(self) -> None:
+        # A fresh connection may have missed events: resync before trusting it
+        self.reconcile()
+
+    def start(self) -> None:
+        if self._stream is not None:
+            return
+        self._stop.clear()
+        self._stream = StreamClient("AccountStream", self._stream_url, self.apply_event, on_open=self._on_open)
+        self._stream.start()
+        self._worker = threading.Thread(target=self._maintain, name="AccountState", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream = None
+        if self._worker is not None:
+            self._worker.join(5)
+            self._worker = None
+        if self._listen_key:
+            try:
+                self.client_factory().close_listen_key(listenKey=self._listen_key)
+            except Exception:
+                pass
+            self._listen_key = None
+
+    def _maintain(self) -> None:
+        last_keepalive = time.monotonic()
+        while not self._stop.wait(min(self.reconcile_interval, 60)):
+            if time.monotonic() - self._reconciled_at >= self.reconcile_interval:
+                self.reconcile()
+            if self._listen_key and time.monotonic() - last_keepalive >= LISTEN_KEY_KEEPALIVE:
+                try:
+                    self.client_factory().renew_listen_key(listenKey=self._listen_key)
+                    last_keepalive = time.monotonic()
+                except Exception as e:
+                    logger.warning(f"[AccountState] listenKey keepalive failed: {e}")
+                    self._stream.reconnect()
+
+    def is_live(self) -> bool:
+        return self._stream is not None and self._stream.connected and self._reconciled_at > 0
+
+    # Updates
+
+    def reconcile(self) -> bool:
+        """
+        Replaces the snapshot with REST data. Entries the stream updated after
+        the REST call started are newer and are kept.
+        """
+        started_ms = time.time() * 1000
+        try:
+            from app.services.binance_service import fan_out
+            client = self.client_factory()
+            balances, positions = fan_out.gather(
+                lambda: client.balance(recvWindow=5000),
+                lambda: client.get_position_risk(recvWindow=5000)
+            )
+        except Exception as e:
+            logger.error(f"[AccountState.reconcile] Error: {e}")
+            return False
+
+        with self._lock:
+            new_balances = {b['asset']: dict(b) for b in balances}
+            new_positions = {p['symbol']: dict(p) for p in positions}
+            for key, event_ms in self._updated.items():
+                kind, name = key
+                if event_ms <= started_ms:
+                    continue
+                source = self._balances if kind == "B" else self._positions
+                target = new_balances if kind == "B" else new_positions
+                if name in source:
+                    target[name] = source[name]
+            self._balances = new_balances
+            self._positions = new_positions
+            self._updated = {k: v for k, v in self._updated.items() if v > started_ms}
+            self._traded = {k: v for k, v in self._traded.items() if v > started_ms}
+            self._reconciled_at = time.monotonic()
+            self.rest_reads += 1
+        return True
+
+    def mark_traded(self, symbol: str) -> None:
+        """
+        Records that the bot just sent orders for `symbol` (filled or not).
+        """
+        with self._lock:
+            self._traded[symbol] = time.time() * 1000
+
+    def _refresh_position(self, symbol: str) -> None:
+        """
+        Re-reads one symbol's position from REST after the bot traded it.
+        """
+        started_ms = time.time() * 1000
+        positions = self.client_factory().get_position_risk(symbol=symbol, recvWindow=5000)
+        with self._lock:
+            if self._updated.get(("P", symbol), 0) <= started_ms:
+                for p in positions:
+                    if p.get('symbol') == symbol:
+                        self._positions[symbol] = dict(p)
+            if self._traded.get(symbol, 0) <= started_ms:
+                self._traded.pop(symbol, None)
+            self.rest_reads += 1
+
+    def apply_event(self, data: dict) -> None:
+        event = data.get("e")
+        if event == "ACCOUNT_UPDATE":
+            self._apply_account_update(data)
+        elif event == "ACCOUNT_CONFIG_UPDATE":
+            conf = data.get("ac") or {}
+            if conf.get("s"):
+                with self._lock:
+                    pos = self._positions.setdefault(conf["s"], {"symbol": conf["s"]})
+                    pos["leverage"] = _fmt(conf.get("l"))
+        elif event == "listenKeyExpired":
+            logger.warning("[AccountState] listenKey expired, reconnecting")
+            if self._stream is not None:
+                self._stream.reconnect()
+
+    def _apply_account_update(self, data: dict) -> None:
+        # Local receive time (not the exchange's "E") so clock skew can't reorder updates
+        event_ms = time.time() * 1000
+        update = data.get("a") or {}
+        with self._lock:
+            self.events += 1
+            for b in update.get("B", []):
+                asset = b.get("a")
+                bal = self._balances.setdefault(asset, {"asset": asset})
+                bal["balance"] = _fmt(b.get("wb"))
+                bal["crossWalletBalance"] = _fmt(b.get("cw"))
+                self._updated[("B", asset)] = event_ms
+
+            for p in update.get("P", []):
+                if p.get("ps", "BOTH") != "BOTH":
+                    continue  # Hedge-mode legs are not used by the bot
+                symbol = p.get("s")
+                pos = self._positions.setdefault(symbol, {"symbol": symbol})
+                amt = float(p.get("pa") or 0)
+                entry = float(p.get("ep") or 0)
+                try:
+                    leverage = float(pos.get("leverage") or 1) or 1
+                except ValueError:
+                    leverage = 1
+                pos["positionAmt"] = _fmt(p.get("pa"))
+                pos["entryPrice"] = _fmt(p.get("ep"))
+                pos["unRealizedProfit"] = _fmt(p.get("up"))
+                pos["marginType"] = p.get("mt", pos.get("marginType"))
+                pos["isolatedMargin"] = _fmt(p.get("iw"))
+                pos["isolatedWallet"] = _fmt(p.get("iw"))
+                pos["positionInitialMargin"] = str(abs(amt) * entry / leverage)
+                self._updated[("P", symbol)] = event_ms
+
+    # Reads
+
+    def _ensure_fresh(self) -> None:
+        if not self.is_live() and not self.reconcile():
+            raise RuntimeError("account state unavailable (stream down and REST failed)")
+
+    def get_balances(self) -> list:
+        self._ensure_fresh()
+        with self._lock:
+            return [dict(b) for b in self._balances.values()]
+
+    def get_positions(self) -> list:
+        self._ensure_fresh()
+        with self._lock:
+            return [dict(p) for p in self._positions.values()]
+
+    def get_snapshot(self) -> tuple:
+        """
+        Balances and positions from one consistent read (at most one REST resync).
+        """
+        self._ensure_fresh()
+        with self._lock:
+            return [dict(b) for b in self._balances.values()], [dict(p) for p in self._positions.values()]
+
+    def get_position(self, symbol: str) -> dict:
+        self._ensure_fresh()
+        with self._lock:
+            traded = symbol in self._traded
+        if traded:
+            self._refresh_position(symbol)
+        with self._lock:
+            pos = self._positions.get(symbol)
+            return dict(pos) if pos else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "live": self.is_live(),
+                "events": self.events,
+                "rest_reads": self.rest_reads,
+                "positions": len(self._positions),
+                "stream": self._stream.stats() if self._stream else None,
+            }
+
+def _client():
+    from app.services import binance_service
+    return binance_service.BinanceService.get_client()
+
+account_state = AccountState(_client, ws_url=ws_base_url, reconcile_interval=settings.ACCOUNT_RECONCILE_INTERVAL)
+
+def start_account_stream() -> None:
+    if not settings.ACCOUNT_STREAM_ENABLED:
+        return
+    account_state.start()
+    logger.info("[start_account_stream] Account user-data stream started")
+
+def stop_account_stream() -> None:
+    account_state.stop()
@@ -1,30 +1,422 @@
+import contextvars
 import datetime
-from decimal import Decimal, ROUND_DOWN
-from binance.um_futures import UMFutures
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.cache import RefreshingSnapshot
+from app.core.concurrency import FanOut
+from app.core.breaker import CircuitBreaker, CircuitOpenError, RetryBudget, STATE_VALUES, backoff
+from app.core.precision import QuantityRules
+from app.core import order_plan
+from app.core import metrics
 
 # Constants
-BASE_URL = "https://testnet.binancefuture.com" if "test" in settings.BINANCE_API_KEY.lower() else "https://fapi.binance.com"
+LIVE_URL = "https://fapi.binance.com"
+TESTNET_URL = "https://testnet.binancefuture.com"
+
+_base_url = None
+
+def get_base_url() -> str:
+    """
+    REST endpoint: BINANCE_BASE_URL, else live or testnet by API key (resolved on first use).
+    """
+    global _base_url
+    if _base_url is None:
+        _base_url = settings.BINANCE_BASE_URL.rstrip("/") or (
+            TESTNET_URL if "test" in settings.BINANCE_API_KEY.lower() else LIVE_URL
+        )
+    return _base_url
+
+# Request priorities: lower runs first
+PRIORITY_ORDER = 0      # order placement and cancels
+PRIORITY_TRADE = 1      # lookups on the trade path (sizing, positions to close)
+PRIORITY_NORMAL = 2     # account sync, metadata
+PRIORITY_LOW = 3        # informational queries (Telegram commands)
+PRIORITY_NAMES = {PRIORITY_ORDER: "order", PRIORITY_TRADE: "trade", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+ORDER_PRIORITY_ENDPOINTS = {"new_order", "new_batch_order", "cancel_order", "cancel_batch_order", "cancel_open_orders"}
+# Share of the per-minute weight limit each priority may fill. Orders and trade
+# lookups are never held back: a trade waits for its lookups under a deadline
+# (trade_service) far shorter than the rest of a minute.
+WEIGHT_SHARES = {PRIORITY_NORMAL: 0.9, PRIORITY_LOW: 0.7}
+# REQUEST_WEIGHT per call (USD-M futures docs); unlisted endpoints cost 1
+ENDPOINT_WEIGHTS = {
+    "new_order": 0, "new_batch_order": 5, "get_account_trades": 5, "get_position_risk": 5,
+    "balance": 5, "account": 5, "get_income_history": 30,
+}
+WAIT_SLICE = 0.05       # re-check interval while queued behind other work
+
+_priority = contextvars.ContextVar("binance_priority", default=PRIORITY_NORMAL)
+
+@contextmanager
+def request_priority(priority: int):
+    """
+    Runs the Binance calls made inside the block (and its fan-outs) at `priority`.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def _depth_weight(limit) -> int:
+    limit = int(limit or 500)
+    return 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+
+def _klines_weight(limit) -> int:
+    limit = int(limit or 500)
+    return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+
+def predict_weight(endpoint: str, kwargs: dict) -> int:
+    """
+    Expected REQUEST_WEIGHT of one call, including the parameter-dependent ones.
+    """
+    if endpoint == "depth":
+        return _depth_weight(kwargs.get("limit"))
+    if endpoint in ("klines", "continuous_klines", "mark_price_klines"):
+        return _klines_weight(kwargs.get("limit"))
+    if endpoint in ("ticker_price", "book_ticker"):
+        return 1 if kwargs.get("symbol") else 2
+    if endpoint == "ticker_24hr_price_change":
+        return 1 if kwargs.get("symbol") else 40
+    if endpoint == "get_orders":
+        return 1 if kwargs.get("symbol") else 40
+    return ENDPOINT_WEIGHTS.get(endpoint, 1)
+
+class RequestBudget:
+    """
+    Global Binance request scheduler shared by all threads.
+
+    At most `max_concurrent` requests are in flight and `per_second` are
+    started per second; waiting callers are admitted in priority order, so
+    orders and cancels go ahead of queued lookups. Weight is tracked per
+    minute from the X-MBX-USED-WEIGHT-1M header (`record_response`) and from
+    each call's predicted weight; normal and low priority calls wait for the
+    next minute rather than push usage past their share of `weight_limit`.
+    """
+    def __init__(self, max_concurrent: int, per_second: float, weight_limit: int = 2400, clock=time.time):
+        self.max_concurrent = max(int(max_concurrent), 1)
+        self.per_second = max(float(per_second), 0.1)
+        self.weight_limit = max(int(weight_limit), 1)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._tokens = self.per_second
+        self._last = time.monotonic()
+        self._waiting = {p: 0 for p in PRIORITY_NAMES}
+        self._minute = None
+        self._sent_weight = 0       # predicted weight sent by this process this minute
+        self._reported_weight = 0   # latest header value this minute (all processes on the IP)
+        self._pending_weight = 0    # predicted weight of calls without a response yet
+        self.order_count_10s = 0
+        self.order_count_1m = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.deferred = 0
+        self.wait_seconds = 0.0
+
+    def _roll_minute(self) -> None:
+        minute = int(self._clock() // 60)
+        if minute != self._minute:
+            self._minute = minute
+            self._sent_weight = 0
+            self._reported_weight = 0
+
+    def used_weight(self) -> int:
+        with self._cond:
+            self._roll_minute()
+            return self._used_weight()
+
+    def _used_weight(self) -> int:
+        return max(self._reported_weight + self._pending_weight, self._sent_weight)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.per_second, self._tokens + (now - self._last) * self.per_second)
+        self._last = now
+
+    def _admit_delay(self, priority: int, weight: int) -> float:
+        """
+        0 if the caller may start now, else how long to wait before checking again.
+        """
+        if any(self._waiting[p] for p in PRIORITY_NAMES if p < priority):
+            return WAIT_SLICE
+        if self.in_flight >= self.max_concurrent:
+            return WAIT_SLICE
+        share = WEIGHT_SHARES.get(priority)
+        if share is not None:
+            self._roll_minute()
+            if self._used_weight() + weight > self.weight_limit * share:
+                return max(60 - self._clock() % 60, WAIT_SLICE)
+        self._refill()
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.per_second
+        return 0.0
+
+    def acquire(self, priority: int = PRIORITY_NORMAL, weight: int = 1) -> None:
+        started = time.monotonic()
+        deferred = False
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    delay = self._admit_delay(priority, weight)
+                    if delay <= 0:
+                        break
+                    if delay > WAIT_SLICE and not deferred:
+                        deferred = True
+                        self.deferred += 1
+                        logger.warning(f"[RequestBudget] {PRIORITY_NAMES[priority]} call (weight {weight}) "
+                                       f"held back: {self._used_weight()}/{self.weight_limit} weight used")
+                    self._cond.wait(delay)
+            finally:
+                self._waiting[priority] -= 1
+            self._tokens -= 1
+            self._sent_weight += weight
+            self._pending_weight += weight
+            self.in_flight += 1
+            self.requests += 1
+            self.wait_seconds += time.monotonic() - started
+            # A queued lower-priority caller may be next
+            self._cond.notify_all()
+
+    def release(self, weight: int = 1) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._pending_weight = max(self._pending_weight - weight, 0)
+            self._cond.notify_all()
+
+    def record_response(self, response, *args, **kwargs):
+        """
+        `requests` response hook: takes used weight and order counts from the headers.
+        A 429/418 marks the minute's weight as exhausted.
+        """
+        headers = response.headers
+        with self._cond:
+            self._roll_minute()
+            used = headers.get("X-MBX-USED-WEIGHT-1M")
+            if used is not None and used.isdigit():
+                # Responses can arrive out of order: the count only grows within a minute
+                self._reported_weight = max(self._reported_weight, int(used))
+            if response.status_code in (418, 429):
+                self._reported_weight = max(self._reported_weight, self.weight_limit)
+            for header, attr in (("X-MBX-ORDER-COUNT-10S", "order_count_10s"), ("X-MBX-ORDER-COUNT-1M", "order_count_1m")):
+                value = headers.get(header)
+                if value is not None and value.isdigit():
+                    setattr(self, attr, int(value))
+        return response
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._roll_minute()
+            return {
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "used_weight": self._used_weight(),
+                "weight_limit": self.weight_limit,
+                "order_count_10s": self.order_count_10s,
+                "order_count_1m": self.order_count_1m,
+                "deferred": self.deferred,
+                "waiting": {PRIORITY_NAMES[p]: n for p, n in self._waiting.items()},
+            }
+
+# Error classes: whether a call is retried (jittered backoff between
+# `backoff` and `max_backoff`) and whether it counts toward the endpoint's breaker
+ERROR_POLICIES = {
+    "rate_limit": {"retry": True, "backoff": 1.0, "max_backoff": 8.0, "trips": True},
+    "timestamp": {"retry": True, "backoff": 0.05, "max_backoff": 0.5, "trips": False},
+    "transport": {"retry": True, "backoff": 0.2, "max_backoff": 2.0, "trips": True},
+    "margin": {"retry": False, "backoff": 0.0, "max_backoff": 0.0, "trips": False},  # legs are shrunk instead
+    "filter": {"retry": False, "backoff": 0.0, "max_backoff": 0.0, "trips": False},
+    "circuit_open": {"retry": False, "backoff": 0.0, "max_backoff": 0.0, "trips": False},
+    "other": {"retry": False, "backoff": 0.0, "max_backoff": 0.0, "trips": False},
+}
+RATE_LIMIT_CODES = {-1003, -1015}
+TIMESTAMP_CODES = {-1021}
+MARGIN_CODES = {-2018, -2019, -2027, -2028}
+FILTER_CODES = {-1013, -1111, -4003, -4005, -4131, -4164}
+TRANSPORT_CODES = {-1001, -1007, -1008}
+# A transport error on these leaves the order state unknown: never resend blindly
+ORDER_ENDPOINTS = {"new_order", "new_batch_order"}
+
+def _is_transport_error(error) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import requests
+    except ImportError:
+        return False
+    return isinstance(error, requests.exceptions.RequestException)
+
+def classify_error(error) -> str:
+    """
+    Error class of a connector exception or a Binance error code (see ERROR_POLICIES).
+    """
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    code = error if isinstance(error, int) else getattr(error, "error_code", None)
+    status = getattr(error, "status_code", None)
+    if status in (418, 429) or code in RATE_LIMIT_CODES:
+        return "rate_limit"
+    if code in TIMESTAMP_CODES:
+        return "timestamp"
+    if code in MARGIN_CODES:
+        return "margin"
+    if code in FILTER_CODES:
+        return "filter"
+    if code in TRANSPORT_CODES or (isinstance(status, int) and status >= 500):
+        return "transport"
+    if isinstance(error, Exception) and _is_transport_error(error):
+        return "transport"
+    return "other"
+
+def _retry_after(error) -> float:
+    header = getattr(error, "header", None) or {}
+    try:
+        return float(header.get("Retry-After") or 0)
+    except (TypeError, ValueError, AttributeError):
+        return 0.0
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(
+                endpoint, settings.BINANCE_BREAKER_THRESHOLD, settings.BINANCE_BREAKER_RESET)
+        return breaker
+
+retry_budget = RetryBudget(settings.BINANCE_RETRY_BUDGET_RATIO)
+
+metrics.registry.register(metrics.Gauge(
+    "bot_binance_circuit_state", "Binance endpoint circuit: 0 closed, 1 half-open, 2 open", ("endpoint",),
+    fn=lambda: {name: STATE_VALUES[b.state] for name, b in list(_breakers.items())}))
+
+class BudgetedClient:
+    """
+    Wraps the connector so every REST call goes through the request budget
+    (at its endpoint's predicted weight and the caller's priority) and its
+    endpoint's circuit breaker. Failures are classified; retryable
+    classes are retried with jittered backoff while the shared retry budget
+    allows, and an open circuit fails the call without touching the network.
+    """
+    def __init__(self, client, budget: RequestBudget, retries: RetryBudget = None,
+                 max_attempts: int = None, breaker=get_breaker, sleep=time.sleep):
+        self._client = client
+        self._budget = budget
+        self._retries = retries or retry_budget
+        self._max_attempts = max(int(max_attempts or settings.BINANCE_RETRY_ATTEMPTS), 1)
+        self._breaker = breaker
+        self._sleep = sleep
+
+    def _retry_delay(self, name: str, error_class: str, error, attempt: int, breaker):
+        """
+        Seconds to wait before retrying, or None to give up.
+        """
+        policy = ERROR_POLICIES[error_class]
+        if not policy["retry"] or attempt + 1 >= self._max_attempts:
+            return None
+        if error_class == "transport" and name in ORDER_ENDPOINTS:
+            return None
+        delay = backoff(attempt, policy["backoff"], policy["max_backoff"])
+        retry_after = _retry_after(error)
+        if retry_after > policy["max_backoff"]:
+            # Banned or throttled for longer than we would wait: stop calling until then
+            breaker.trip(retry_after)
+            return None
+        if not self._retries.try_retry():
+            return None
+        return max(delay, retry_after)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            breaker = self._breaker(name)
+            priority = PRIORITY_ORDER if name in ORDER_PRIORITY_ENDPOINTS else _priority.get()
+            weight = predict_weight(name, kwargs)
+            attempt = 0
+            while True:
+                breaker.before_call()
+                self._retries.record_call()
+                self._budget.acquire(priority, weight)
+                start = time.perf_counter()
+                try:
+                    result = attr(*args, **kwargs)
+                except Exception as e:
+                    error = e
+                else:
+                    breaker.record_success()
+                    return result
+                finally:
+                    metrics.binance_request_seconds.observe(time.perf_counter() - start, endpoint=name)
+                    self._budget.release(weight)
+
+                error_class = classify_error(error)
+                metrics.binance_request_errors.inc(endpoint=name, error_class=error_class)
+                if ERROR_POLICIES[error_class]["trips"]:
+                    breaker.record_failure()
+                else:
+                    # The exchange answered; the endpoint itself is healthy
+                    breaker.record_success()
+                delay = self._retry_delay(name, error_class, error, attempt, breaker)
+                if delay is None:
+                    raise error
+                metrics.binance_retries.inc(endpoint=name, error_class=error_class)
+                logger.warning(f"[BudgetedClient] {name} {error_class} error, retry {attempt + 1} in {delay:.2f}s: {error}")
+                self._sleep(delay)
+                attempt += 1
+        return call
+
+request_budget = RequestBudget(settings.BINANCE_MAX_CONCURRENT_REQUESTS, settings.BINANCE_REQUESTS_PER_SECOND,
+                               settings.BINANCE_WEIGHT_LIMIT)
+
+metrics.registry.register(metrics.Gauge(
+    "bot_binance_used_weight", "Binance request weight used this minute (headers and predicted)",
+    fn=request_budget.used_weight))
+metrics.registry.register(metrics.Gauge(
+    "bot_binance_order_count", "Binance order count from the last response headers", ("window",),
+    fn=lambda: {"10s": request_budget.order_count_10s, "1m": request_budget.order_count_1m}))
+
+# Independent REST calls issued in parallel under one deadline
+fan_out = FanOut(settings.BINANCE_MAX_CONCURRENT_REQUESTS, settings.BINANCE_FANOUT_TIMEOUT, name="BinanceIO")
 
 class BinanceService:
     _instance = None
+    _lock = threading.Lock()
 
     @classmethod
     def get_client(cls):
-        if cls._instance is None:
-            cls._instance = UMFutures(
-                key=settings.BINANCE_API_KEY, 
-                secret=settings.BINANCE_SECRET_KEY, 
-                base_url=BASE_URL
-            )
+        with cls._lock:
+            if cls._instance is None:
+                # The connector (and requests) load on first use, not at app import
+                from binance.um_futures import UMFutures
+                from requests.adapters import HTTPAdapter
+                client = UMFutures(
+                    key=settings.BINANCE_API_KEY, 
+                    secret=settings.BINANCE_SECRET_KEY, 
+                    base_url=get_base_url()
+                )
+                # One pooled connection per concurrent request
+                adapter = HTTPAdapter(pool_maxsize=request_budget.max_concurrent)
+                client.session.mount("https://", adapter)
+                client.session.mount("http://", adapter)
+                # Every response (errors included) reports the IP's used weight
+                client.session.hooks["response"].append(request_budget.record_response)
+                cls._instance = BudgetedClient(client, request_budget)
         return cls._instance
 
 def get_wallet_info(asset_filter: str = None) -> list:
     try:
-        client = BinanceService.get_client()
-        balances = client.balance(recvWindow=5000)
-        positions = client.get_position_risk(recvWindow=5000)
+        # Served from the stream-fed account cache (REST only while the stream is down)
+        from app.services.account_service import account_state
+        balances, positions = account_state.get_snapshot()
         wallet_data = []
 
         for b in balances:
@@ -61,82 +453,156 @@ def get_wallet_info(asset_filter: str = None) -> list:
         logger.error(f"[get_wallet_info] Asset: {asset_filter} - Error: {e}")
         return []
 
-def get_symbol_info(symbol: str) -> dict:
+def _to_decimal(value):
+    if value in (None, ''):
+        return None
+    return Decimal(str(value))
+
+def _parse_symbol_filters(symbol_info: dict) -> dict:
+    filters = {f['filterType']: f for f in symbol_info.get('filters', [])}
+    lot_filter = filters.get('LOT_SIZE', {})
+    market_lot_filter = filters.get('MARKET_LOT_SIZE', {})
+    price_filter = filters.get('PRICE_FILTER', {})
+
+    min_qty = lot_filter.get('minQty')
+    max_qty = lot_filter.get('maxQty')
+    step_size = lot_filter.get('stepSize')
+    tick_size = price_filter.get('tickSize')
+
+    return {
+        'base_asset': symbol_info['baseAsset'],
+        'quote_asset': symbol_info['quoteAsset'],
+        'min_qty': min_qty,
+        'max_qty': max_qty,
+        'step_size': step_size,
+        'tick_size': tick_size,
+        'market_max_qty': market_lot_filter.get('maxQty') or max_qty,
+        'market_step_size': market_lot_filter.get('stepSize') or step_size,
+        # Pre-parsed filter values, so callers don't rebuild Decimals per order
+        'lot_size': {
+            'min_qty': _to_decimal(min_qty),
+            'max_qty': _to_decimal(max_qty),
+            'step_size': _to_decimal(step_size),
+        },
+        'market_lot_size': {
+            'min_qty': _to_decimal(market_lot_filter.get('minQty')),
+            'max_qty': _to_decimal(market_lot_filter.get('maxQty')),
+            'step_size': _to_decimal(market_lot_filter.get('stepSize')),
+        },
+        'price_filter': {
+            'min_price': _to_decimal(price_filter.get('minPrice')),
+            'max_price': _to_decimal(price_filter.get('maxPrice')),
+            'tick_size': _to_decimal(tick_size),
+        },
+        # Integer-scaled lot rules for sizing (LIMIT and MARKET orders)
+        'quantity_rules': QuantityRules(step_size, min_qty, max_qty),
+        'market_quantity_rules': QuantityRules(
+            market_lot_filter.get('stepSize') or step_size, min_qty, market_lot_filter.get('maxQty') or max_qty),
+    }
+
+class SymbolIndex(RefreshingSnapshot):
     """
-    Fetches symbol information
-    Returns: base_asset, quote_asset, min_qty, max_qty, step_size, tick_size, min_leverage, max_leverage
+    Symbol -> parsed exchange filters, built from a single exchange_info call.
     """
-    try:
+    name = "SymbolIndex"
+
+    def _load(self) -> dict:
         client = BinanceService.get_client()
         info = client.exchange_info()
-        symbol_info = next((s for s in info['symbols'] if s['symbol'] == symbol), None)
-        
-        if not symbol_info:
-            return {}
+        index = {}
+        for s in info.get('symbols', []):
+            try:
+                index[s['symbol']] = _parse_symbol_filters(s)
+            except Exception as e:
+                logger.warning(f"[SymbolIndex] Skipping {s.get('symbol')}: {e}")
+        return index
+
+class LeverageBracketStore(RefreshingSnapshot):
+    """
+    Symbol -> (min_leverage, max_leverage), loaded for all symbols in one call.
+    """
+    name = "LeverageBracketStore"
 
-        # Safe filter extraction
-        filters = {f['filterType']: f for f in symbol_info['filters']}
-        lot_filter = filters.get('LOT_SIZE', {})
-        market_lot_filter = filters.get('MARKET_LOT_SIZE', {})
-        price_filter = filters.get('PRICE_FILTER', {})
+    def _load(self) -> dict:
+        client = BinanceService.get_client()
+        brackets = client.leverage_brackets(recvWindow=5000)
+        store = {}
+        for item in brackets or []:
+            leverages = [int(x['initialLeverage']) for x in item.get('brackets', [])]
+            if leverages:
+                store[item['symbol']] = (str(min(leverages)), str(max(leverages)))
+        return store
 
-        min_qty = lot_filter.get('minQty')
-        max_qty = lot_filter.get('maxQty')
-        step_size = lot_filter.get('stepSize')
-        tick_size = price_filter.get('tickSize')
-        
-        market_max_qty = market_lot_filter.get('maxQty') or max_qty
-        market_step_size = market_lot_filter.get('stepSize') or step_size
+symbol_index = SymbolIndex(ttl=settings.SYMBOL_INFO_TTL)
+leverage_brackets = LeverageBracketStore(ttl=settings.LEVERAGE_BRACKETS_TTL)
 
-        # Leverage brackets
-        min_leverage = None
-        max_leverage = None
-        
-        try:
-            brackets = client.leverage_brackets(symbol=symbol)
-            if brackets and 'brackets' in brackets[0]:
-                 # brackets returns a list, usually specific symbol query returns a list with 1 item if symbol arg is passed?
-                 # SDK says: If symbol is not sent, all symbols will be returned. 
-                 # We passed symbol=symbol to leverage_brackets? No, the original code didn't pass symbol, it fetched ALL.
-                 # Optimization: Pass symbol to API if possible. The SDK supports `symbol` param.
-                 # But let's stick to original logic structure for safety, or improve it.
-                 # Original: binance.leverage_brackets() -> iterates to find symbol.
-                 # Improved: client.leverage_brackets(symbol=symbol)
-                 
-                 # NOTE: binance-connector-python `leverage_brackets` supports `symbol`.
-                 symbol_bracket = brackets[0] # Since we filter by symbol in call
-                 leverages = [int(x['initialLeverage']) for x in symbol_bracket['brackets']]
-                 min_leverage = str(min(leverages))
-                 max_leverage = str(max(leverages))
-        except Exception:
-            # Fallback or error in getting brackets
-            pass
+def get_symbol_filters(symbol: str) -> dict:
+    """
+    Returns the cached filter entry for a symbol (including Decimal values), or {}.
+    """
+    return symbol_index.get(symbol) or {}
+
+def get_symbol_info(symbol: str) -> dict:
+    """
+    Fetches symbol information
+    Returns: base_asset, quote_asset, min_qty, max_qty, step_size, tick_size, min_leverage, max_leverage
+    """
+    try:
+        # Both caches may be cold: load them in parallel
+        # (leverage brackets serve the last known good snapshot if a refresh fails)
+        entry, brackets = fan_out.gather(
+            lambda: symbol_index.get(symbol),
+            lambda: leverage_brackets.get(symbol)
+        )
+        if not entry:
+            return {}
+        min_leverage, max_leverage = brackets or (None, None)
 
         return {
-            'base_asset': symbol_info['baseAsset'],
-            'quote_asset': symbol_info['quoteAsset'],
-            'min_qty': min_qty,
-            'max_qty': max_qty,
-            'step_size': step_size,
-            'tick_size': tick_size,
+            'base_asset': entry['base_asset'],
+            'quote_asset': entry['quote_asset'],
+            'min_qty': entry['min_qty'],
+            'max_qty': entry['max_qty'],
+            'step_size': entry['step_size'],
+            'tick_size': entry['tick_size'],
             'min_leverage': min_leverage,
             'max_leverage': max_leverage,
-            'market_max_qty': market_max_qty,
-            'market_step_size': market_step_size
+            'market_max_qty': entry['market_max_qty'],
+            'market_step_size': entry['market_step_size'],
+            'quantity_rules': entry['quantity_rules'],
+            'market_quantity_rules': entry['market_quantity_rules']
         }
     except Exception as e:
         logger.error(f"[get_symbol_info] Symbol: {symbol} - Error: {e}")
         return {}
 
+def get_quantity_rules(info: dict, market: bool = False) -> QuantityRules:
+    """
+    Lot rules for a get_symbol_info() result; built from its strings if not precomputed.
+    """
+    rules = info.get('market_quantity_rules' if market else 'quantity_rules')
+    if rules is not None:
+        return rules
+    if market:
+        return QuantityRules(info.get('market_step_size') or info.get('step_size') or '1', info.get('min_qty'),
+                             info.get('market_max_qty') or info.get('max_qty'))
+    return QuantityRules(info.get('step_size') or '1', info.get('min_qty'), info.get('max_qty'))
+
 def get_market_info(symbol: str) -> dict:
+    from app.services.market_service import market_data
+    cached = market_data.get(symbol)
+    if cached:
+        return cached
     try:
         client = BinanceService.get_client()
         # ticker_price might not return bid/ask, but original code used ticker_price for price 
         # and depth for bid/ask.
-        ticker = client.ticker_price(symbol=symbol)
+        ticker, depth = fan_out.gather(
+            lambda: client.ticker_price(symbol=symbol),
+            lambda: client.depth(symbol=symbol, limit=5)
+        )
         price = ticker.get('price', '0')
         
-        depth = client.depth(symbol=symbol, limit=5)
         bids = [(b[0], b[1]) for b in depth.get('bids', [])]
         asks = [(a[0], a[1]) for a in depth.get('asks', [])]
         
@@ -163,8 +629,8 @@ def get_klines(symbol: str, period: str = '1m', limit: int = 100) -> list:
 
 def get_orders(symbol: str = None) -> list:
     try:
-        client = BinanceService.get_client()
-        positions = client.get_position_risk(recvWindow=5000)
+        from app.services.account_service import account_state
+        positions = account_state.get_positions()
         result = []
         for p in positions:
             if symbol and p['symbol'] != symbol:
@@ -197,12 +663,9 @@ def get_orders_history(symbol: str, limit: int = 5) -> list:
         trades = trades[-limit:]
         result = []
         
-        # Optimization: Fetch position risk only once if possible, but here it's per trade logic? 
-        # Actually leverage is from current position, might not match historical trade.
-        # Original logic fetches position risk for every trade... that's N API calls.
-        # Lets just fetch it once.
-        positions = client.get_position_risk(recvWindow=5000)
-        position_info = next((p for p in positions if p['symbol'] == symbol), {})
+        # Leverage is from the current position (cached), might not match historical trade.
+        from app.services.account_service import account_state
+        position_info = account_state.get_position(symbol) or {}
         leverage = str(position_info.get('leverage', '1'))
 
         for t in trades:
@@ -228,101 +691,177 @@ def get_orders_history(symbol: str, limit: int = 5) -> list:
         logger.error(f"[get_orders_history] Symbol: {symbol} - Error: {e}")
         return []
 
-def open_order(symbol: str, side: str, quantity: str, leverage: str) -> bool:
+# Binance accepts at most 5 orders per batchOrders request
+BATCH_ORDER_SIZE = 5
+
+# symbol -> (margin_type, leverage) already applied on the exchange
+_prepared = {}
+_prepared_lock = threading.Lock()
+
+def prepare_symbol(symbol: str, leverage: str) -> None:
     """
-    p_side: "LONG" or "SHORT"
+    Applies margin type and leverage once per symbol/setting instead of before every order.
     """
+    key = (settings.MARGIN_TYPE.upper(), str(leverage))
+    with _prepared_lock:
+        if _prepared.get(symbol) == key:
+            return
+
+    client = BinanceService.get_client()
+    # Ignoring margin type errors as per original ("No need to change margin type")
     try:
-        client = BinanceService.get_client()
-        # Ensure margin type and leverage (ignoring errors as per original)
-        try:
-            client.change_margin_type(symbol=symbol, marginType=settings.MARGIN_TYPE.upper(), recvWindow=5000)
-        except Exception:
-            pass
-            
-        try:
-             client.change_leverage(symbol=symbol, leverage=leverage, recvWindow=5000)
-        except Exception:
-            pass
+        client.change_margin_type(symbol=symbol, marginType=key[0], recvWindow=5000)
+    except Exception:
+        pass
 
-        order_side = "BUY" if side == "LONG" else "SELL"
-        client.new_order(symbol=symbol, side=order_side, type="MARKET", quantity=quantity, recvWindow=5000)
-        return True
+    try:
+        client.change_leverage(symbol=symbol, leverage=leverage, recvWindow=5000)
     except Exception as e:
-        logger.error(f"[open_order] Symbol: {symbol} - Error: {e}")
-        return False
+        logger.warning(f"[prepare_symbol] Symbol: {symbol} - Leverage Error: {e}")
+        return
 
-def close_order(symbol: str, side: str) -> bool:
-    try:
-        client = BinanceService.get_client()
-        positions = client.get_position_risk(recvWindow=5000)
-        pos = next((p for p in positions if p['symbol'] == symbol), None)
-        
-        if not pos or float(pos.get('positionAmt', 0)) == 0:
-            return False
+    with _prepared_lock:
+        _prepared[symbol] = key
 
-        close_side = "SELL" if side == "LONG" else "BUY"
-        
-        info = get_symbol_info(symbol)
-        step_s = info.get('market_step_size') or info.get('step_size') or '1'
-        min_qty_s = info.get('min_qty') or '0'
-        per_max_s = info.get('market_max_qty') or info.get('max_qty')
-        
-        step_size = Decimal(str(step_s))
-        min_qty = Decimal(str(min_qty_s))
-        per_max = Decimal(str(per_max_s)) if per_max_s not in (None, '0') else None
+def _parse_order_result(quantity: str, res) -> dict:
+    if not isinstance(res, dict) or ('code' in res and 'orderId' not in res):
+        res = res if isinstance(res, dict) else {}
+        return {'quantity': quantity, 'ok': False, 'error_code': res.get('code'), 'error': res.get('msg'),
+                'error_class': classify_error(res.get('code'))}
+    return {
+        'quantity': quantity,
+        'ok': True,
+        'order_id': res.get('orderId'),
+        'executed_qty': res.get('executedQty') or quantity,
+        'avg_price': res.get('avgPrice')
+    }
 
-        def floor_to_step(x: Decimal) -> Decimal:
-            if step_size <= 0: return x
-            exp = step_size.normalize()
-            return x.quantize(exp, rounding=ROUND_DOWN)
+def submit_market_orders(symbol: str, order_side: str, quantities: list, reduce_only: bool = False) -> list:
+    """
+    Sends MARKET orders, up to BATCH_ORDER_SIZE per batchOrders request.
+    Returns one result per quantity (same order): quantity, ok, order_id, executed_qty, avg_price, error_code, error
+    """
+    from app.services.account_service import account_state
+    client = BinanceService.get_client()
+    results = []
+    kind = "close" if reduce_only else "open"
+    for i in range(0, len(quantities), BATCH_ORDER_SIZE):
+        group = quantities[i:i + BATCH_ORDER_SIZE]
+        start = time.perf_counter()
+        try:
+            if len(group) == 1:
+                params = {"symbol": symbol, "side": order_side, "type": "MARKET", "quantity": group[0],
+                          "newOrderRespType": "RESULT", "recvWindow": 5000}
+                if reduce_only:
+                    params["reduceOnly"] = True
+                responses = [client.new_order(**params)]
+            else:
+                orders = []
+                for q in group:
+                    order = {"symbol": symbol, "side": order_side, "type": "MARKET", "quantity": q,
+                             "newOrderRespType": "RESULT"}
+                    if reduce_only:
+                        order["reduceOnly"] = "true"
+                    orders.append(order)
+                responses = client.new_batch_order(batchOrders=orders)
+            metrics.order_ack_seconds.observe(time.perf_counter() - start, symbol=symbol, type=kind)
+            results.extend(_parse_order_result(q, r) for q, r in zip(group, responses))
+        except Exception as e:
+            results.extend({'quantity': q, 'ok': False, 'error_code': getattr(e, 'error_code', None), 'error': str(e),
+                            'error_class': classify_error(e)} for q in group)
+    # The position changed (or may have, on a transport error): its next read must not trust the stream cache
+    account_state.mark_traded(symbol)
+    return results
 
-        remain = Decimal(str(abs(float(pos['positionAmt']))))
-        remain = floor_to_step(remain)
-        
-        if remain <= 0:
-            return False
+def _leg_retry_quantity(result: dict, shrink=None) -> str:
+    """
+    Quantity to resend a failed leg with, or "" when resending cannot help.
+    Margin rejections shrink the leg; throttled or mistimed legs are resent
+    as they were; filter, transport (order state unknown) and other errors are not retried.
+    """
+    error_class = result.get('error_class') or classify_error(result.get('error_code'))
+    if error_class == "margin":
+        return shrink(result['quantity']) if shrink else ""
+    if error_class in ("rate_limit", "timestamp"):
+        return result['quantity']
+    return ""
 
-        chunk_size = floor_to_step(per_max) if (per_max is not None and per_max > 0) else remain
-        
-        if chunk_size <= 0:
-            logger.error(f"[close_order] Invalid chunk size for {symbol}")
-            return False
+def place_chunks(symbol: str, order_side: str, chunks: list, reduce_only: bool = False, shrink=None) -> list:
+    """
+    Submits chunk quantities in batches. Only the failed legs of a batch are
+    retried, once, as _leg_retry_quantity decides (margin errors via `shrink(quantity)`).
+    Stops after a batch that still has failed legs. Returns the final result per submitted leg.
+    """
+    final = []
+    for i in range(0, len(chunks), BATCH_ORDER_SIZE):
+        results = submit_market_orders(symbol, order_side, chunks[i:i + BATCH_ORDER_SIZE], reduce_only)
 
-        any_ok = False
-        
-        while remain > 0:
-            cur = min(remain, chunk_size)
-            cur = floor_to_step(cur)
-            
-            if cur < min_qty:
-                break
-                
-            cur_str = format(cur.normalize(), 'f')
-            
-            try:
-                client.new_order(symbol=symbol, side=close_side, type="MARKET", quantity=cur_str, reduceOnly=True, recvWindow=5000)
-                any_ok = True
-                remain = floor_to_step(remain - cur)
+        retries = []
+        delay = 0.0
+        for idx, r in enumerate(results):
+            if r['ok']:
                 continue
-            except Exception as e:
-                # Retry with smaller step
-                retry = floor_to_step(cur - step_size)
-                if retry >= min_qty:
-                    retry_str = format(retry.normalize(), 'f')
-                    try:
-                        client.new_order(symbol=symbol, side=close_side, type="MARKET", quantity=retry_str, reduceOnly=True, recvWindow=5000)
-                        any_ok = True
-                        remain = floor_to_step(remain - retry)
-                        continue
-                    except Exception as e2:
-                        logger.error(f"[close_order] Retry failed for {symbol}: {e2}")
-                        break
-                
-                logger.error(f"[close_order] Failed for {symbol}: {e}")
-                break
+            qty = _leg_retry_quantity(r, shrink)
+            if qty:
+                logger.warning(f"[place_chunks] RETRY {symbol} side={order_side} qty={qty} (was {r['quantity']}: {r['error']})")
+                retries.append((idx, qty))
+                policy = ERROR_POLICIES.get(r.get('error_class'), {})
+                if qty == r['quantity'] and policy.get("retry"):
+                    delay = max(delay, backoff(0, policy["backoff"], policy["max_backoff"]))
+        if retries:
+            if delay:
+                time.sleep(delay)
+            retried = submit_market_orders(symbol, order_side, [q for _, q in retries], reduce_only)
+            for (idx, _), r in zip(retries, retried):
+                results[idx] = r
+
+        final.extend(results)
+        failed = [r for r in results if not r['ok']]
+        if failed:
+            for r in failed:
+                logger.error(f"[place_chunks] Chunk failed for {symbol} side={order_side} qty={r['quantity']}: {r['error']}")
+            break
+    return final
+
+def plan_close(symbol: str, side: str, priced: bool = False):
+    """
+    Reduce-only plan for the current `side` position, or None when there is nothing to close.
+    The ticker is only looked up (for the plan's notional) when `priced` is set.
+    """
+    try:
+        from app.services.account_service import account_state
+        pos = account_state.get_position(symbol)
+        if not pos or float(pos.get('positionAmt', 0)) == 0:
+            return None
+
+        rules = get_quantity_rules(get_symbol_info(symbol), market=True)
+        price = 0.0
+        if priced:
+            market = get_market_info(symbol)
+            price = float(market.get('price', 0)) if market else 0.0
+        return order_plan.plan_close(symbol, side, rules, pos['positionAmt'], price)
+    except ValueError as e:
+        logger.warning(f"[plan_close] {e}")
+        return None
+    except Exception as e:
+        logger.error(f"[plan_close] Symbol: {symbol} - Error: {e}")
+        return None
+
+def execute_plan(plan) -> list:
+    """
+    Sends a precomputed OrderPlan's chunks; returns place_chunks' per-chunk results.
+    """
+    return place_chunks(plan.symbol, plan.order_side, list(plan.chunks),
+                        reduce_only=plan.reduce_only, shrink=plan.shrink)
+
+def close_order(symbol: str, side: str) -> bool:
+    try:
+        plan = plan_close(symbol, side)
+        if plan is None:
+            return False
 
-        return any_ok
+        results = execute_plan(plan)
+        return any(r['ok'] for r in results)
     except Exception as e:
         logger.error(f"[close_order] Symbol: {symbol} - Error: {e}")
         return False
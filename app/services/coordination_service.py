@@ -0,0 +1,321 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.database import SessionLocal
+from app.core import crud
+from app.core import metrics
+
+# Constants
+LEADER_LEASE = "leader"
+WAKE_HOST = "127.0.0.1"
+ADDRESS_CACHE_SECONDS = 1.0
+MAX_JOURNAL_SLOTS = 64
+
+_worker_ids = {}
+
+def worker_id() -> str:
+    """
+    Identity of this process (host:pid:random), used as lease owner and alert claimant.
+    """
+    pid = os.getpid()
+    if pid not in _worker_ids:
+        _worker_ids[pid] = f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}"
+    return _worker_ids[pid]
+
+class LeaderElector:
+    """
+    Keeps exactly one worker process in charge of dispatch and Telegram polling.
+
+    Leadership is a lease row in SQLite that the leader renews every ttl/3.
+    Another worker can only take it once it has expired, so a crashed leader
+    is replaced after at most `ttl` seconds. `on_elected` / `on_demoted` run
+    on the election thread when this process gains or loses the lease; a
+    leader that cannot renew in time steps down before anyone else can win.
+    """
+
+    def __init__(self, session_factory, owner: str, ttl: float, on_elected, on_demoted,
+                 name: str = LEADER_LEASE, address: str = ""):
+        self.session_factory = session_factory
+        self.owner = owner
+        self.ttl = max(float(ttl), 1.0)
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.name = name
+        self.address = address
+        self.renew_interval = self.ttl / 3
+        self._leader = False
+        self._renewed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._step_lock = threading.Lock()
+        self.elections = 0
+
+    def _acquire(self):
+        """
+        True/False once the DB answered, None if it could not be asked.
+        """
+        db = self.session_factory()
+        try:
+            return crud.acquire_lease(db, self.name, self.owner, self.ttl, self.address)
+        except Exception as e:
+            logger.error(f"[LeaderElector] Lease renewal failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def step(self) -> bool:
+        """
+        One election round. Returns whether this process leads afterwards.
+        """
+        with self._step_lock:
+            held = self._acquire()
+            now = time.monotonic()
+            if held is None:
+                # Keep leading while the last renewal is still comfortably valid
+                held = self._leader and now - self._renewed < self.ttl * 0.8
+            elif held:
+                self._renewed = now
+
+            if held and not self._leader:
+                self._leader = True
+                self.elections += 1
+                logger.info(f"[LeaderElector] {self.owner} elected leader")
+                self._call(self.on_elected)
+            elif not held and self._leader:
+                self._leader = False
+                logger.warning(f"[LeaderElector] {self.owner} lost leadership")
+                self._call(self.on_demoted)
+            return held
+
+    def _call(self, callback) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"[LeaderElector] Callback error: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.renew_interval):
+            self.step()
+
+    def start(self) -> bool:
+        """
+        Runs the first round synchronously, then keeps renewing in the background.
+        """
+        self._stop.clear()
+        leading = self.step()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="LeaderElector", daemon=True)
+            self._thread.start()
+        return leading
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stops renewing; a leader steps down and frees the lease for the next worker.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._step_lock:
+            if not self._leader:
+                return
+            self._leader = False
+            self._call(self.on_demoted)
+        db = self.session_factory()
+        try:
+            crud.release_lease(db, self.name, self.owner)
+        except Exception as e:
+            logger.error(f"[LeaderElector] Lease release failed: {e}")
+        finally:
+            db.close()
+
+    def is_leader(self) -> bool:
+        return self._leader
+
+    def stats(self) -> dict:
+        return {"owner": self.owner, "leader": self._leader, "elections": self.elections}
+
+# Wake-ups: followers index alerts into SQLite, then tell the leader's
+# dispatcher which symbol to look at over a local UDP socket. A lost
+# datagram only delays the symbol until the dispatcher's next sweep.
+
+class WakeListener:
+    def __init__(self, handler, host: str = WAKE_HOST):
+        self.handler = handler
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, 0))
+        self._sock.settimeout(1.0)
+        self.address = "%s:%d" % self._sock.getsockname()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="WakeListener", daemon=True)
+        self.received = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+        self._sock.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data, _ = self._sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.received += 1
+            try:
+                self.handler(data.decode("utf-8"))
+            except Exception as e:
+                logger.error(f"[WakeListener] Error: {e}")
+
+_wake_socket = None
+_leader_address = (None, 0.0)  # ("host:port" or None, monotonic time looked up)
+
+def _lookup_leader_address():
+    global _leader_address
+    address, looked_up = _leader_address
+    now = time.monotonic()
+    if now - looked_up < ADDRESS_CACHE_SECONDS:
+        return address
+    db = SessionLocal()
+    try:
+        lease = crud.get_lease(db, LEADER_LEASE)
+        address = lease.address if lease is not None and lease.address else None
+    finally:
+        db.close()
+    _leader_address = (address, now)
+    return address
+
+def wake_leader(symbol: str) -> bool:
+    """
+    Tells the leader process that `symbol` has new pending alerts.
+    """
+    global _wake_socket
+    try:
+        address = _lookup_leader_address()
+        if not address:
+            return False
+        host, port = address.rsplit(":", 1)
+        if _wake_socket is None:
+            _wake_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _wake_socket.sendto(symbol.encode("utf-8"), (host, int(port)))
+        return True
+    except Exception as e:
+        logger.error(f"[wake_leader] Error: {e}")
+        return False
+
+# Journal slots: each worker appends to its own journal file, held through
+# an exclusive file lock that the OS drops when the process dies.
+
+_journal_locks = []
+
+def claim_journal_slot(base_path: str) -> str:
+    """
+    Locks the first free `<base_path>.<n>` journal and returns its path.
+    """
+    import fcntl
+    os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+    for slot in range(MAX_JOURNAL_SLOTS):
+        path = f"{base_path}.{slot}"
+        handle = open(path + ".lock", "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            continue
+        _journal_locks.append(handle)
+        return path
+    raise RuntimeError(f"No free journal slot for {base_path}")
+
+def orphaned_journal_slots(base_path: str) -> list:
+    """
+    Locks and returns journal slots that no live worker holds (e.g. after
+    WEB_WORKERS was lowered). Call release_journal_slot() when done.
+    """
+    import fcntl
+    directory = os.path.dirname(base_path) or "."
+    prefix = os.path.basename(base_path) + "."
+    orphans = []
+    for name in sorted(os.listdir(directory)):
+        if not name.startswith(prefix) or not name[len(prefix):].isdigit():
+            continue
+        path = os.path.join(directory, name)
+        handle = open(path + ".lock", "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            continue
+        _journal_locks.append(handle)
+        orphans.append(path)
+    return orphans
+
+def release_journal_slot(path: str) -> None:
+    for handle in list(_journal_locks):
+        if handle.name == path + ".lock":
+            _journal_locks.remove(handle)
+            handle.close()
+
+# Process roles
+
+elector = None
+_wake_listener = None
+
+metrics.registry.register(metrics.Gauge(
+    "bot_leader", "1 if this worker owns dispatch and Telegram polling",
+    fn=lambda: 1 if is_leader() else 0))
+
+def multi_worker() -> bool:
+    return settings.WEB_WORKERS > 1
+
+def is_leader() -> bool:
+    """
+    Single-worker deployments always lead; otherwise the lease decides.
+    """
+    if not multi_worker():
+        return True
+    return elector is not None and elector.is_leader()
+
+def start_coordination(on_elected, on_demoted) -> None:
+    """
+    Single worker: runs `on_elected` right away. Multi-worker: joins the
+    election and listens for wake-ups from the other workers.
+    """
+    global elector, _wake_listener
+    if not multi_worker():
+        # No other process can hold a claim, so anything claimed is left over from before a restart
+        db = SessionLocal()
+        try:
+            crud.release_alert_claims(db)
+        finally:
+            db.close()
+        on_elected()
+        return
+
+    from app.services import dispatch_service
+    _wake_listener = WakeListener(dispatch_service.notify_remote)
+    _wake_listener.start()
+    elector = LeaderElector(SessionLocal, worker_id(), settings.LEADER_LEASE_TTL,
+                            on_elected, on_demoted, address=_wake_listener.address)
+    leading = elector.start()
+    logger.info(f"[start_coordination] Worker {worker_id()} started as {'leader' if leading else 'follower'}")
+
+def stop_coordination(on_demoted) -> None:
+    global elector, _wake_listener
+    if not multi_worker():
+        on_demoted()
+        return
+    if elector is not None:
+        elector.stop()
+        elector = None
+    if _wake_listener is not None:
+        _wake_listener.stop()
+        _wake_listener = None
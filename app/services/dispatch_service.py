@@ -0,0 +1,213 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.core.logging import logger
+from app.core import metrics
+
+class AlertDispatcher:
+    """
+    Long-lived dispatcher for queued alerts.
+
+    Each symbol gets its own debounce window, opened by the first alert that
+    arrives for it. When the window closes, the symbol's pending alerts are
+    netted and executed by `handler(symbol)`. A periodic sweep picks up pending
+    alerts that were never announced (e.g. left over from a restart), so the
+    queue always drains without waiting for the next webhook.
+
+    Handlers run on a pool of `workers` threads, so different symbols execute
+    in parallel. A symbol is never handed to a second worker while it is in
+    flight; its next window waits until the current run finishes, which keeps
+    alerts for the same symbol strictly ordered.
+    """
+
+    def __init__(self, handler, pending_symbols, debounce: float = 0.0, sweep_interval: float = 30.0,
+                 workers: int = 1):
+        self.handler = handler
+        self.pending_symbols = pending_symbols
+        self.debounce = max(float(debounce), 0.0)
+        self.sweep_interval = sweep_interval
+        self.workers = max(int(workers), 1)
+        self._cond = threading.Condition()
+        self._due = {}
+        self._opened = {}
+        self._busy = set()
+        self._queued = 0
+        self._running = False
+        self._thread = None
+        self._pool = None
+        self._next_sweep = 0.0
+        self.wait_times = {}
+        self.dispatched = 0
+
+    def notify(self, symbol: str) -> None:
+        """
+        Announces a new alert. Only the first alert of a window sets its deadline.
+        """
+        with self._cond:
+            if symbol not in self._due:
+                now = time.monotonic()
+                self._due[symbol] = now + self.debounce
+                self._opened[symbol] = now
+                self._cond.notify()
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._next_sweep = 0.0  # Drain whatever is pending right away
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="TradeWorker")
+        self._thread = threading.Thread(target=self._run, name="AlertDispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._pool:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._due)
+
+    def stats(self) -> dict:
+        """
+        Queue depth and per-symbol wait (first alert -> execution start, seconds).
+        """
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "windows_open": len(self._due),
+                "queued": self._queued,
+                "in_flight": len(self._busy),
+                "dispatched": self.dispatched,
+                "wait_times": dict(self.wait_times),
+            }
+
+    def _sweep(self) -> None:
+        try:
+            for symbol in self.pending_symbols():
+                self.notify(symbol)
+        except Exception as e:
+            logger.error(f"[AlertDispatcher._sweep] Error: {e}")
+
+    def _next_ready(self) -> list:
+        """
+        Blocks until at least one window has closed (or a sweep is due) and
+        returns (symbol, window_opened_at) pairs. Returns [] on stop or sweep.
+        """
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                if now >= self._next_sweep:
+                    return []
+                # Busy symbols wait for their in-flight run (it notifies on completion)
+                waiting = {s: due for s, due in self._due.items() if s not in self._busy}
+                ready = [s for s, due in waiting.items() if due <= now]
+                if ready:
+                    for s in ready:
+                        del self._due[s]
+                        self._busy.add(s)
+                        self._queued += 1
+                    return [(s, self._opened.pop(s, now)) for s in ready]
+                wake_at = min([self._next_sweep] + list(waiting.values()))
+                self._cond.wait(wake_at - now)
+            return []
+
+    def _execute(self, symbol: str, opened: float) -> None:
+        with self._cond:
+            self._queued -= 1
+            waited = time.monotonic() - opened
+            self.wait_times[symbol] = round(waited, 3)
+        metrics.queue_wait_seconds.observe(waited, symbol=symbol)
+        try:
+            self.handler(symbol)
+        except Exception as e:
+            logger.error(f"[AlertDispatcher] Symbol: {symbol} - Error: {e}")
+        finally:
+            with self._cond:
+                self._busy.discard(symbol)
+                self.dispatched += 1
+                self._cond.notify()
+
+    def _run(self) -> None:
+        while self._running:
+            if time.monotonic() >= self._next_sweep:
+                self._next_sweep = time.monotonic() + self.sweep_interval
+                self._sweep()
+                continue
+
+            for symbol, opened in self._next_ready():
+                self._pool.submit(self._execute, symbol, opened)
+
+def _build_dispatcher() -> AlertDispatcher:
+    from app.services import tradingview_service
+    return AlertDispatcher(
+        handler=tradingview_service.process_symbol_alerts,
+        pending_symbols=tradingview_service.sweep_pending_symbols,
+        debounce=settings.ALERT_DEBOUNCE_SECONDS,
+        sweep_interval=settings.ALERT_SWEEP_INTERVAL,
+        workers=settings.DISPATCH_WORKERS
+    )
+
+dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def _queue_depth() -> int:
+    if dispatcher is None:
+        return 0
+    stats = dispatcher.stats()
+    return stats["windows_open"] + stats["queued"]
+
+def _in_flight() -> int:
+    return dispatcher.stats()["in_flight"] if dispatcher is not None else 0
+
+metrics.registry.register(metrics.Gauge(
+    "bot_queue_depth", "Symbols with pending alerts waiting for a worker", fn=_queue_depth))
+metrics.registry.register(metrics.Gauge(
+    "bot_trades_in_flight", "Symbols currently executing on a trade worker", fn=_in_flight))
+
+def get_dispatcher() -> AlertDispatcher:
+    global dispatcher
+    with _dispatcher_lock:
+        if dispatcher is None:
+            dispatcher = _build_dispatcher()
+        return dispatcher
+
+def start_dispatcher() -> None:
+    get_dispatcher().start()
+    logger.info(f"[start_dispatcher] Alert dispatcher started (debounce={settings.ALERT_DEBOUNCE_SECONDS}s, workers={settings.DISPATCH_WORKERS})")
+
+def stop_dispatcher() -> None:
+    if dispatcher is not None:
+        dispatcher.stop()
+
+def notify_local(symbol: str) -> None:
+    get_dispatcher().notify(symbol)
+
+def notify_remote(symbol: str) -> None:
+    """
+    Wake-up from another worker: its alerts are not in this worker's netting table.
+    """
+    from app.services import tradingview_service
+    tradingview_service.netting.invalidate(symbol)
+    notify_local(symbol)
+
+def notify(symbol: str) -> None:
+    """
+    Announces a new alert to whichever worker runs the dispatcher.
+    """
+    from app.services import coordination_service
+    if coordination_service.is_leader():
+        notify_local(symbol)
+    else:
+        coordination_service.wake_leader(symbol)
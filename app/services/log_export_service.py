@@ -0,0 +1,107 @@
+import gzip
+import io
+import re
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.core.logging import logger
+from app.core import crud
+
+# Constants
+DEFAULT_LINES = 100
+CHUNK_SIZE = 1000
+DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+LEVELS = ("debug", "info", "warning", "error", "critical")
+
+def parse_time(value: str, now: datetime = None) -> datetime:
+    """
+    Accepts a relative age ("30m", "2h", "1d") or an ISO timestamp (UTC).
+    """
+    match = re.fullmatch(r"(\d+)([mhd])", value.strip().lower())
+    if match:
+        now = now or datetime.utcnow()
+        return now - timedelta(**{DURATION_UNITS[match.group(2)]: int(match.group(1))})
+    return datetime.fromisoformat(value.strip())
+
+def parse_filters(args: list, now: datetime = None) -> dict:
+    """
+    Parses /getlog arguments: an optional line count, a bare level
+    ("error"), and key=value pairs for level, func, since and until.
+    Raises ValueError on anything it does not understand.
+    """
+    filters = {"limit": DEFAULT_LINES, "level": None, "func": None, "since": None, "until": None}
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        key = key.lower()
+        if not sep:
+            if key.isdigit():
+                filters["limit"] = int(key)
+            elif key in LEVELS:
+                filters["level"] = key
+            else:
+                raise ValueError(f"Unknown argument: {arg}")
+        elif key == "level":
+            if value.lower() not in LEVELS:
+                raise ValueError(f"Unknown level: {value}")
+            filters["level"] = value.lower()
+        elif key == "func":
+            filters["func"] = value
+        elif key in ("since", "until"):
+            filters[key] = parse_time(value, now)
+        elif key in ("limit", "lines"):
+            filters["limit"] = int(value)
+        else:
+            raise ValueError(f"Unknown filter: {key}")
+    filters["limit"] = max(1, min(filters["limit"], settings.LOG_EXPORT_MAX_LINES))
+    return filters
+
+def export_logs(db, filters: dict, chunk_size: int = CHUNK_SIZE) -> tuple:
+    """
+    Streams matching logs into an in-memory gzip file.
+    Returns (gzipped bytes, line count); only the compressed output is held.
+    """
+    buffer = io.BytesIO()
+    count = 0
+    with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6) as gz:
+        lines = []
+        for dt, log_type, func, desc in crud.iter_logs(db, chunk_size=chunk_size, **filters):
+            lines.append(f"{dt.strftime('%Y-%m-%d %H:%M:%S')} [{(log_type or '').upper()}] {func}: {desc}\n")
+            if len(lines) >= chunk_size:
+                gz.write("".join(lines).encode("utf-8"))
+                count += len(lines)
+                lines = []
+        if lines:
+            gz.write("".join(lines).encode("utf-8"))
+            count += len(lines)
+    return buffer.getvalue(), count
+
+def describe(filters: dict) -> str:
+    parts = [f"last {filters['limit']}"]
+    if filters["level"]:
+        parts.append(f"level={filters['level']}")
+    if filters["func"]:
+        parts.append(f"func~{filters['func']}")
+    if filters["since"]:
+        parts.append(f"since {filters['since']:%Y-%m-%d %H:%M}")
+    if filters["until"]:
+        parts.append(f"until {filters['until']:%Y-%m-%d %H:%M}")
+    return ", ".join(parts)
+
+def build_export(db, args: list) -> dict:
+    """
+    Runs a /getlog request. Returns {"message", "document": (filename, bytes)},
+    or just {"message"} when the filters are invalid or nothing matched.
+    """
+    try:
+        filters = parse_filters(args)
+    except ValueError as e:
+        return {"message": (f"{e}\nUsage: /getlog [lines] [level] [func=name] "
+                            f"[since=2h|ISO time] [until=...]")}
+    try:
+        data, count = export_logs(db, filters)
+    except Exception as e:
+        logger.error(f"[build_export] Error: {e}")
+        return {"message": "An error occurred while preparing the logs."}
+    if not count:
+        return {"message": f"No logs found ({describe(filters)})."}
+    filename = f"logs_{datetime.utcnow():%Y%m%d_%H%M%S}.txt.gz"
+    return {"message": f"{count} log lines ({describe(filters)}).", "document": (filename, data)}
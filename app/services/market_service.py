@@ -0,0 +1,144 @@
+import threading
+import time
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.stream_service import StreamClient, ws_base_url
+
+# Constants
+SUBSCRIBE_BATCH = 50  # streams per SUBSCRIBE message
+
+def _streams(symbol: str) -> list:
+    s = symbol.lower()
+    return [f"{s}@bookTicker", f"{s}@markPrice@1s"]
+
+class MarketDataCache:
+    """
+    Last price / best bid / best ask per symbol, fed by the futures market
+    streams (`<symbol>@bookTicker` and `<symbol>@markPrice@1s`).
+
+    Symbols are subscribed the first time they are asked for and stay
+    subscribed (resubscribed after every reconnect). `get()` returns None when
+    the symbol is not subscribed yet or its data is older than `max_age`
+    seconds; callers then fall back to REST.
+    """
+
+    def __init__(self, ws_url=None, max_age: float = 3.0):
+        self.ws_url = ws_url
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._symbols = set()
+        self._quotes = {}
+        self._stream = None
+        self._request_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    # Lifecycle
+
+    def _stream_url(self) -> str:
+        base = self.ws_url() if callable(self.ws_url) else self.ws_url
+        return f"{base.rstrip('/')}/ws"
+
+    def start(self) -> None:
+        if self._stream is not None:
+            return
+        self._stream = StreamClient("MarketStream", self._stream_url, self.apply_event, on_open=self._resubscribe)
+        self._stream.start()
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream = None
+        with self._lock:
+            self._quotes = {}
+
+    def _resubscribe(self) -> None:
+        with self._lock:
+            symbols = sorted(self._symbols)
+        self._subscribe(symbols)
+
+    def _subscribe(self, symbols: list) -> None:
+        params = [stream for symbol in symbols for stream in _streams(symbol)]
+        for i in range(0, len(params), SUBSCRIBE_BATCH):
+            with self._lock:
+                self._request_id += 1
+                request_id = self._request_id
+            self._stream.send({"method": "SUBSCRIBE", "params": params[i:i + SUBSCRIBE_BATCH], "id": request_id})
+
+    def track(self, symbol: str) -> None:
+        with self._lock:
+            if symbol in self._symbols:
+                return
+            self._symbols.add(symbol)
+        # Sent now if connected; otherwise on_open subscribes everything
+        if self._stream is not None:
+            self._subscribe([symbol])
+
+    # Updates
+
+    def apply_event(self, data: dict) -> None:
+        event = data.get("e")
+        symbol = data.get("s")
+        if not symbol or event not in ("bookTicker", "markPriceUpdate"):
+            return  # SUBSCRIBE acks and anything else
+        now = time.monotonic()
+        with self._lock:
+            quote = self._quotes.setdefault(symbol, {})
+            if event == "bookTicker":
+                quote["bid"] = data.get("b", "0")
+                quote["bid_qty"] = data.get("B", "0")
+                quote["ask"] = data.get("a", "0")
+                quote["ask_qty"] = data.get("A", "0")
+                quote["book_at"] = now
+            else:
+                quote["price"] = data.get("p", "0")
+                quote["price_at"] = now
+
+    # Reads
+
+    def get(self, symbol: str):
+        """
+        Returns the get_market_info() dict from memory, or None if stale.
+        """
+        self.track(symbol)
+        with self._lock:
+            quote = self._quotes.get(symbol)
+            # markPrice@1s ticks every second, so it doubles as the freshness
+            # heartbeat. bookTicker only pushes on change: a quiet book is
+            # still current as long as the connection is up.
+            fresh = (
+                quote is not None
+                and "price" in quote and "bid" in quote
+                and self._stream is not None and self._stream.connected
+                and time.monotonic() - quote["price_at"] <= self.max_age
+            )
+            if not fresh:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return {
+                'price': quote["price"],
+                'bid': quote["bid"],
+                'ask': quote["ask"],
+                'order_book': {'bids': [(quote["bid"], quote["bid_qty"])], 'asks': [(quote["ask"], quote["ask_qty"])]}
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "symbols": len(self._symbols),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stream": self._stream.stats() if self._stream else None,
+            }
+
+market_data = MarketDataCache(ws_url=ws_base_url, max_age=settings.MARKET_DATA_MAX_AGE)
+
+def start_market_stream() -> None:
+    if not settings.MARKET_DATA_STREAM_ENABLED:
+        return
+    market_data.start()
+    logger.info("[start_market_stream] Market data stream started")
+
+def stop_market_stream() -> None:
+    market_data.stop()
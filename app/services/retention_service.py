@@ -0,0 +1,208 @@
+import gzip
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.log import Log
+from app.models.log_rollup import LogRollup
+
+# Constants
+BATCH_PAUSE = 0.05  # seconds between batches so log writers get the lock
+
+class LogRetention:
+    """
+    Ages raw rows out of the `logs` table in the background.
+
+    Every `interval` seconds rows older than `retention_days` are moved out in
+    batches of `batch_size`, oldest first: each batch is appended to a daily
+    gzip archive, folded into `log_rollups` (count per day/func/level) and
+    deleted in one short transaction, so the log writer is never blocked for
+    more than a batch. Freed pages are then returned to the filesystem with
+    `PRAGMA incremental_vacuum`, `vacuum_pages` at a time.
+
+    The archive is written before the delete commits: a crash in between can
+    leave a batch archived twice, never lost.
+    """
+
+    def __init__(self, session_factory, retention_days: int = 14, interval: float = 3600.0,
+                 archive_dir: str = None, batch_size: int = 5000, vacuum_pages: int = 1000):
+        self.session_factory = session_factory
+        self.retention_days = retention_days
+        self.interval = interval
+        self.archive_dir = archive_dir
+        self.batch_size = max(int(batch_size), 1)
+        self.vacuum_pages = max(int(vacuum_pages), 1)
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.archived = 0
+        self.pages_freed = 0
+        self.last_run = None
+        self._vacuum_warned = False
+
+    # Lifecycle
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="LogRetention", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"[LogRetention] Error: {e}")
+            self._stop.wait(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "archived": self.archived,
+            "pages_freed": self.pages_freed,
+            "last_run": self.last_run,
+        }
+
+    # Work
+
+    def run_once(self, now: datetime = None) -> int:
+        """
+        One retention pass. Returns the number of rows moved out of `logs`.
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        moved = 0
+        while not self._stop.is_set():
+            count = self._move_batch(cutoff)
+            moved += count
+            if count < self.batch_size:
+                break
+            time.sleep(BATCH_PAUSE)
+        if moved:
+            self._vacuum()
+            logger.info(f"[LogRetention] Archived {moved} log rows older than {cutoff:%Y-%m-%d %H:%M}")
+        self.runs += 1
+        self.archived += moved
+        self.last_run = datetime.utcnow()
+        return moved
+
+    def _move_batch(self, cutoff: datetime) -> int:
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(Log.id, Log.datetime, Log.type, Log.func, Log.desc)
+                .where(Log.datetime < cutoff)
+                .order_by(Log.datetime, Log.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                return 0
+
+            by_day = {}
+            counts = {}
+            for row in rows:
+                day = row.datetime.date()
+                by_day.setdefault(day, []).append(
+                    f"{row.datetime:%Y-%m-%d %H:%M:%S} [{(row.type or '').upper()}] {row.func}: {row.desc}\n")
+                key = (day, row.func or "", row.type or "")
+                counts[key] = counts.get(key, 0) + 1
+            if self.archive_dir:
+                self._archive(by_day)
+
+            if counts:
+                stmt = sqlite_insert(LogRollup).values(
+                    [{"day": d, "func": f, "type": t, "count": c} for (d, f, t), c in counts.items()])
+                db.execute(stmt.on_conflict_do_update(
+                    index_elements=["day", "func", "type"],
+                    set_={"count": LogRollup.count + stmt.excluded.count}))
+            db.execute(delete(Log).where(Log.id.in_([row.id for row in rows])))
+            db.commit()
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _archive(self, by_day: dict) -> None:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        for day, lines in by_day.items():
+            path = os.path.join(self.archive_dir, f"logs-{day:%Y%m%d}.txt.gz")
+            # Appending adds a gzip member; readers see one continuous file
+            with gzip.open(path, "ab") as f:
+                f.write("".join(lines).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _vacuum(self) -> None:
+        db = self.session_factory()
+        try:
+            while not self._stop.is_set():
+                free = db.execute(text("PRAGMA freelist_count")).scalar() or 0
+                if not free:
+                    break
+                # executescript steps the pragma to completion; execute() frees a single page
+                raw = db.connection().connection.dbapi_connection
+                raw.executescript(f"PRAGMA incremental_vacuum({min(free, self.vacuum_pages)});")
+                left = db.execute(text("PRAGMA freelist_count")).scalar() or 0
+                if left >= free:
+                    # auto_vacuum is not INCREMENTAL on this file
+                    if not self._vacuum_warned:
+                        self._vacuum_warned = True
+                        logger.warning("[LogRetention] Free pages are not returned: run scripts/upgrade_db.py "
+                                       "(with the bot stopped) to enable incremental vacuum")
+                    break
+                self.pages_freed += free - left
+                time.sleep(BATCH_PAUSE)
+        finally:
+            db.close()
+
+    def rollups(self, since: datetime = None) -> list:
+        """
+        Returns (day, func, type, count) rows, newest day first.
+        """
+        db = self.session_factory()
+        try:
+            query = select(LogRollup.day, LogRollup.func, LogRollup.type, LogRollup.count)
+            if since:
+                query = query.where(LogRollup.day >= since.date())
+            return [tuple(r) for r in db.execute(query.order_by(LogRollup.day.desc(), LogRollup.count.desc()))]
+        finally:
+            db.close()
+
+retention = None
+
+def get_retention() -> LogRetention:
+    global retention
+    if retention is None:
+        from app.core.database import SessionLocal
+        retention = LogRetention(
+            SessionLocal,
+            retention_days=settings.LOG_RETENTION_DAYS,
+            interval=settings.LOG_RETENTION_INTERVAL,
+            archive_dir=settings.LOG_ARCHIVE_DIR or None,
+            batch_size=settings.LOG_RETENTION_BATCH,
+            vacuum_pages=settings.LOG_VACUUM_PAGES
+        )
+    return retention
+
+def start_retention() -> None:
+    if settings.LOG_RETENTION_DAYS <= 0:
+        return
+    get_retention().start()
+    logger.info(f"[start_retention] Log retention started (keep {settings.LOG_RETENTION_DAYS} days)")
+
+def stop_retention() -> None:
+    if retention is not None:
+        retention.stop()
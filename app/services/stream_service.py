@@ -0,0 +1,171 @@
+import json
+import socket
+import threading
+import time
+from app.core.config import settings
+from app.core.logging import logger
+
+# Constants
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+PING_INTERVAL = 60
+
+def ws_base_url() -> str:
+    """
+    Futures websocket base URL, matching the REST environment (testnet or live).
+    """
+    if settings.BINANCE_WS_URL:
+        return settings.BINANCE_WS_URL.rstrip("/")
+    from app.services import binance_service
+    if "testnet" in binance_service.get_base_url():
+        return "wss://stream.binancefuture.com"
+    return "wss://fstream.binance.com"
+
+class StreamClient:
+    """
+    Long-lived websocket connection on its own thread.
+
+    Messages are JSON-decoded and passed to `on_message(data)`. The connection
+    is re-opened with exponential backoff after any drop. `url` may be a
+    callable, re-evaluated on every connect (e.g. to pick up a new listenKey).
+    `on_open()` runs after each (re)connect, so subscribers can resubscribe.
+    """
+
+    def __init__(self, name: str, url, on_message, on_open=None):
+        self.name = name
+        self.url = url
+        self.on_message = on_message
+        self.on_open = on_open
+        self._ws = None
+        self._sock = None
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.connected = False
+        self.last_message = 0.0
+        self.messages = 0
+        self.reconnects = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            self._running = False
+            self._stopped.set()
+            ws = self._ws
+        self._close(ws)
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def reconnect(self) -> None:
+        """
+        Drops the current connection; the run loop connects again.
+        """
+        self._close(self._ws)
+
+    def _close(self, ws) -> None:
+        # ws.close() from another thread leaves run_forever blocked in select()
+        # on the dead fd; shutting the raw socket down wakes it with EOF.
+        if ws is None or ws.sock is None:
+            return
+        try:
+            ws.sock.sock.shutdown(socket.SHUT_RDWR)
+        except Exception:
+            pass
+
+    def send(self, data: dict) -> bool:
+        ws = self._ws
+        if ws is None or not self.connected:
+            return False
+        try:
+            ws.send(json.dumps(data))
+            return True
+        except Exception as e:
+            logger.warning(f"[{self.name}] Send failed: {e}")
+            return False
+
+    def _handle_open(self, ws) -> None:
+        self._sock = ws.sock
+        self.connected = True
+        logger.info(f"[{self.name}] Connected")
+        if self.on_open:
+            try:
+                self.on_open()
+            except Exception as e:
+                logger.error(f"[{self.name}] on_open Error: {e}")
+
+    def _handle_message(self, ws, message) -> None:
+        self.last_message = time.time()
+        self.messages += 1
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        try:
+            self.on_message(data)
+        except Exception as e:
+            logger.error(f"[{self.name}] Message Error: {e}")
+
+    def _handle_close(self, ws, status_code=None, msg=None) -> None:
+        self.connected = False
+
+    def _handle_error(self, ws, error) -> None:
+        logger.warning(f"[{self.name}] Error: {error}")
+
+    def _run(self) -> None:
+        # websocket-client loads with the first stream, not at app import
+        import websocket
+        delay = RECONNECT_MIN_DELAY
+        while self._running:
+            started = time.time()
+            try:
+                url = self.url() if callable(self.url) else self.url
+                ws = websocket.WebSocketApp(
+                    url,
+                    on_open=self._handle_open,
+                    on_message=self._handle_message,
+                    on_close=self._handle_close,
+                    on_error=self._handle_error
+                )
+                with self._lock:
+                    self._ws = ws
+                ws.run_forever(ping_interval=PING_INTERVAL, ping_timeout=10, reconnect=0)
+            except Exception as e:
+                logger.error(f"[{self.name}] Connect Error: {e}")
+            finally:
+                self.connected = False
+                with self._lock:
+                    self._ws = None
+                # websocket-client skips closing the fd after a server-initiated close
+                sock, self._sock = self._sock, None
+                if sock is not None:
+                    try:
+                        sock.shutdown()
+                    except Exception:
+                        pass
+
+            if not self._running:
+                break
+            # Reset backoff after a connection that stayed up for a while
+            if time.time() - started > RECONNECT_MAX_DELAY:
+                delay = RECONNECT_MIN_DELAY
+            self.reconnects += 1
+            self._stopped.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "messages": self.messages,
+            "reconnects": self.reconnects,
+            "last_message_age": round(time.time() - self.last_message, 1) if self.last_message else None,
+        }
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import threading
+import time
+from app.core.logging import logger
+from app.core import metrics
+
+# Constants
+API_URL = "https://api.telegram.org"
+POLL_TIMEOUT = 50       # getUpdates long-poll seconds
+REQUEST_TIMEOUT = 10
+UPLOAD_TIMEOUT = 60
+PROBE_SAMPLES = 50
+
+telegram_rtt_seconds = metrics.registry.register(metrics.Histogram(
+    "bot_telegram_rtt_seconds", "Bot API round trip measured by the getMe probe"))
+
+def _form_data(payload: dict):
+    import aiohttp
+    form = aiohttp.FormData()
+    for key, value in payload.items():
+        if isinstance(value, tuple):
+            filename, data = value
+            form.add_field(key, data, filename=filename, content_type="application/octet-stream")
+        elif isinstance(value, (dict, list)):
+            form.add_field(key, json.dumps(value))
+        else:
+            form.add_field(key, str(value))
+    return form
+
+class BotAPIClient:
+    """
+    Asyncio Bot API client on its own event loop thread.
+
+    All traffic (long polling and sends) shares one aiohttp session, i.e. one
+    pool of keep-alive HTTP/1.1 connections, so a send never waits for a new
+    TCP/TLS handshake and up to `max_connections` requests are in flight at
+    once. Synchronous code uses `submit()` (returns a concurrent Future) or
+    `call()` (waits for the result).
+    """
+
+    def __init__(self, token: str, base_url: str = API_URL, max_connections: int = 8):
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max(int(max_connections), 1)
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._client_timeout = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopping = False
+        self._probe_task = None
+        self.requests = 0
+        self.in_flight = 0
+        self.rtt_samples = []
+
+    # Lifecycle
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="TelegramLoop", daemon=True)
+            self._thread.start()
+        self._ready.wait(5)
+
+    def _run_loop(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._open())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._close())
+            self._loop.close()
+
+    async def _open(self) -> None:
+        # aiohttp loads with the first client, off the app's import path
+        import aiohttp
+        self._client_timeout = aiohttp.ClientTimeout
+        connector = aiohttp.TCPConnector(limit=self.max_connections + 1, keepalive_timeout=POLL_TIMEOUT + 15)
+        self._session = aiohttp.ClientSession(connector=connector)
+
+    async def _close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._probe_task = None
+        if thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._cancel_all)
+        thread.join(timeout)
+
+    def _cancel_all(self) -> None:
+        for task in asyncio.all_tasks(self._loop):
+            task.cancel()
+        self._loop.call_soon(self._loop.stop)
+
+    # Requests
+
+    async def request(self, method: str, payload: dict = None, timeout: float = REQUEST_TIMEOUT) -> tuple:
+        """
+        One Bot API call. Returns (status, body); body is {} if not JSON.
+        Payload values given as (filename, bytes) are uploaded as multipart files.
+        """
+        payload = payload or {}
+        if any(isinstance(v, tuple) for v in payload.values()):
+            body_kwargs = {"data": _form_data(payload)}
+            timeout = max(timeout, UPLOAD_TIMEOUT)
+        else:
+            body_kwargs = {"json": payload}
+        self.in_flight += 1
+        self.requests += 1
+        start = time.perf_counter()
+        try:
+            async with self._session.post(
+                f"{self.base_url}/bot{self.token}/{method}",
+                timeout=self._client_timeout(total=timeout),
+                **body_kwargs
+            ) as response:
+                try:
+                    body = await response.json(content_type=None)
+                except ValueError:
+                    body = {}
+                return response.status, body if isinstance(body, dict) else {}
+        finally:
+            self.in_flight -= 1
+            if method != "getUpdates":
+                metrics.telegram_send_seconds.observe(time.perf_counter() - start, method=method)
+
+    def submit(self, method: str, payload: dict = None, timeout: float = REQUEST_TIMEOUT):
+        """
+        Schedules a call on the loop; returns a concurrent.futures.Future of (status, body).
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self.request(method, payload, timeout), self._loop)
+
+    def call(self, method: str, payload: dict = None, timeout: float = REQUEST_TIMEOUT) -> tuple:
+        return self.submit(method, payload, timeout).result(timeout + 5)
+
+    # Polling
+
+    async def _poll(self, handler) -> None:
+        offset = None
+        while not self._stopping:
+            payload = {"timeout": POLL_TIMEOUT, "allowed_updates": ["message", "callback_query"]}
+            if offset is not None:
+                payload["offset"] = offset
+            try:
+                status, body = await self.request("getUpdates", payload, timeout=POLL_TIMEOUT + 10)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[BotAPIClient] getUpdates failed: {e}")
+                await asyncio.sleep(REQUEST_TIMEOUT / 2)
+                continue
+            if status == 429:
+                await asyncio.sleep(float((body.get("parameters") or {}).get("retry_after") or 1))
+                continue
+            if status != 200:
+                logger.warning(f"[BotAPIClient] getUpdates status {status}: {body.get('description')}")
+                await asyncio.sleep(REQUEST_TIMEOUT / 2)
+                continue
+            updates = body.get("result") or []
+            if updates:
+                offset = updates[-1]["update_id"] + 1
+                # Handlers are blocking (DB, Binance): keep them off the loop
+                await self._loop.run_in_executor(None, handler, updates)
+
+    def poll_forever(self, handler) -> None:
+        """
+        Long-polls getUpdates and passes each batch (raw dicts) to `handler`.
+        Blocks until stop().
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._poll(handler), self._loop)
+        try:
+            future.result()
+        except Exception as e:
+            if not self._stopping:
+                raise
+            logger.info(f"[BotAPIClient] Polling stopped ({type(e).__name__})")
+
+    # Latency probe
+
+    async def _probe(self) -> float:
+        start = time.perf_counter()
+        status, _ = await self.request("getMe")
+        rtt = time.perf_counter() - start
+        if status != 200:
+            raise RuntimeError(f"getMe returned {status}")
+        telegram_rtt_seconds.observe(rtt)
+        with self._lock:
+            self.rtt_samples = (self.rtt_samples + [rtt])[-PROBE_SAMPLES:]
+        return rtt
+
+    async def _probe_loop(self, interval: float) -> None:
+        while not self._stopping:
+            try:
+                await self._probe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[BotAPIClient] Probe failed: {e}")
+            await asyncio.sleep(interval)
+
+    def submit_probe(self):
+        """
+        Schedules one getMe round trip; returns a concurrent Future of its seconds.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._probe(), self._loop)
+
+    def probe(self) -> float:
+        """
+        Measures one getMe round trip in seconds (also recorded as a metric).
+        """
+        return self.submit_probe().result(REQUEST_TIMEOUT + 5)
+
+    def start_probe(self, interval: float) -> None:
+        """
+        Probes the round trip every `interval` seconds on the loop (0 disables).
+        """
+        if interval <= 0 or self._probe_task is not None:
+            return
+        self.start()
+        self._probe_task = asyncio.run_coroutine_threadsafe(self._probe_loop(interval), self._loop)
+
+    def stats(self) -> dict:
+        with self._lock:
+            last = self.rtt_samples[-1] if self.rtt_samples else None
+            samples = sorted(self.rtt_samples)
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "rtt_last_ms": round(last * 1000, 1) if last is not None else None,
+            "rtt_p50_ms": round(samples[len(samples) // 2] * 1000, 1) if samples else None,
+            "rtt_max_ms": round(samples[-1] * 1000, 1) if samples else None,
+        }
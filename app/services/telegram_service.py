@@ -1,36 +1,364 @@
 import time
-import requests
 import threading
-from telebot import TeleBot
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from app.core.config import settings
 from app.core.logging import logger
-from app.core import state
+from app.services.telegram_api import BotAPIClient
 
 # Constants
 DELAY_RETRY = 1.0
 WAIT_TIME = 10
 MAX_RETRY = 5
+MESSAGE_LIMIT = 4096  # Bot API limit for sendMessage text
+MAX_IN_FLIGHT = 8
+CAPTION_LIMIT = 1024  # Bot API limit for document captions
 
 class TelegramService:
-    _session = None
-    _bot = None
-    
+    _client = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls) -> BotAPIClient:
+        """
+        Shared Bot API client: polling and sends use the same keep-alive pool.
+        """
+        with cls._lock:
+            if cls._client is None:
+                cls._client = BotAPIClient(
+                    settings.TELEGRAM_BOT_TOKEN,
+                    base_url=settings.TELEGRAM_API_URL,
+                    max_connections=settings.TELEGRAM_MAX_CONNECTIONS
+                )
+            return cls._client
+
     @classmethod
-    def get_session(cls):
-        if cls._session is None:
-            retry_strategy = Retry(
-                total=MAX_RETRY,
-                status_forcelist=[429, 500, 502, 503, 504],
-                allowed_methods=["HEAD", "GET", "OPTIONS", "POST"],
-                backoff_factor=DELAY_RETRY
+    def stop_client(cls) -> None:
+        with cls._lock:
+            client, cls._client = cls._client, None
+        if client is not None:
+            client.stop()
+
+class TokenBucket:
+    """
+    `rate` tokens per second, holding at most `burst`.
+    """
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = max(float(rate), 0.001)
+        self.burst = max(float(burst), 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+def _split_text(text: str, limit: int = MESSAGE_LIMIT) -> list:
+    """
+    Splits text into pieces of at most `limit` chars, preferring line breaks.
+    """
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        parts.append(text)
+    return parts
+
+class TelegramOutbox:
+    """
+    Outbound Bot API queue drained by one background dispatcher.
+
+    Callers never wait for Telegram. Consecutive plain-text messages queued
+    for the same chat are packed into one message of up to 4096 characters
+    (messages with a keyboard are sent on their own), so a multi-line reply
+    costs one request instead of one per line. Sends respect a global and a
+    per-chat token bucket. Up to `max_in_flight` requests run concurrently,
+    but at most one per chat so each chat still sees its messages in order.
+    A 429 pauses only that chat for `retry_after` seconds and the message is
+    retried. Other calls (e.g. answerCallbackQuery) skip packing and the
+    per-chat limit and go first.
+
+    `transport(method, payload) -> (status, body)` is a blocking callable run
+    on a small thread pool; by default requests go through the shared async
+    `BotAPIClient` instead.
+    """
+
+    def __init__(self, transport=None, global_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: int = 3,
+                 max_attempts: int = MAX_RETRY, max_in_flight: int = MAX_IN_FLIGHT):
+        self.transport = transport
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max_attempts
+        self.max_in_flight = max(int(max_in_flight), 1)
+        self._executor = None
+        self._cond = threading.Condition()
+        self._chats = {}        # chat_id -> deque of pending messages
+        self._buckets = {}      # chat_id -> TokenBucket
+        self._paused = {}       # chat_id (None: call queue) -> monotonic time it may send again
+        self._busy = set()      # chats with a request in flight
+        self._calls = deque()   # other Bot API calls, sent first
+        self._in_flight = 0
+        self._running = False
+        self._thread = None
+        self.sent = 0
+        self.packed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.dropped = 0
+
+    # Producers
+
+    def send(self, chat_id, text: str, reply_markup: dict = None, parse_mode: str = "HTML") -> None:
+        chat_id = str(chat_id)
+        item = {"text": str(text), "reply_markup": reply_markup, "parse_mode": parse_mode, "attempts": 0}
+        with self._cond:
+            self._chats.setdefault(chat_id, deque()).append(item)
+            self._cond.notify_all()
+        self.start()
+
+    def send_document(self, chat_id, filename: str, data: bytes, caption: str = None) -> None:
+        """
+        Queues an in-memory file upload (sendDocument), in order with the chat's messages.
+        """
+        chat_id = str(chat_id)
+        item = {"text": caption or "", "reply_markup": None, "parse_mode": None, "attempts": 0,
+                "document": (filename, data)}
+        with self._cond:
+            self._chats.setdefault(chat_id, deque()).append(item)
+            self._cond.notify_all()
+        self.start()
+
+    def call(self, method: str, payload: dict) -> None:
+        with self._cond:
+            self._calls.append({"method": method, "payload": payload, "attempts": 0})
+            self._cond.notify_all()
+        self.start()
+
+    # Lifecycle
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="TelegramOutbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stops the dispatcher after giving queued messages `timeout` seconds to go out.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._pending() or self._in_flight) and time.monotonic() < deadline:
+                self._cond.wait(0.05)
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _pending(self) -> int:
+        return len(self._calls) + sum(len(q) for q in self._chats.values())
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": self._pending(),
+                "in_flight": self._in_flight,
+                "sent": self.sent,
+                "packed": self.packed,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "dropped": self.dropped,
+            }
+
+    # Dispatcher
+
+    def _bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _pack(self, queue: deque) -> dict:
+        """
+        Pops the head message and packs following plain messages into it.
+        """
+        head = queue.popleft()
+        if head["reply_markup"] is not None or head.get("document"):
+            return head
+        pieces = _split_text(head["text"])
+        if len(pieces) > 1:
+            # Oversized: send the first piece now, keep the rest at the head
+            for piece in reversed(pieces[1:]):
+                queue.appendleft(dict(head, text=piece))
+            return dict(head, text=pieces[0])
+        text = head["text"]
+        while (queue and queue[0]["reply_markup"] is None and not queue[0].get("document")
+               and queue[0]["parse_mode"] == head["parse_mode"]):
+            candidate = text + "\n\n" + queue[0]["text"]
+            if len(candidate) > MESSAGE_LIMIT:
+                break
+            text = candidate
+            queue.popleft()
+            self.packed += 1
+        return dict(head, text=text)
+
+    def _next(self):
+        """
+        Blocks until something may be sent. Returns (chat_id or None, item, method, payload).
+        """
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                if self._in_flight >= self.max_in_flight:
+                    self._cond.wait()
+                    continue
+                wait = self.global_bucket.wait_time(now)
+                wake = []
+                if wait > 0:
+                    if self._pending():
+                        wake.append(wait)
+                    self._cond.wait(min(wake) if wake else None)
+                    continue
+
+                if self._calls:
+                    ready_at = self._paused.get(None, 0.0)
+                    if ready_at <= now:
+                        self.global_bucket.take(now)
+                        self._in_flight += 1
+                        item = self._calls.popleft()
+                        return None, item, item["method"], item["payload"]
+                    wake.append(ready_at - now)
+
+                for chat_id, queue in self._chats.items():
+                    if not queue or chat_id in self._busy:
+                        continue
+                    ready_at = max(self._paused.get(chat_id, 0.0), now + self._bucket(chat_id).wait_time(now))
+                    if ready_at > now:
+                        wake.append(ready_at - now)
+                        continue
+                    self.global_bucket.take(now)
+                    self._bucket(chat_id).take(now)
+                    self._busy.add(chat_id)
+                    self._in_flight += 1
+                    item = self._pack(queue)
+                    if item.get("document"):
+                        payload = {"chat_id": chat_id, "document": item["document"]}
+                        if item["text"]:
+                            payload["caption"] = item["text"][:CAPTION_LIMIT]
+                        return chat_id, item, "sendDocument", payload
+                    payload = {"chat_id": chat_id, "text": item["text"], "parse_mode": item["parse_mode"]}
+                    if item["reply_markup"] is not None:
+                        payload["reply_markup"] = item["reply_markup"]
+                    return chat_id, item, "sendMessage", payload
+                self._cond.wait(min(wake) if wake else None)
+            return None, None, None, None
+
+    def _submit(self, method: str, payload: dict):
+        if self.transport is None:
+            return TelegramService.get_client().submit(method, payload)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_in_flight, thread_name_prefix="TelegramSend")
+        return self._executor.submit(self.transport, method, payload)
+
+    def _run(self) -> None:
+        while True:
+            chat_id, item, method, payload = self._next()
+            if item is None:
+                return
+            item["attempts"] += 1
+            try:
+                future = self._submit(method, payload)
+            except Exception as e:
+                self._complete(chat_id, item, method, None, {"description": str(e)})
+                continue
+            future.add_done_callback(lambda f, c=chat_id, i=item, m=method: self._on_done(c, i, m, f))
+
+    def _on_done(self, chat_id, item, method, future) -> None:
+        try:
+            status, body = future.result()
+        except Exception as e:
+            status, body = None, {"description": str(e) or type(e).__name__}
+        self._complete(chat_id, item, method, status, body)
+
+    def _complete(self, chat_id, item, method, status, body) -> None:
+        """
+        Records a finished request; requeues it at the head of its chat if it should be retried.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            self._busy.discard(chat_id)
+            self._cond.notify_all()
+
+            if status == 200:
+                self.sent += 1
+                return
+
+            if status == 429:
+                # Only this chat (or the call queue) waits; other chats keep sending
+                retry_after = float((body.get("parameters") or {}).get("retry_after") or 1)
+                self.rate_limited += 1
+                self._paused[chat_id] = time.monotonic() + retry_after
+                self._requeue(chat_id, item)
+                logger.warning(f"[TelegramOutbox] 429 on {method} (chat {chat_id}), retrying in {retry_after}s")
+                return
+
+            retriable = status is None or status >= 500
+            if retriable and item["attempts"] < self.max_attempts:
+                self.retries += 1
+                self._paused[chat_id] = time.monotonic() + DELAY_RETRY * item["attempts"]
+                self._requeue(chat_id, item)
+                return
+
+            self.dropped += 1
+        logger.error(f"[TelegramOutbox] {method} failed (status={status}): {body.get('description')}")
+
+    def _requeue(self, chat_id, item) -> None:
+        if chat_id is None:
+            self._calls.appendleft(item)
+        else:
+            self._chats.setdefault(chat_id, deque()).appendleft(item)
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+def get_outbox() -> TelegramOutbox:
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = TelegramOutbox(
+                global_rate=settings.TELEGRAM_GLOBAL_RATE,
+                chat_rate=settings.TELEGRAM_CHAT_RATE,
+                chat_burst=settings.TELEGRAM_CHAT_BURST,
+                max_in_flight=settings.TELEGRAM_MAX_CONNECTIONS
             )
-            adapter = HTTPAdapter(max_retries=retry_strategy)
-            cls._session = requests.Session()
-            cls._session.mount("http://", adapter)
-            cls._session.mount("https://", adapter)
-        return cls._session
+        return _outbox
+
+def stop_outbox() -> None:
+    """
+    Drains the outbox, then closes the shared Bot API client.
+    """
+    if _outbox is not None:
+        _outbox.stop()
+    TelegramService.stop_client()
 
 def handle_update(updates):
     from app.services import transaction_service
@@ -45,14 +373,7 @@ def handle_update(updates):
                     text = msg.text.strip()
                     
                     if text.startswith('/ping'):
-                        try:
-                            TelegramService.get_session().post(
-                                url=f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
-                                json={"chat_id": msg.chat.id, "text": "pong", "parse_mode": "HTML"},
-                                timeout=WAIT_TIME
-                            )
-                        except Exception as e:
-                            logger.error(f"[handle_update] Ping Error: {e}")
+                        _ping_reply(msg.chat.id)
                         continue
 
                     if user_id != settings.TELEGRAM_USER_ID:
@@ -73,105 +394,148 @@ def handle_update(updates):
                 transaction_service.process_transaction(user_id, cmd.from_user.first_name, data)
                 
                 # Acknowledge callback to stop loading animation
-                try:
-                    TelegramService.get_session().post(
-                        url=f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/answerCallbackQuery",
-                        json={"callback_query_id": cmd.id, "text": "Done"},
-                        timeout=WAIT_TIME
-                    )
-                except Exception:
-                    pass
+                get_outbox().call("answerCallbackQuery", {"callback_query_id": cmd.id, "text": "Done"})
 
     except Exception as e:
         logger.error(f"[handle_update] Error: {e}")
 
+def _dispatch_updates(raw_updates: list) -> None:
+    """
+    Converts raw getUpdates results to telebot objects for handle_update.
+    """
+    from telebot import types
+    updates = []
+    for raw in raw_updates:
+        update = types.Update.de_json(raw)
+        if update.message is not None:
+            updates.append(update.message)
+        elif update.callback_query is not None:
+            updates.append(update.callback_query)
+    if updates:
+        from app.services import binance_service
+        # Commands are informational: their Binance calls queue behind trading
+        with binance_service.request_priority(binance_service.PRIORITY_LOW):
+            handle_update(updates)
+
+def _ping_reply(chat_id) -> None:
+    """
+    Probes the Bot API round trip on the client loop and replies when it
+    completes, so the update handler is not held for the probe.
+    """
+    def reply(future):
+        try:
+            send_message(f"pong (Bot API RTT {future.result() * 1000:.0f} ms)", chat_id=chat_id)
+        except Exception as e:
+            logger.warning(f"[_ping_reply] Probe failed: {e}")
+            send_message("pong", chat_id=chat_id)
+
+    try:
+        TelegramService.get_client().submit_probe().add_done_callback(reply)
+    except Exception as e:
+        logger.warning(f"[_ping_reply] Probe failed: {e}")
+        send_message("pong", chat_id=chat_id)
+
 _connect_lock = False
 
 def start_telegram_bot():
     global _connect_lock
     if _connect_lock:
         return
-        
+
     try:
         _connect_lock = True
         logger.info("Starting Telegram Bot...")
-        bot = TeleBot(settings.TELEGRAM_BOT_TOKEN)
-        
-        try:
-            bot.remove_webhook()
-        except Exception:
-            pass
-
-        @bot.message_handler(func=lambda m: True)
-        def _handle_message(m):
-            handle_update([m])
-
-        @bot.callback_query_handler(func=lambda c: True)
-        def _handle_callback(c):
-            handle_update([c])
-            
-        bot.polling(non_stop=True, timeout=60, long_polling_timeout=60)
-        
+        client = TelegramService.get_client()
+
+        status, body = client.call("deleteWebhook")
+        if status != 200:
+            logger.warning(f"[start_telegram_bot] deleteWebhook status {status}: {body.get('description')}")
+        client.start_probe(settings.TELEGRAM_PROBE_INTERVAL)
+        client.poll_forever(_dispatch_updates)
+        _connect_lock = False
+
     except Exception as e:
         _connect_lock = False
         logger.error(f"[start_telegram_bot] Error: {e}")
         time.sleep(WAIT_TIME)
 
+def _keyboard(buttons: list) -> list:
+    flat_buttons = []
+    for button_row in buttons:
+        for button_data in button_row:
+            if len(button_data) == 2:
+                flat_buttons.append(button_data)
+
+    keyboard = []
+    # Group by 3
+    for i in range(0, len(flat_buttons), 3):
+        row = []
+        for text, callback_data in flat_buttons[i:i+3]:
+            row.append({"text": text, "callback_data": callback_data})
+        keyboard.append(row)
+    return keyboard
+
 def send_buttons(message: str, buttons: list) -> bool:
+    """
+    Queues a message with an inline keyboard. Returns once queued.
+    """
     try:
-        flat_buttons = []
-        for button_row in buttons:
-            for button_data in button_row:
-                if len(button_data) == 2:
-                    flat_buttons.append(button_data)
-
-        keyboard = []
-        # Group by 3
-        for i in range(0, len(flat_buttons), 3):
-            row = []
-            for text, callback_data in flat_buttons[i:i+3]:
-                row.append({"text": text, "callback_data": callback_data})
-            keyboard.append(row)
-
-        response = TelegramService.get_session().post(
-            url=f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
-            json={
-                "chat_id": settings.TELEGRAM_USER_ID,
-                "text": message,
-                "reply_markup": {"inline_keyboard": keyboard},
-                "parse_mode": "HTML"
-            },
-            timeout=WAIT_TIME
-        )
-        return response.status_code == 200
+        get_outbox().send(settings.TELEGRAM_USER_ID, message, reply_markup={"inline_keyboard": _keyboard(buttons)})
+        return True
     except Exception as e:
         logger.error(f"[send_buttons] Error: {e}")
         return False
 
-def send_message(message: str) -> bool:
+def send_document(filename: str, data: bytes, caption: str = None, chat_id=None) -> bool:
+    """
+    Queues an in-memory file as a Telegram document. Returns once queued.
+    """
+    try:
+        get_outbox().send_document(chat_id or settings.TELEGRAM_USER_ID, filename, data, caption=caption)
+        return True
+    except Exception as e:
+        logger.error(f"[send_document] Error: {e}")
+        return False
+
+def send_message(message: str, chat_id=None) -> bool:
+    """
+    Queues a message. Consecutive queued messages to a chat are packed together.
+    """
     try:
-        response = TelegramService.get_session().post(
-            url=f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
-            json={
-                "chat_id": settings.TELEGRAM_USER_ID,
-                "text": message,
-                "parse_mode": "HTML"
-            },
-            timeout=WAIT_TIME
-        )
-        return response.status_code == 200
+        get_outbox().send(chat_id or settings.TELEGRAM_USER_ID, message)
+        return True
     except Exception as e:
         logger.error(f"[send_message] Error: {e}")
         return False
 
-def run_telegram_service():
+_service_stop = None  # stop Event of the current polling run
+
+def start_telegram_service() -> threading.Thread:
     """
-    Main loop for Telegram service.
+    Starts a polling run in a daemon thread. Each run has its own stop Event,
+    so starting a new run (re-election) can never revive a stopped one.
     """
-    while True:
+    global _service_stop
+    _service_stop = threading.Event()
+    thread = threading.Thread(target=run_telegram_service, args=(_service_stop,), name="TelegramService", daemon=True)
+    thread.start()
+    return thread
+
+def run_telegram_service(stop: threading.Event):
+    """
+    Main loop for Telegram service. Runs until `stop` is set (stop_telegram_service()).
+    """
+    while not stop.is_set():
         try:
             start_telegram_bot()
-            time.sleep(WAIT_TIME)
         except Exception as e:
              logger.error(f"[run_telegram_service] Crash: {e}")
-             time.sleep(WAIT_TIME)
+        stop.wait(WAIT_TIME)
+
+def stop_telegram_service() -> None:
+    """
+    Stops polling (e.g. when this worker is no longer the leader). Queued sends still go out.
+    """
+    if _service_stop is not None:
+        _service_stop.set()
+    TelegramService.stop_client()
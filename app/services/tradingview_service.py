@@ -1,39 +1,79 @@
 import time
 import threading
-from flask import Flask, request, jsonify
-from waitress import serve
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from concurrent.futures import Future
 
 from app.core.config import settings
 from app.core.logging import logger
-from app.core import state
-from app.services import trade_service
-# from d_model import md_c_alerts as alerts_model # Removed
-
-# Constants
-import time
-import threading
-
-from app.core.config import settings
-from app.core.logging import logger
-from app.core import state
 from app.services import trade_service
 from app.core.database import SessionLocal
 from app.core import crud
+from app.core.journal import Journal
+from app.core.cache import TTLSet
+from app.core.netting import NettingTable, net_action
+from app.core import metrics
 
 # Constants
 TYPES = ["long_open", "long_close", "short_open", "short_close"]
 WAIT_TIME = 10
 
-# Global Locks/State for this service
-_push_order_lock = threading.Lock()
+# Per-symbol locks: two runs never trade the same symbol at once,
+# while different symbols execute in parallel on the dispatcher's workers
+_symbol_locks = {}
+_symbol_locks_guard = threading.Lock()
+
+def _get_symbol_lock(symbol: str) -> threading.Lock:
+    with _symbol_locks_guard:
+        lock = _symbol_locks.get(symbol)
+        if lock is None:
+            lock = _symbol_locks[symbol] = threading.Lock()
+        return lock
+
+# symbol -> monotonic time its lock was taken, for the lock-held gauge
+_lock_held = {}
+
+def _lock_held_seconds() -> dict:
+    now = time.monotonic()
+    return {s: round(now - t, 3) for s, t in list(_lock_held.items())}
+
+metrics.registry.register(metrics.Gauge(
+    "bot_symbol_lock_held_seconds", "How long each currently held symbol lock has been held",
+    ("symbol",), fn=_lock_held_seconds))
 
 def validate_type(alert_type: str) -> bool:
     return isinstance(alert_type, str) and not alert_type.isdigit() and alert_type.lower().strip() in TYPES
 
+# Net intent of the pending alerts, per symbol (see process_symbol_alerts)
+netting = NettingTable()
+
+def _track_alerts(rows) -> None:
+    """
+    Adds newly stored (id, symbol, type) alerts to the netting table.
+    Only the worker that dispatches keeps one; the others' alerts reach it as stale symbols.
+    """
+    from app.services import coordination_service
+    if not coordination_service.is_leader():
+        return
+    for alert_id, symbol, alert_type in rows:
+        netting.add(symbol, alert_id, alert_type)
+
+def load_netting() -> int:
+    """
+    Rebuilds the netting table from the unclaimed pending alerts (startup / election).
+    """
+    db = SessionLocal()
+    try:
+        return netting.load(crud.get_unclaimed_alert_types(db))
+    finally:
+        db.close()
+
 def add_to_queue(symbol: str, alert_type: str, price: float) -> bool:
     db = SessionLocal()
     try:
-        crud.create_alert(db, symbol, alert_type, price)
+        alert = crud.create_alert(db, symbol, alert_type, price)
+        _track_alerts([(alert.id, alert.symbol, alert.type)])
         return True
     except Exception as e:
         logger.error(f"[add_to_queue] Error: {e}")
@@ -41,51 +81,222 @@ def add_to_queue(symbol: str, alert_type: str, price: float) -> bool:
     finally:
         db.close()
 
-def process_order_queue():
+# Durable ingest journal; alerts rows are written behind it by the indexer
+alert_journal = Journal(settings.ALERT_JOURNAL_PATH, max_bytes=settings.ALERT_JOURNAL_MAX_BYTES)
+
+# Recently accepted dedupe keys; the alerts.dedupe_key unique index backs it across restarts
+recent_alerts = TTLSet(settings.ALERT_DEDUPE_TTL, max_size=settings.ALERT_DEDUPE_MAX_KEYS)
+
+def dedupe_key(symbol: str, alert_type: str, price: float, bar_time: str = None, idempotency_key: str = None) -> tuple:
     """
-    Opens or closes trades from the queue using SQLite.
+    Returns (key, durable). An explicit idempotency key wins; otherwise the
+    key hashes symbol, type, price and bar time. Without a bar time the hash
+    only identifies a retry within the TTL window, so it is not persisted
+    (the same alert may legitimately fire again on a later bar).
     """
-    if _push_order_lock.locked():
-        return
+    if idempotency_key:
+        return f"k:{idempotency_key}", True
+    content = f"{symbol.upper()}|{alert_type.lower().strip()}|{float(price)!r}|{bar_time or ''}"
+    return f"h:{hashlib.sha1(content.encode('utf-8')).hexdigest()}", bool(bar_time)
+
+def claim_alert(key: str) -> bool:
+    """
+    Records a dedupe key; False if it was seen within ALERT_DEDUPE_TTL.
+    """
+    return recent_alerts.add(key)
+
+def release_alert(key: str) -> None:
+    """
+    Forgets a claimed key whose alert was not persisted, so a retry is accepted.
+    """
+    recent_alerts.discard(key)
+
+def load_recent_alert_keys() -> int:
+    """
+    Seeds the dedupe cache from alerts received within the TTL (e.g. after a restart).
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        rows = crud.get_recent_dedupe_keys(db, now - timedelta(seconds=settings.ALERT_DEDUPE_TTL))
+    finally:
+        db.close()
+    for key, received in rows:
+        recent_alerts.add(key, age=(now - received).total_seconds())
+    return len(rows)
+
+def journal_alert(symbol: str, alert_type: str, price: float, dedupe_key: str = None) -> Future:
+    """
+    Appends an alert to the ingest journal.
+    The returned Future resolves once the alert is fsynced to disk.
+    """
+    entry = {
+        "id": uuid.uuid4().hex,
+        "ts": time.time(),
+        "symbol": symbol,
+        "type": alert_type,
+        "price": price
+    }
+    if dedupe_key:
+        entry["dedupe_key"] = dedupe_key
+    return alert_journal.append(entry)
+
+def index_journal_entries(entries: list) -> None:
+    """
+    Journal consumer: writes alert rows in one transaction, then notifies the dispatcher.
+    """
+    rows = [{
+        "journal_id": e["id"],
+        "dedupe_key": e.get("dedupe_key"),
+        "datetime": datetime.utcfromtimestamp(e["ts"]),
+        "symbol": e["symbol"],
+        "type": e["type"],
+        "price": e["price"]
+    } for e in entries]
 
-    with _push_order_lock:
+    db = SessionLocal()
+    try:
+        inserted = crud.create_alerts_from_journal(db, rows)
+    finally:
+        db.close()
+    _track_alerts(inserted)
+
+    for symbol in dict.fromkeys(e["symbol"] for e in entries):
+        trigger_queue_processing(symbol)
+
+def start_alert_journal() -> None:
+    """
+    Opens this worker's journal (its own locked slot in multi-worker mode) and replays it.
+    """
+    global alert_journal
+    if settings.WEB_WORKERS > 1:
+        from app.services import coordination_service
+        path = coordination_service.claim_journal_slot(settings.ALERT_JOURNAL_PATH)
+        alert_journal = Journal(path, max_bytes=settings.ALERT_JOURNAL_MAX_BYTES)
+    try:
+        load_recent_alert_keys()
+    except Exception as e:
+        logger.error(f"[start_alert_journal] Dedupe cache warm-up failed: {e}")
+    replayed = alert_journal.start(index_journal_entries)
+    if replayed:
+        logger.info(f"[start_alert_journal] Replayed {replayed} journaled alerts")
+
+def stop_alert_journal() -> None:
+    alert_journal.stop()
+
+def replay_orphaned_journals() -> int:
+    """
+    Indexes journal slots whose worker is gone (multi-worker leader only).
+    """
+    from app.services import coordination_service
+    replayed = 0
+    for path in coordination_service.orphaned_journal_slots(settings.ALERT_JOURNAL_PATH):
+        journal = Journal(path, max_bytes=settings.ALERT_JOURNAL_MAX_BYTES)
+        try:
+            replayed += journal.start(index_journal_entries)
+        except Exception as e:
+            logger.error(f"[replay_orphaned_journals] {path}: {e}")
+        finally:
+            journal.stop()
+            coordination_service.release_journal_slot(path)
+    if replayed:
+        logger.info(f"[replay_orphaned_journals] Replayed {replayed} alerts from orphaned journals")
+    return replayed
+
+def get_pending_symbols() -> list:
+    db = SessionLocal()
+    try:
+        return crud.get_pending_symbols(db)
+    finally:
+        db.close()
+
+def sweep_pending_symbols() -> list:
+    """
+    Dispatcher sweep: requeues alerts stuck on a dead worker's claim, checks
+    the netting table against the database, then lists pending symbols.
+    """
+    from app.services import coordination_service
+    db = SessionLocal()
+    try:
+        before = datetime.utcnow() - timedelta(seconds=settings.ALERT_CLAIM_TIMEOUT)
+        released = crud.release_alert_claims(db, before=before, exclude_owner=coordination_service.worker_id())
+        if released:
+            logger.warning(f"[sweep_pending_symbols] Requeued {released} alerts from expired claims")
+        # Alerts the table missed (lost wake-ups, released claims) make their symbol stale
+        netting.reconcile(crud.count_unclaimed_alerts(db))
+        return crud.get_pending_symbols(db)
+    finally:
+        db.close()
+
+def net_alerts(alerts: list) -> str:
+    """
+    Nets a symbol's pending alerts into a single action, or "" if they cancel out.
+    """
+    long_pos = 0
+    short_pos = 0
+    for alert in alerts:
+        if alert.type == "long_open": long_pos += 1
+        elif alert.type == "short_open": short_pos += 1
+        elif alert.type == "long_close": long_pos -= 1
+        elif alert.type == "short_close": short_pos -= 1
+    return net_action(long_pos, short_pos)
+
+def _claim_net(db, symbol: str, owner: str) -> tuple:
+    """
+    Claims the symbol's pending alerts; returns (net action, claimed ids).
+    Uses the netting table when it covers the symbol, else nets the rows
+    claimed from the database (stale symbol or a claim lost to another worker).
+    """
+    entry = netting.take(symbol)
+    if entry is not None and crud.claim_alerts(db, list(entry.ids), owner) == len(entry.ids):
+        return entry.action, list(entry.ids)
+    alerts = crud.claim_pending_alerts(db, symbol, owner)
+    return net_alerts(alerts), [a.id for a in alerts]
+
+def process_symbol_alerts(symbol: str) -> None:
+    """
+    Nets and executes the pending alerts of one symbol.
+    Alerts are claimed atomically before executing, so no alert trades twice
+    even across worker processes. Only the claimed alerts are marked
+    processed; anything that arrives meanwhile stays pending for the next window.
+    """
+    from app.services import coordination_service
+    with _get_symbol_lock(symbol):
+        acquired = time.monotonic()
+        _lock_held[symbol] = acquired
         db = SessionLocal()
         try:
-            time.sleep(WAIT_TIME)
-            alerts = crud.get_pending_alerts(db)
-            if not alerts:
+            action, alert_ids = _claim_net(db, symbol, coordination_service.worker_id())
+            if not alert_ids:
                 return
 
-            # Unique symbols
-            symbols = list({a.symbol for a in alerts})
-            
-            for symbol in symbols:
-                long_pos = 0
-                short_pos = 0
-                
-                symbol_alerts = [a for a in alerts if a.symbol == symbol]
-                
-                for alert in symbol_alerts:
-                    if alert.type == "long_open": long_pos += 1
-                    elif alert.type == "short_open": short_pos += 1
-                    elif alert.type == "long_close": long_pos -= 1
-                    elif alert.type == "short_close": short_pos -= 1
-        
-                if long_pos != short_pos:
-                    if long_pos > 0: trade_service.execute_trade_logic(symbol, "long_open")
-                    elif short_pos > 0: trade_service.execute_trade_logic(symbol, "short_open")
-                    elif long_pos < 0: trade_service.execute_trade_logic(symbol, "long_close")
-                    elif short_pos < 0: trade_service.execute_trade_logic(symbol, "short_close")
-                
-                crud.mark_alerts_processed_by_symbol(db, symbol)
-                
+            if action:
+                with metrics.dispatch_seconds.time(symbol=symbol, type=action):
+                    trade_service.execute_trade_logic(symbol, action)
+
+            crud.mark_alerts_processed(db, alert_ids)
         except Exception as e:
-            logger.error(f"[process_order_queue] Error: {e}")
+            # Claimed but unprocessed alerts are picked up again from the database
+            netting.invalidate(symbol)
+            logger.error(f"[process_symbol_alerts] Symbol: {symbol} - Error: {e}")
         finally:
             db.close()
+            _lock_held.pop(symbol, None)
+            metrics.lock_hold_seconds.observe(time.monotonic() - acquired, symbol=symbol)
+
+def process_order_queue():
+    """
+    Opens or closes trades for every symbol with pending alerts.
+    """
+    try:
+        for symbol in get_pending_symbols():
+            process_symbol_alerts(symbol)
+    except Exception as e:
+        logger.error(f"[process_order_queue] Error: {e}")
 
-def trigger_queue_processing():
-    threading.Thread(target=process_order_queue).start()
+def trigger_queue_processing(symbol: str):
+    from app.services import dispatch_service
+    dispatch_service.notify(symbol)
 
 def run_tradingview_service():
     """
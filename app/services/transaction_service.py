@@ -1,6 +1,5 @@
 import threading
 import time
-import os
 
 from app.core.config import settings
 # from app.core import state  # Avoid circular import at top level if possible, or use it for states
@@ -15,6 +14,7 @@ from app.services import binance_service
 # Or use a localized import. Localized import is easier for Refactoring Phase 1.
 
 from app.core import crud
+from app.core.database import SessionLocal
 
 # Constants
 MAX_USER_STATES = 1000
@@ -141,6 +141,14 @@ def handle_command(user_id: str, user_name: str, cmd: str) -> dict:
             
         elif cmd_key == "/botstatus":
             msg = "Bot is running." if state.bot_running else "Bot is stopped."
+            from app.services import dispatch_service
+            if dispatch_service.dispatcher is not None:
+                q = dispatch_service.dispatcher.stats()
+                msg += (f"\nQueue: {q['windows_open']} waiting | {q['queued']} queued | "
+                        f"{q['in_flight']} in flight ({q['workers']} workers)")
+                waits = sorted(q['wait_times'].items(), key=lambda x: -x[1])[:5]
+                for symbol, wait in waits:
+                    msg += f"\n{symbol}: waited {wait:.2f}s"
             
         elif cmd_key == "/botstart":
             if state.bot_running:
@@ -254,30 +262,15 @@ def handle_command(user_id: str, user_name: str, cmd: str) -> dict:
              return {"message": "Enter symbol (e.g. BTCUSDT):", "buttons": []}
              
         elif cmd_key == "/getlog":
+            # /getlog [lines] [level] [func=name] [since=2h] [until=...]
+            from app.services import log_export_service
+            db = SessionLocal()
             try:
-                # We need to create a text file with logs to send to user
-                db = SessionLocal()
-                try:
-                    logs = crud.get_logs(db, limit=100)
-                    
-                    db_dir = os.path.join(os.getcwd(), 'data') # Changed from e_database to data
-                    os.makedirs(db_dir, exist_ok=True)
-                    file_path = os.path.join(db_dir, 'log_export.txt')
-                    
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                         for l in logs:
-                            f.write(f"{l.datetime.strftime('%Y-%m-%d %H:%M:%S')} [{l.type.upper()}] {l.func}: {l.desc}\n")
-                            
-                    return {
-                        "message": f"Here are the last 100 logs, {user_name}.",
-                        "buttons": buttons,
-                        "document": file_path
-                    }
-                finally:
-                    db.close()
-            except Exception as e:
-                logger.error(f"[handle_command] Get Log Error: {e}")
-                msg = "An error occurred while preparing the logs."
+                response = log_export_service.build_export(db, cmd.split()[1:])
+            finally:
+                db.close()
+            response["buttons"] = buttons
+            return response
 
         return {"message": msg, "buttons": buttons}
 
@@ -298,8 +291,12 @@ def process_transaction(user_id: str, user_name: str, cmd: str) -> bool:
         message = response.get("message", "")
         buttons = response.get("buttons")
         multi = response.get("multi")
+        document = response.get("document")
         
-        if multi:
+        if document:
+            filename, data = document
+            telegram_service.send_document(filename, data, caption=message)
+        elif multi:
             for m in multi:
                 telegram_service.send_message(m)
         elif message:
@@ -0,0 +1,300 @@
+"""
+End-to-end benchmark: TradingView alerts -> /webhook -> journal -> dispatcher
+-> trade_service -> (fake) Binance order ack.
+
+Boots the real FastAPI app (lifespan included) against a local FakeFutures
+server in a throwaway working directory, fires alerts at a fixed rate across
+many symbols and reports alert-to-order latency, throughput, REST calls per
+alert and DB writes. Results can be saved as / compared against a JSON
+baseline; a regression beyond the tolerance exits with status 1.
+
+    python -m benchmarks.e2e --scenario steady
+    python -m benchmarks.e2e --scenario steady --save-baseline
+    python -m benchmarks.e2e --alerts 500 --rate 50 --latency-ms 20 --error-rate 0.05
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_binance import FakeFutures
+
+# Constants
+BASELINE_DIR = os.path.join(REPO_ROOT, "benchmarks", "baselines")
+ALERT_KEY = "benchmark-key"
+
+# "steady" stays under the REST request budget; "burst" deliberately exceeds it,
+# so alerts queue up and some open/close pairs net out before execution.
+SCENARIOS = {
+    "steady": {"symbols": 10, "alerts": 40, "rate": 2.0, "latency_ms": 5.0, "jitter_ms": 5.0, "error_rate": 0.0},
+    "burst": {"symbols": 50, "alerts": 300, "rate": 100.0, "latency_ms": 5.0, "jitter_ms": 5.0, "error_rate": 0.0},
+    "errors": {"symbols": 10, "alerts": 40, "rate": 2.0, "latency_ms": 5.0, "jitter_ms": 5.0, "error_rate": 0.1},
+}
+
+# Lower is better unless listed in HIGHER_IS_BETTER
+COMPARED = ["latency_p50", "latency_p95", "latency_p99", "throughput", "executed_ratio",
+            "rest_calls_per_alert", "db_writes_per_alert"]
+HIGHER_IS_BETTER = {"throughput", "executed_ratio"}
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def _configure_env(fake_url: str, args) -> None:
+    os.environ.update({
+        "BINANCE_API_KEY": "benchmark",
+        "BINANCE_SECRET_KEY": "benchmark",
+        "BINANCE_BASE_URL": fake_url,
+        "TELEGRAM_BOT_TOKEN": "0:benchmark",
+        "TELEGRAM_USER_ID": "0",
+        "ALERT_KEY": ALERT_KEY,
+        "ORDER_BALANCE_PERCENT": "5",
+        "ORDER_LEVERAGE": "2",
+        "ALERT_DEBOUNCE_SECONDS": str(args.debounce),
+        # The stand-in has no websocket side: every read goes through REST
+        "ACCOUNT_STREAM_ENABLED": "false",
+        "MARKET_DATA_STREAM_ENABLED": "false",
+    })
+
+class DBWriteCounter:
+    """
+    Counts INSERT/UPDATE/DELETE statements (per table) and commits on an engine.
+    """
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.writes = {}
+        self.commits = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        words = statement.lstrip().split(None, 3)
+        verb = words[0].upper() if words else ""
+        if verb not in ("INSERT", "UPDATE", "DELETE"):
+            return
+        table = words[2] if verb in ("INSERT", "DELETE") and len(words) > 2 else (words[1] if len(words) > 1 else "?")
+        rows = len(parameters) if executemany and isinstance(parameters, (list, tuple)) else 1
+        with self._lock:
+            self.writes[table.strip('"')] = self.writes.get(table.strip('"'), 0) + rows
+
+    def _on_commit(self, conn):
+        with self._lock:
+            self.commits += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"rows": dict(self.writes), "total_rows": sum(self.writes.values()), "commits": self.commits}
+
+def run(args) -> dict:
+    symbols = [f"SYM{i:03d}USDT" for i in range(args.symbols)]
+    fake = FakeFutures(symbols, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                       error_rate=args.error_rate, server_error_rate=args.server_error_rate).start()
+    workdir = tempfile.mkdtemp(prefix="bot-bench-")
+    os.chdir(workdir)  # data/ and logs/ are created relative to the working directory
+    _configure_env(fake.url, args)
+
+    import requests
+    import uvicorn
+    from app.services import telegram_service
+    telegram_service.run_telegram_service = lambda: None  # No Telegram traffic in benchmarks
+    from app import main as app_main
+    from app.core import database
+    from app.core import logging as app_logging
+
+    # Keep stdout for the result: console logging only for warnings and up
+    app_logging.logger.propagate = False
+    for handler in app_logging.logger.handlers:
+        if type(handler).__name__ == "StreamHandler":
+            handler.setLevel("WARNING")
+    db_counter = DBWriteCounter(database.engine)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app_main.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    deadline = time.time() + 15
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    if not server.started:
+        raise RuntimeError("app did not start")
+    # Connector import and exchange info load in the background after startup
+    # (see benchmarks/startup.py); alerts measure the warm path
+    from app.services import binance_service
+    while not binance_service.symbol_index.stats()["size"] and time.time() < deadline:
+        time.sleep(0.05)
+
+    # Fixed-rate, open-loop schedule: symbols round-robin, each symbol alternating open/close
+    local = threading.local()
+    url = f"http://127.0.0.1:{port}/webhook"
+    sent = []
+    sent_lock = threading.Lock()
+
+    def fire(i: int) -> None:
+        symbol = symbols[i % len(symbols)]
+        alert = "long_open" if (i // len(symbols)) % 2 == 0 else "long_close"
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.monotonic()
+        try:
+            ok = session.post(url, json={"symbol": f"{symbol}.P", "alert": alert, "price": 100.0, "key": ALERT_KEY,
+                                          "idempotency_key": f"bench-{i}"},
+                              timeout=10).status_code == 200
+        except Exception:
+            ok = False
+        with sent_lock:
+            sent.append({"symbol": symbol, "alert": alert, "sent": start, "ack": time.monotonic() - start, "ok": ok})
+
+    begin = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        for i in range(args.alerts):
+            wait = begin + i / args.rate - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            pool.submit(fire, i)
+    send_window = time.monotonic() - begin
+
+    # An alert's latency runs to the first order leg for its symbol sent after it.
+    # Alerts that netted out against a later one in the same window have none.
+    def match() -> list:
+        legs = sorted(fake.orders)
+        latencies = []
+        for a in sorted(sent, key=lambda a: a["sent"]):
+            if not a["ok"]:
+                continue
+            first = next((t for t, s, _, _, _ in legs if s == a["symbol"] and t >= a["sent"]), None)
+            latencies.append(None if first is None else first - a["sent"])
+        return latencies
+
+    from app.services import dispatch_service, tradingview_service
+
+    def idle() -> bool:
+        stats = dispatch_service.get_dispatcher().stats()
+        return (tradingview_service.alert_journal.stats()["lag_bytes"] == 0
+                and not tradingview_service.get_pending_symbols()
+                and stats["windows_open"] == 0 and stats["queued"] == 0 and stats["in_flight"] == 0)
+
+    # Drained once every alert is indexed, netted and executed
+    drain_deadline = time.monotonic() + args.drain_timeout
+    while not idle() and time.monotonic() < drain_deadline:
+        time.sleep(0.1)
+    finished = time.monotonic() - begin
+    latencies = match()
+
+    server.should_exit = True
+    server_thread.join(15)
+    fake.stop()
+
+    matched = [l for l in latencies if l is not None]
+    accepted = sum(1 for a in sent if a["ok"])
+    fake_stats = fake.stats()
+    db_stats = db_counter.stats()
+    return {
+        "config": {k: getattr(args, k) for k in ("scenario", "symbols", "alerts", "rate", "latency_ms", "jitter_ms",
+                                                 "error_rate", "server_error_rate", "debounce")},
+        "alerts_sent": len(sent),
+        "alerts_accepted": accepted,
+        "alerts_executed": len(matched),
+        "executed_ratio": round(len(matched) / accepted, 3) if accepted else 0.0,
+        "send_window_s": round(send_window, 3),
+        "elapsed_s": round(finished, 3),
+        "throughput": round(len(matched) / finished, 2) if finished else 0.0,
+        "webhook_ack_p50": round(percentile([a["ack"] for a in sent], 50) or 0, 4),
+        "webhook_ack_p99": round(percentile([a["ack"] for a in sent], 99) or 0, 4),
+        "latency_p50": round(percentile(matched, 50) or 0, 4),
+        "latency_p95": round(percentile(matched, 95) or 0, 4),
+        "latency_p99": round(percentile(matched, 99) or 0, 4),
+        "latency_max": round(max(matched) if matched else 0, 4),
+        "rest_calls": fake_stats["total_requests"],
+        "rest_calls_per_alert": round(fake_stats["total_requests"] / accepted, 2) if accepted else 0.0,
+        "rest_calls_by_endpoint": fake_stats["requests"],
+        "order_legs": fake_stats["order_legs"],
+        "failed_legs": fake_stats["failed_legs"],
+        "db_writes": db_stats,
+        "db_writes_per_alert": round(db_stats["total_rows"] / accepted, 2) if accepted else 0.0,
+    }
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns a list of human-readable regressions (empty when within tolerance).
+    """
+    regressions = []
+    for key in COMPARED:
+        old, new = baseline.get(key), result.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if key in HIGHER_IS_BETTER else change
+        if worse > tolerance:
+            regressions.append(f"{key}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end alert-to-order benchmark")
+    parser.add_argument("--scenario", default="steady", choices=sorted(SCENARIOS))
+    parser.add_argument("--symbols", type=int)
+    parser.add_argument("--alerts", type=int)
+    parser.add_argument("--rate", type=float, help="alerts per second")
+    parser.add_argument("--latency-ms", type=float, help="added latency per fake REST call")
+    parser.add_argument("--jitter-ms", type=float)
+    parser.add_argument("--error-rate", type=float, help="share of order legs rejected")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="share of REST calls answered with 503")
+    parser.add_argument("--debounce", type=float, default=0.0, help="ALERT_DEBOUNCE_SECONDS for the run")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent webhook senders")
+    parser.add_argument("--drain-timeout", type=float, default=30.0)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression vs baseline")
+    parser.add_argument("--baseline", help="baseline JSON (default: benchmarks/baselines/<scenario>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", help="also write the result JSON here")
+    args = parser.parse_args(argv)
+
+    for key, value in SCENARIOS[args.scenario].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+    baseline_path = os.path.abspath(args.baseline or os.path.join(BASELINE_DIR, f"{args.scenario}.json"))
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    result = run(args)
+    text = json.dumps(result, indent=2, sort_keys=True)
+    print(text)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Baseline saved to {baseline_path}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path} (run with --save-baseline)", file=sys.stderr)
+        return 0
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(result, baseline, args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Constants
+DEFAULT_PRICE = 100.0
+MARKET_MAX_QTY = "50"
+# REQUEST_WEIGHT reported back in X-MBX-USED-WEIGHT-1M (others cost 1)
+ROUTE_WEIGHTS = {"POST /fapi/v1/order": 0, "POST /fapi/v1/batchOrders": 5, "GET /fapi/v3/positionRisk": 5,
+                 "GET /fapi/v3/balance": 5, "GET /fapi/v1/userTrades": 5}
+
+class FakeFutures:
+    """
+    Local stand-in for the Binance USD-M futures REST API.
+
+    Implements the endpoints `binance_service` calls, keeps per-symbol
+    positions, and records every request (path, time) and every order leg.
+    `latency_ms` (+ up to `jitter_ms`) is added to each response;
+    `error_rate` fails that share of order legs with a Binance error, and
+    `server_error_rate` answers that share of all requests with HTTP 503.
+    Responses carry the minute's used weight like the real API.
+    """
+
+    def __init__(self, symbols: list, balance: float = 100000.0, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, server_error_rate: float = 0.0, seed: int = 1):
+        self.symbols = list(symbols)
+        self.balance = balance
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.server_error_rate = server_error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._order_id = 0
+        self.positions = defaultdict(float)
+        self.requests = defaultdict(int)
+        self.used_weight = defaultdict(int)  # minute -> weight
+        self.orders = []  # (monotonic time, symbol, side, quantity, ok)
+        self.server = None
+        self._thread = None
+
+    # Lifecycle
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeFutures":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                status, body = fake.handle(self.command, self.path)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("X-MBX-USED-WEIGHT-1M", str(fake.weight_used()))
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="FakeFutures", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def weight_used(self) -> int:
+        with self._lock:
+            return self.used_weight.get(int(time.time() // 60), 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "total_requests": sum(self.requests.values()),
+                "order_legs": len(self.orders),
+                "failed_legs": sum(1 for o in self.orders if not o[4]),
+            }
+
+    # Request handling
+
+    def handle(self, method: str, raw_path: str) -> tuple:
+        parts = urlsplit(raw_path)
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        route = f"{method} {parts.path}"
+        with self._lock:
+            self.requests[route] += 1
+            self.used_weight[int(time.time() // 60)] += ROUTE_WEIGHTS.get(route, 1)
+
+        delay = self.latency_ms + (self._random.random() * self.jitter_ms if self.jitter_ms else 0.0)
+        if delay:
+            time.sleep(delay / 1000.0)
+        if self.server_error_rate and self._random.random() < self.server_error_rate:
+            return 503, {"code": -1001, "msg": "Internal error; unable to process your request."}
+
+        handler = ROUTES.get(route)
+        if handler is None:
+            return 404, {"code": -5000, "msg": f"Unknown path {route}"}
+        try:
+            body = handler(self, params)
+        except KeyError as e:
+            return 400, {"code": -1102, "msg": f"Mandatory parameter {e} was not sent."}
+        if isinstance(body, dict) and body.get("code", 200) != 200:
+            return 400, body
+        return 200, body
+
+    def _price(self, symbol: str) -> float:
+        return DEFAULT_PRICE * (1 + (self.symbols.index(symbol) if symbol in self.symbols else 0) / 100.0)
+
+    def _fill(self, order: dict) -> dict:
+        symbol = order["symbol"]
+        quantity = float(order["quantity"])
+        side = order["side"]
+        ok = not (self.error_rate and self._random.random() < self.error_rate)
+        with self._lock:
+            self.orders.append((time.monotonic(), symbol, side, order["quantity"], ok))
+            if not ok:
+                return {"code": -2019, "msg": "Margin is insufficient."}
+            self._order_id += 1
+            signed = quantity if side == "BUY" else -quantity
+            if str(order.get("reduceOnly", "")).lower() == "true":
+                current = self.positions[symbol]
+                signed = max(min(signed, abs(current)), -abs(current)) if current else 0.0
+            self.positions[symbol] = round(self.positions[symbol] + signed, 8)
+            order_id = self._order_id
+        return {
+            "orderId": order_id, "symbol": symbol, "status": "FILLED", "side": side, "type": "MARKET",
+            "origQty": order["quantity"], "executedQty": order["quantity"], "avgPrice": str(self._price(symbol)),
+        }
+
+    # Endpoints
+
+    def exchange_info(self, params: dict) -> dict:
+        symbols = []
+        for s in self.symbols:
+            symbols.append({
+                "symbol": s, "baseAsset": s[:-4], "quoteAsset": "USDT", "status": "TRADING",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "minPrice": "0.01", "maxPrice": "1000000", "tickSize": "0.01"},
+                    {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+                    {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": MARKET_MAX_QTY, "stepSize": "0.001"},
+                ],
+            })
+        return {"timezone": "UTC", "symbols": symbols}
+
+    def leverage_brackets(self, params: dict) -> list:
+        return [{"symbol": s, "brackets": [{"bracket": 1, "initialLeverage": 125}, {"bracket": 2, "initialLeverage": 1}]}
+                for s in self.symbols]
+
+    def balance(self, params: dict) -> list:
+        return [{"asset": "USDT", "balance": str(self.balance), "crossWalletBalance": str(self.balance),
+                 "availableBalance": str(self.balance)}]
+
+    def position_risk(self, params: dict) -> list:
+        with self._lock:
+            positions = dict(self.positions)
+        symbols = [params["symbol"]] if params.get("symbol") else self.symbols
+        result = []
+        for s in symbols:
+            amt = positions.get(s, 0.0)
+            price = self._price(s)
+            result.append({
+                "symbol": s, "positionAmt": str(amt), "entryPrice": str(price if amt else 0.0),
+                "markPrice": str(price), "unRealizedProfit": "0", "leverage": "2", "marginType": "isolated",
+                "isolatedMargin": str(abs(amt) * price / 2), "positionInitialMargin": str(abs(amt) * price / 2),
+                "positionSide": "BOTH",
+            })
+        return result
+
+    def ticker_price(self, params: dict) -> dict:
+        return {"symbol": params["symbol"], "price": str(self._price(params["symbol"])), "time": int(time.time() * 1000)}
+
+    def depth(self, params: dict) -> dict:
+        price = self._price(params["symbol"])
+        return {"bids": [[str(price - 0.01), "10"]], "asks": [[str(price + 0.01), "10"]]}
+
+    def margin_type(self, params: dict) -> dict:
+        return {"code": 200, "msg": "success"}
+
+    def leverage(self, params: dict) -> dict:
+        return {"symbol": params["symbol"], "leverage": int(params["leverage"]), "maxNotionalValue": "1000000"}
+
+    def new_order(self, params: dict) -> dict:
+        return self._fill(params)
+
+    def batch_orders(self, params: dict) -> list:
+        return [self._fill(o) for o in json.loads(params["batchOrders"])]
+
+    def listen_key(self, params: dict) -> dict:
+        return {"listenKey": "fake-listen-key"}
+
+    def empty_list(self, params: dict) -> list:
+        return []
+
+ROUTES = {
+    "GET /fapi/v1/exchangeInfo": FakeFutures.exchange_info,
+    "GET /fapi/v1/leverageBracket": FakeFutures.leverage_brackets,
+    "GET /fapi/v3/balance": FakeFutures.balance,
+    "GET /fapi/v3/positionRisk": FakeFutures.position_risk,
+    "GET /fapi/v2/ticker/price": FakeFutures.ticker_price,
+    "GET /fapi/v1/depth": FakeFutures.depth,
+    "POST /fapi/v1/marginType": FakeFutures.margin_type,
+    "POST /fapi/v1/leverage": FakeFutures.leverage,
+    "POST /fapi/v1/order": FakeFutures.new_order,
+    "POST /fapi/v1/batchOrders": FakeFutures.batch_orders,
+    "POST /fapi/v1/listenKey": FakeFutures.listen_key,
+    "PUT /fapi/v1/listenKey": FakeFutures.listen_key,
+    "DELETE /fapi/v1/listenKey": FakeFutures.listen_key,
+    "GET /fapi/v1/klines": FakeFutures.empty_list,
+    "GET /fapi/v1/userTrades": FakeFutures.empty_list,
+}
@@ -0,0 +1,182 @@
+"""
+Microbenchmark: integer-scaled QuantityRules vs the per-call Decimal sizing
+it replaced (calc_virtual_quantity, the open chunking in execute_trade_logic
+and the close chunking in binance_service.close_order).
+
+Both implementations size the same seeded random quantities against a set of
+real-world lot filters; every output string must be identical, and the run
+reports per-call time for each. Exits 1 on any mismatch.
+
+    python -m benchmarks.precision
+    python -m benchmarks.precision --cases 20000 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal, ROUND_DOWN
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from app.core.precision import QuantityRules
+
+# (step_size, min_qty, max_qty, market_max_qty) as Binance reports them
+FILTERS = [
+    ("0.001", "0.001", "1000", "120"),
+    ("0.001", "0.001", "10000", "2000"),
+    ("0.01", "0.01", "100000", "10000"),
+    ("0.1", "0.1", "1000000", "30000"),
+    ("1", "1", "10000000", "1000000"),
+    ("1", "1", "50000000", "8000000"),
+    ("0.00100000", "0.00100000", "9000.00000000", "500.00000000"),
+]
+
+# Legacy implementations (verbatim logic, kept here as the reference)
+
+def legacy_virtual_quantity(quantity: float, step_s: str, min_qty_s: str, max_qty_s: str) -> str:
+    q_input = Decimal(str(quantity))
+    min_qty = Decimal(str(min_qty_s))
+    max_qty = Decimal(str(max_qty_s)) if max_qty_s not in (None, '0') else None
+    step_size = Decimal(str(step_s))
+    max_eff = max_qty
+    if max_qty is not None and step_size > 0:
+        max_eff = (max_qty // step_size) * step_size
+    q = q_input
+    if max_eff is not None and q > max_eff:
+        q = max_eff
+    if q < min_qty:
+        q = min_qty
+    if step_size > 0:
+        q = q.quantize(step_size.normalize(), rounding=ROUND_DOWN)
+    if max_eff is not None and q > max_eff:
+        q = max_eff
+    if q < min_qty:
+        q = min_qty
+    if q <= 0:
+        return ""
+    return format(q.normalize(), 'f')
+
+def legacy_chunks(quantity: float, step_s: str, min_qty_s: str, per_max_s: str) -> tuple:
+    step_size = Decimal(str(step_s))
+    min_qty = Decimal(str(min_qty_s))
+    per_max = Decimal(str(per_max_s)) if per_max_s not in (None, '0') else None
+
+    def floor_to_step(x: Decimal) -> Decimal:
+        if step_size <= 0: return x
+        return x.quantize(step_size.normalize(), rounding=ROUND_DOWN)
+
+    total = Decimal(str(quantity))
+    if total < min_qty:
+        total = min_qty
+    total = floor_to_step(total)
+    if total < min_qty:
+        return [], ""
+    chunk_size = floor_to_step(per_max) if (per_max is not None and per_max > 0) else total
+    chunks = []
+    remain = total
+    while remain > 0:
+        cur = floor_to_step(min(remain, chunk_size))
+        if cur < min_qty:
+            break
+        chunks.append(format(cur.normalize(), 'f'))
+        remain = floor_to_step(remain - cur)
+    retry = floor_to_step(Decimal(chunks[0]) - step_size) if chunks else None
+    shrunk = format(retry.normalize(), 'f') if retry is not None and retry >= min_qty else ""
+    return chunks, shrunk
+
+# Integer-scaled implementations (as used by trade_service / binance_service)
+
+def scaled_virtual_quantity(quantity: float, rules: QuantityRules) -> str:
+    units = rules.clamp(quantity)
+    return rules.format(units) if units > 0 else ""
+
+def scaled_chunks(quantity: float, rules: QuantityRules) -> tuple:
+    total = rules.floor(max(rules.to_units(quantity), rules.min))
+    if total < rules.min:
+        return [], ""
+    chunks = rules.split(total)
+    return chunks, rules.shrink(chunks[0]) if chunks else ""
+
+def make_cases(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    cases = []
+    for i in range(count):
+        step, min_qty, max_qty, market_max = FILTERS[i % len(FILTERS)]
+        # Notional * leverage / price, as float division produces it; capped at
+        # 20 market-size chunks like a real balance would be
+        quantity = (rng.uniform(5, 50000) * rng.choice([1, 2, 5, 10, 20])) / rng.choice(
+            [0.0123, 0.5, 1.7, 3.3, 25.0, 97.1, 1834.2, 64250.5])
+        if quantity > 20 * float(market_max):
+            quantity = quantity % (20 * float(market_max))
+        cases.append((quantity, step, min_qty, max_qty, market_max))
+    return cases
+
+def check(cases: list) -> list:
+    """
+    Returns the cases where the two implementations disagree.
+    """
+    mismatches = []
+    for quantity, step, min_qty, max_qty, market_max in cases:
+        rules = QuantityRules(step, min_qty, max_qty)
+        market_rules = QuantityRules(step, min_qty, market_max)
+        expected = (legacy_virtual_quantity(quantity, step, min_qty, max_qty),
+                    legacy_chunks(quantity, step, min_qty, market_max))
+        actual = (scaled_virtual_quantity(quantity, rules), scaled_chunks(quantity, market_rules))
+        if expected != actual:
+            mismatches.append({"quantity": quantity, "filter": [step, min_qty, max_qty, market_max],
+                               "expected": expected, "actual": actual})
+    return mismatches
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run(cases: list, repeat: int) -> dict:
+    # Rules are built once per symbol (at exchange-info refresh), not per order
+    rules = {f: (QuantityRules(f[0], f[1], f[2]), QuantityRules(f[0], f[1], f[3])) for f in FILTERS}
+
+    def legacy():
+        for quantity, step, min_qty, max_qty, market_max in cases:
+            legacy_virtual_quantity(quantity, step, min_qty, max_qty)
+            legacy_chunks(quantity, step, min_qty, market_max)
+
+    def scaled():
+        for quantity, step, min_qty, max_qty, market_max in cases:
+            lot, market = rules[(step, min_qty, max_qty, market_max)]
+            scaled_virtual_quantity(quantity, lot)
+            scaled_chunks(quantity, market)
+
+    legacy_s = _time(legacy, repeat)
+    scaled_s = _time(scaled, repeat)
+    return {
+        "cases": len(cases),
+        "legacy_us_per_case": round(legacy_s / len(cases) * 1e6, 2),
+        "scaled_us_per_case": round(scaled_s / len(cases) * 1e6, 2),
+        "speedup": round(legacy_s / scaled_s, 2),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Quantity sizing microbenchmark")
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    cases = make_cases(args.cases, args.seed)
+    mismatches = check(cases)
+    result = run(cases, args.repeat)
+    result["mismatches"] = len(mismatches)
+    print(json.dumps(result, indent=2, sort_keys=True))
+    for m in mismatches[:10]:
+        print(f"MISMATCH {json.dumps(m)}", file=sys.stderr)
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
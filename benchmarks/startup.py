@@ -0,0 +1,171 @@
+"""
+Startup benchmark: how long a restart leaves the webhook unreachable.
+
+Profiles the import graph of `app.main` with `python -X importtime` (total
+time and the heaviest modules), then boots `main.py` in a throwaway working
+directory and times process start -> first `200 /health`, several times.
+Binance and Telegram point at a closed local port, so background warm-ups
+fail fast instead of waiting on the network. Results can be saved as /
+compared against a JSON baseline like the e2e benchmark.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --save-baseline
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.e2e import percentile, compare
+
+# Constants
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baselines", "startup.json")
+COMPARED = ["import_s", "health_ready_p50"]
+# Dependencies that should only load on first use, never on the startup path
+DEFERRED_MODULES = ["binance", "telebot", "aiohttp", "requests", "dateparser", "flask", "waitress"]
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def app_env(port: int) -> dict:
+    dead = f"http://127.0.0.1:{_free_port()}"
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": REPO_ROOT,
+        "BINANCE_API_KEY": "benchmark",
+        "BINANCE_SECRET_KEY": "benchmark",
+        "BINANCE_BASE_URL": dead,
+        "TELEGRAM_BOT_TOKEN": "0:benchmark",
+        "TELEGRAM_USER_ID": "0",
+        "TELEGRAM_API_URL": dead,
+        "TELEGRAM_PROBE_INTERVAL": "0",
+        "ALERT_KEY": "benchmark-key",
+        "WEBHOOK_IP": "127.0.0.1",
+        "WEBHOOK_PORT": str(port),
+        "ACCOUNT_STREAM_ENABLED": "false",
+        "MARKET_DATA_STREAM_ENABLED": "false",
+        "LOG_RETENTION_DAYS": "0",
+    })
+    return env
+
+def parse_importtime(text: str) -> list:
+    """
+    Returns (module, self_us, cumulative_us, depth) for each `-X importtime` line.
+    """
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def profile_imports(workdir: str, module: str = "app.main", top: int = 10) -> dict:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=workdir,
+                          env=app_env(_free_port()), capture_output=True, text=True, timeout=120)
+    rows = parse_importtime(proc.stderr)
+    total = next((cum for name, _, cum, _ in rows if name == module), 0)
+    loaded = {name for name, _, _, _ in rows}
+    # Heaviest direct dependencies of the app's own modules
+    children = [r for r in rows if not r[0].startswith("app.") and r[3] >= 1]
+    parents = {}
+    for name, _, cum, depth in children:
+        top_level = name.split(".")[0]
+        parents[top_level] = max(parents.get(top_level, 0), cum)
+    heaviest = sorted(parents.items(), key=lambda x: -x[1])[:top]
+    return {
+        "import_s": round(total / 1e6, 3),
+        "modules_imported": len(rows),
+        "heaviest_packages_s": {name: round(us / 1e6, 3) for name, us in heaviest},
+        "deferred_loaded": sorted(m for m in DEFERRED_MODULES if m in loaded),
+    }
+
+def time_to_health(workdir: str, timeout: float = 60.0) -> float:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "main.py")], cwd=workdir,
+                            env=app_env(port), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"app exited with {proc.returncode} before /health was ready")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError(f"/health not ready after {timeout}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bot-startup-")
+    try:
+        result = profile_imports(workdir, top=args.top)
+        # First boot creates the DB; later boots are restarts of an existing install
+        first = time_to_health(workdir)
+        samples = [time_to_health(workdir) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    result.update({
+        "runs": args.runs,
+        "health_ready_first_boot": round(first, 3),
+        "health_ready_p50": round(percentile(samples, 50), 3),
+        "health_ready_min": round(min(samples), 3),
+        "health_ready_max": round(max(samples), 3),
+    })
+    return result
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import time and time-to-/health benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="restarts to time")
+    parser.add_argument("--top", type=int, default=10, help="heaviest packages to list")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression vs baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    text = json.dumps(result, indent=2, sort_keys=True)
+    print(text)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    failures = [f"deferred module imported at startup: {m}" for m in result["deferred_loaded"]]
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures += [r for r in compare(result, baseline, args.tolerance) if r.split(":")[0] in COMPARED]
+    else:
+        print(f"No baseline at {args.baseline} (run with --save-baseline)", file=sys.stderr)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+import sys
+import os
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.core.database import engine, init_db, convert_incremental_vacuum, SQLALCHEMY_DATABASE_URL
+
+def upgrade():
+    """
+    Applies pragmas, missing tables, columns and indexes to an existing bot_database.db.
+    The app does the same on startup; this lets you upgrade a DB file offline.
+    Files created before incremental vacuum are converted here (one full VACUUM),
+    never at startup. Stop the bot before running this.
+    """
+    print(f"Upgrading {SQLALCHEMY_DATABASE_URL}...")
+    try:
+        init_db()
+        if convert_incremental_vacuum(engine):
+            print("Converted to auto_vacuum=INCREMENTAL")
+        print("Upgrade complete!")
+    except Exception as e:
+        print(f"Upgrade failed: {e}")
+
+if __name__ == "__main__":
+    upgrade()
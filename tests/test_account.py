@@ -0,0 +1,142 @@
+import sys
+import os
+import json
+import time
+import threading
+import unittest
+from unittest import mock
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import serve
+
+from app.services.account_service import AccountState
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+class FakeUserDataStream:
+    """
+    Local stand-in for the futures user-data websocket: records the listenKey
+    path and lets the test push events to connected clients.
+    """
+    def __init__(self):
+        self.paths = []
+        self.clients = []
+        self.server = serve(self.handler, "127.0.0.1", 0)
+        self.port = self.server.socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def handler(self, ws):
+        self.paths.append(ws.request.path)
+        self.clients.append(ws)
+        try:
+            for _ in ws:
+                pass
+        except ConnectionClosed:
+            pass
+
+    def push(self, event):
+        for ws in list(self.clients):
+            try:
+                ws.send(json.dumps(event))
+            except Exception:
+                pass
+
+    def drop_clients(self):
+        for ws in list(self.clients):
+            ws.close()
+        self.clients = []
+
+    def close(self):
+        self.server.shutdown()
+
+class TestAccountState(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeUserDataStream()
+        self.addCleanup(self.server.close)
+        self.client = mock.Mock()
+        self.client.new_listen_key.return_value = {"listenKey": "abc123"}
+        self.client.balance.return_value = [{"asset": "USDT", "balance": "1000"}]
+        self.client.get_position_risk.return_value = [
+            {"symbol": "BTCUSDT", "positionAmt": "0", "entryPrice": "0", "unRealizedProfit": "0", "leverage": "5"}
+        ]
+        self.state = AccountState(lambda: self.client, ws_url=f"ws://127.0.0.1:{self.server.port}", reconcile_interval=60)
+        self.addCleanup(self.state.stop)
+
+    def test_stream_updates_positions_without_rest(self):
+        self.state.start()
+        self.assertTrue(wait_for(self.state.is_live))
+        self.assertEqual(self.server.paths, ["/ws/abc123"])
+        rest_calls = self.client.get_position_risk.call_count
+
+        self.server.push({"e": "ACCOUNT_UPDATE", "E": 1, "a": {
+            "B": [{"a": "USDT", "wb": "950.5", "cw": "950.5"}],
+            "P": [{"s": "BTCUSDT", "pa": "0.010", "ep": "50000", "up": "1.5", "mt": "isolated", "iw": "100", "ps": "BOTH"}]
+        }})
+        self.assertTrue(wait_for(lambda: self.state.events == 1))
+
+        pos = self.state.get_position("BTCUSDT")
+        self.assertEqual(pos["positionAmt"], "0.010")
+        self.assertEqual(pos["entryPrice"], "50000")
+        self.assertEqual(pos["leverage"], "5")
+        self.assertEqual(pos["positionInitialMargin"], "100.0")
+        self.assertEqual(self.state.get_balances()[0]["balance"], "950.5")
+        # Served from memory while the stream is live
+        self.assertEqual(self.client.get_position_risk.call_count, rest_calls)
+
+    def test_reconcile_keeps_newer_stream_updates(self):
+        self.state.start()
+        self.assertTrue(wait_for(self.state.is_live))
+        self.server.push({"e": "ACCOUNT_UPDATE", "a": {
+            "P": [{"s": "ETHUSDT", "pa": "-1", "ep": "3000", "up": "0", "iw": "0", "ps": "BOTH"}]
+        }})
+        self.assertTrue(wait_for(lambda: self.state.events == 1))
+
+        # REST snapshot that started before the event was applied doesn't know ETH yet
+        real_time = time.time
+        with mock.patch("app.services.account_service.time.time", side_effect=lambda: real_time() - 10):
+            self.state.reconcile()
+        self.assertEqual(self.state.get_position("ETHUSDT")["positionAmt"], "-1")
+
+    def test_reads_fall_back_to_rest_when_stream_is_down(self):
+        # Never started: every read resyncs from REST
+        self.assertEqual(self.state.get_position("BTCUSDT")["leverage"], "5")
+        self.state.get_positions()
+        self.assertEqual(self.client.get_position_risk.call_count, 2)
+
+        self.client.get_position_risk.side_effect = Exception("timeout")
+        with self.assertRaises(RuntimeError):
+            self.state.get_positions()
+
+    def test_own_orders_are_reread_from_rest(self):
+        self.state.start()
+        self.assertTrue(wait_for(self.state.is_live))
+        rest_calls = self.client.get_position_risk.call_count
+        self.assertEqual(self.state.get_position("BTCUSDT")["positionAmt"], "0")
+
+        # The bot's order filled; the stream has not reported it yet
+        self.client.get_position_risk.return_value = [{"symbol": "BTCUSDT", "positionAmt": "2.5", "leverage": "5"}]
+        self.state.mark_traded("BTCUSDT")
+        self.assertEqual(self.state.get_position("BTCUSDT")["positionAmt"], "2.5")
+        self.client.get_position_risk.assert_called_with(symbol="BTCUSDT", recvWindow=5000)
+        # Read once; afterwards the cache is current again
+        self.state.get_position("BTCUSDT")
+        self.assertEqual(self.client.get_position_risk.call_count, rest_calls + 1)
+
+    def test_reconnect_resyncs(self):
+        self.state.start()
+        self.assertTrue(wait_for(self.state.is_live))
+        reconciles = self.client.balance.call_count
+        self.server.drop_clients()
+        self.assertTrue(wait_for(lambda: len(self.server.paths) == 2, timeout=8))
+        self.assertTrue(wait_for(lambda: self.client.balance.call_count > reconciles))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
 import sys
 import os
+import shutil
+import tempfile
+import uuid
 import unittest
+from unittest import mock
 from fastapi.testclient import TestClient
 
 # Ensure app path
@@ -16,8 +20,33 @@ except Exception as e:
     print(f"Import Error: {e}")
     sys.exit(1)
 
+from app.core.journal import Journal
+from app.services import tradingview_service
+
 client = TestClient(app)
 
+_journal_dir = None
+_patches = []
+
+def setUpModule():
+    # Webhooks journal into a throwaway directory, not the real data/alerts.journal
+    global _journal_dir
+    _journal_dir = tempfile.mkdtemp()
+    path = os.path.join(_journal_dir, "alerts.journal")
+    _patches.extend([
+        mock.patch.object(settings, "ALERT_JOURNAL_PATH", path),
+        mock.patch.object(tradingview_service, "alert_journal", Journal(path)),
+    ])
+    for p in _patches:
+        p.start()
+
+def tearDownModule():
+    tradingview_service.alert_journal.stop()
+    for p in reversed(_patches):
+        p.stop()
+    _patches.clear()
+    shutil.rmtree(_journal_dir, ignore_errors=True)
+
 class TestFastAPI(unittest.TestCase):
     def test_health(self):
         response = client.get("/health")
@@ -57,5 +86,50 @@ class TestFastAPI(unittest.TestCase):
              if response.status_code != 500: # 500 might happen if DB locked or something
                  self.fail("Webhook failed")
 
+    def test_webhook_duplicate(self):
+        payload = {
+            "symbol": "BTCUSDT",
+            "alert": "long_open",
+            "price": 50000.0,
+            "key": settings.ALERT_KEY,
+            "idempotency_key": uuid.uuid4().hex
+        }
+        first = client.post("/webhook", json=payload)
+        self.assertEqual(first.json()["status"], "success")
+        second = client.post("/webhook", json=payload)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["status"], "duplicate")
+        # A different bar is a new alert even at the same price
+        del payload["idempotency_key"]
+        payload["bar_time"] = uuid.uuid4().hex
+        self.assertEqual(client.post("/webhook", json=payload).json()["status"], "success")
+        payload["bar_time"] = uuid.uuid4().hex
+        self.assertEqual(client.post("/webhook", json=payload).json()["status"], "success")
+
+    def test_webhook_dry_run(self):
+        from app.core import order_plan
+        from app.core.precision import QuantityRules
+        from app.services import trade_service
+
+        plan = order_plan.plan_open("BTCUSDT", "long_open", QuantityRules("0.001", "0.001", "1"), 100.0, 1000.0, 100, "2")
+        payload = {"symbol": "BTCUSDT", "alert": "long_open", "price": 100.0, "key": settings.ALERT_KEY, "dry_run": True}
+        with mock.patch.object(trade_service, "plan_trade", return_value=plan) as planner, \
+             mock.patch.object(tradingview_service, "journal_alert") as journal:
+            response = client.post("/webhook", json=payload)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "dry_run")
+        self.assertEqual(body["plan"]["quantity"], "20")
+        self.assertEqual(len(body["plan"]["chunks"]), 20)
+        planner.assert_called_once_with("BTCUSDT", "long_open")
+        journal.assert_not_called()
+
+    def test_metrics(self):
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn("# TYPE bot_webhook_validation_seconds histogram", response.text)
+        self.assertIn("bot_queue_depth ", response.text)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,78 @@
+import sys
+import os
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from binance.um_futures import UMFutures
+from binance.error import ClientError
+
+from benchmarks.fake_binance import FakeFutures
+from benchmarks.e2e import percentile, compare
+from benchmarks import startup
+
+class TestFakeFutures(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeFutures(["BTCUSDT", "ETHUSDT"]).start()
+        self.addCleanup(self.fake.stop)
+        self.client = UMFutures(key="k", secret="s", base_url=self.fake.url)
+
+    def test_connector_round_trip(self):
+        info = self.client.exchange_info()
+        self.assertEqual([s["symbol"] for s in info["symbols"]], ["BTCUSDT", "ETHUSDT"])
+        res = self.client.new_batch_order(batchOrders=[
+            {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": "1.5"},
+            {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": "0.5"},
+        ])
+        self.assertEqual([r["executedQty"] for r in res], ["1.5", "0.5"])
+        self.client.new_order(symbol="BTCUSDT", side="SELL", type="MARKET", quantity="5", reduceOnly=True)
+        pos = self.client.get_position_risk(symbol="BTCUSDT")[0]
+        self.assertEqual(float(pos["positionAmt"]), 0.0)
+        self.assertEqual(self.fake.stats()["requests"]["POST /fapi/v1/batchOrders"], 1)
+
+    def test_used_weight_header(self):
+        from app.services.binance_service import RequestBudget
+        budget = RequestBudget(max_concurrent=2, per_second=1000)
+        self.client.session.hooks["response"].append(budget.record_response)
+        self.client.exchange_info()
+        self.client.get_position_risk()
+        self.assertGreaterEqual(budget.used_weight(), 6)
+
+    def test_error_injection(self):
+        self.fake.error_rate = 1.0
+        with self.assertRaises(ClientError) as ctx:
+            self.client.new_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity="1")
+        self.assertEqual(ctx.exception.error_code, -2019)
+
+class TestReport(unittest.TestCase):
+    def test_percentile(self):
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertIsNone(percentile([], 99))
+
+    def test_compare_flags_regressions(self):
+        baseline = {"latency_p99": 0.2, "throughput": 10.0, "rest_calls_per_alert": 6.0}
+        result = {"latency_p99": 0.3, "throughput": 9.5, "rest_calls_per_alert": 6.0}
+        regressions = compare(result, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("latency_p99"))
+
+class TestStartup(unittest.TestCase):
+    def test_parse_importtime(self):
+        text = ("import time: self [us] | cumulative | imported package\n"
+                "import time:       120 |        120 |     json.decoder\n"
+                "import time:       300 |        420 |   json\n"
+                "import time:      1000 |       1420 | app.main\n")
+        self.assertEqual(startup.parse_importtime(text),
+                         [("json.decoder", 120, 120, 2), ("json", 300, 420, 1), ("app.main", 1000, 1420, 0)])
+
+    def test_heavy_clients_load_lazily(self):
+        import subprocess
+        code = ("import sys, app.main; "
+                "print(','.join(m for m in %r if m in sys.modules))" % startup.DEFERRED_MODULES)
+        proc = subprocess.run([sys.executable, "-c", code], cwd=os.getcwd(), capture_output=True, text=True, timeout=60)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), "")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import sys
+import os
+import time
+import threading
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.services.binance_service import (
+    BudgetedClient, RequestBudget, predict_weight, PRIORITY_ORDER, PRIORITY_NORMAL, PRIORITY_LOW
+)
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+class TestRequestBudget(unittest.TestCase):
+    def test_concurrency_cap(self):
+        budget = RequestBudget(max_concurrent=2, per_second=1000)
+        peak = []
+        lock = threading.Lock()
+
+        class Client:
+            def ping(self):
+                with lock:
+                    peak.append(budget.stats()["in_flight"])
+                time.sleep(0.05)
+                return {}
+
+        client = BudgetedClient(Client(), budget)
+        threads = [threading.Thread(target=client.ping) for _ in range(6)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(budget.stats()["requests"], 6)
+
+    def test_rate_limit(self):
+        budget = RequestBudget(max_concurrent=10, per_second=20)
+        begin = time.monotonic()
+        for _ in range(30):
+            budget.acquire()
+            budget.release()
+        # 20 burst tokens, then 10 more at 20/s
+        self.assertGreaterEqual(time.monotonic() - begin, 0.4)
+
+    def test_orders_go_ahead_of_queued_lookups(self):
+        budget = RequestBudget(max_concurrent=1, per_second=1000)
+        order = []
+        budget.acquire()
+
+        def call(priority, name):
+            budget.acquire(priority)
+            order.append(name)
+            budget.release()
+
+        low = threading.Thread(target=call, args=(PRIORITY_LOW, "getwallet"))
+        low.start()
+        self.assertTrue(wait_for(lambda: budget.stats()["waiting"]["low"] == 1))
+        high = threading.Thread(target=call, args=(PRIORITY_ORDER, "new_order"))
+        high.start()
+        self.assertTrue(wait_for(lambda: budget.stats()["waiting"]["order"] == 1))
+        budget.release()
+        low.join(2)
+        high.join(2)
+        self.assertEqual(order, ["new_order", "getwallet"])
+
+    def test_low_priority_waits_for_the_next_minute(self):
+        now = [90.0]
+        budget = RequestBudget(max_concurrent=4, per_second=1000, weight_limit=1000, clock=lambda: now[0])
+
+        class Response:
+            status_code = 200
+            headers = {"X-MBX-USED-WEIGHT-1M": "680", "X-MBX-ORDER-COUNT-10S": "3"}
+
+        budget.record_response(Response())
+        self.assertEqual(budget.stats()["order_count_10s"], 3)
+        done = []
+        low = threading.Thread(target=lambda: (budget.acquire(PRIORITY_LOW, 30), done.append("low")))
+        low.start()
+        self.assertTrue(wait_for(lambda: budget.stats()["deferred"] == 1))
+        # Normal work still fits under its share, orders always do
+        budget.acquire(PRIORITY_NORMAL, 200)
+        budget.release(200)
+        budget.acquire(PRIORITY_ORDER, 5)
+        budget.release(5)
+        self.assertEqual(done, [])
+
+        # New minute: the weight window resets and the lookup goes through
+        now[0] = 120.0
+        budget.acquire(PRIORITY_ORDER, 0)
+        budget.release(0)
+        low.join(2)
+        self.assertEqual(done, ["low"])
+        self.assertEqual(budget.used_weight(), 30)
+
+    def test_predicted_weight(self):
+        self.assertEqual(predict_weight("depth", {"symbol": "BTCUSDT", "limit": 5}), 2)
+        self.assertEqual(predict_weight("ticker_price", {}), 2)
+        self.assertEqual(predict_weight("get_position_risk", {}), 5)
+        self.assertEqual(predict_weight("new_order", {"symbol": "BTCUSDT"}), 0)
+        self.assertEqual(predict_weight("change_leverage", {}), 1)
+
+if __name__ == '__main__':
+    unittest.main()
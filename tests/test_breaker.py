@@ -0,0 +1,153 @@
+import sys
+import os
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from binance.error import ClientError, ServerError
+import requests
+
+from app.core.breaker import CircuitBreaker, CircuitOpenError, RetryBudget, backoff, CLOSED, HALF_OPEN, OPEN
+from app.services.binance_service import BudgetedClient, RequestBudget, classify_error
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def client_error(code, status=400, header=None):
+    return ClientError(status, code, "error", header or {})
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_then_half_opens(self):
+        clock = Clock()
+        breaker = CircuitBreaker("new_order", threshold=3, reset_timeout=10, clock=clock)
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        # One trial call after the timeout; a second caller is still rejected
+        clock.now = 10
+        self.assertEqual(breaker.state, HALF_OPEN)
+        breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        clock.now = 20
+        breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.stats()["opened"], 2)
+
+    def test_trip_holds_for_retry_after(self):
+        clock = Clock()
+        breaker = CircuitBreaker("exchange_info", reset_timeout=5, clock=clock)
+        breaker.trip(60)
+        clock.now = 59
+        self.assertEqual(breaker.state, OPEN)
+        clock.now = 60
+        self.assertEqual(breaker.state, HALF_OPEN)
+
+class TestRetryBudget(unittest.TestCase):
+    def test_retries_are_capped_by_calls(self):
+        clock = Clock()
+        budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=2, clock=clock)
+        self.assertTrue(budget.try_retry())
+        self.assertTrue(budget.try_retry())
+        self.assertFalse(budget.try_retry())
+        budget.record_call()
+        budget.record_call()
+        self.assertTrue(budget.try_retry())
+        self.assertEqual(budget.stats()["exhausted"], 1)
+
+    def test_backoff_is_jittered_and_capped(self):
+        for attempt in range(6):
+            delay = backoff(attempt, 1.0, 4.0)
+            cap = min(4.0, 2 ** attempt)
+            self.assertTrue(cap / 2 <= delay <= cap)
+
+class TestClassifyError(unittest.TestCase):
+    def test_classes(self):
+        self.assertEqual(classify_error(client_error(-1003, 429)), "rate_limit")
+        self.assertEqual(classify_error(client_error(-1003, 418)), "rate_limit")
+        self.assertEqual(classify_error(client_error(-1021)), "timestamp")
+        self.assertEqual(classify_error(client_error(-2019)), "margin")
+        self.assertEqual(classify_error(client_error(-1111)), "filter")
+        self.assertEqual(classify_error(ServerError(503, "unavailable")), "transport")
+        self.assertEqual(classify_error(requests.exceptions.ConnectTimeout()), "transport")
+        self.assertEqual(classify_error(CircuitOpenError("new_order", 1)), "circuit_open")
+        self.assertEqual(classify_error(-4164), "filter")
+        self.assertEqual(classify_error(None), "other")
+
+class TestBudgetedClient(unittest.TestCase):
+    def make(self, errors, max_attempts=3):
+        self.calls = []
+        self.sleeps = []
+        self.breakers = {}
+
+        def endpoint(**kwargs):
+            self.calls.append(kwargs)
+            if errors:
+                raise errors.pop(0)
+            return {"ok": True}
+
+        class Connector:
+            pass
+
+        connector = Connector()
+        connector.new_order = connector.exchange_info = endpoint
+        return BudgetedClient(
+            connector, RequestBudget(4, 1000), retries=RetryBudget(max_tokens=10), max_attempts=max_attempts,
+            breaker=lambda name: self.breakers.setdefault(name, CircuitBreaker(name, threshold=2)),
+            sleep=self.sleeps.append)
+
+    def test_rate_limit_is_retried_with_backoff(self):
+        client = self.make([client_error(-1003, 429)])
+        self.assertEqual(client.exchange_info(), {"ok": True})
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(len(self.sleeps), 1)
+
+    def test_filter_error_is_not_retried(self):
+        client = self.make([client_error(-1111)])
+        with self.assertRaises(ClientError):
+            client.new_order(symbol="BTCUSDT")
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.breakers["new_order"].state, CLOSED)
+
+    def test_transport_error_never_resends_an_order(self):
+        client = self.make([requests.exceptions.ReadTimeout()])
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            client.new_order(symbol="BTCUSDT")
+        self.assertEqual(len(self.calls), 1)
+        # Informational calls are safe to resend
+        client = self.make([requests.exceptions.ReadTimeout()])
+        self.assertEqual(client.exchange_info(), {"ok": True})
+
+    def test_breaker_fails_fast_when_open(self):
+        client = self.make([ServerError(502, "bad gateway")] * 4, max_attempts=1)
+        for _ in range(2):
+            with self.assertRaises(ServerError):
+                client.exchange_info()
+        with self.assertRaises(CircuitOpenError):
+            client.exchange_info()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_long_retry_after_trips_breaker(self):
+        client = self.make([client_error(-1003, 418, {"Retry-After": "120"})])
+        with self.assertRaises(ClientError):
+            client.exchange_info()
+        self.assertEqual(self.breakers["exchange_info"].state, OPEN)
+        self.assertEqual(self.sleeps, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import sys
+import os
+import time
+import contextvars
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.core.concurrency import FanOut
+
+class TestFanOut(unittest.TestCase):
+    def setUp(self):
+        self.fan_out = FanOut(max_workers=4, timeout=2.0)
+        self.addCleanup(self.fan_out.shutdown)
+
+    def test_latency_is_the_slowest_call(self):
+        def call(value, delay):
+            return lambda: time.sleep(delay) or value
+
+        begin = time.monotonic()
+        results = self.fan_out.gather(call("a", 0.2), call("b", 0.2), call("c", 0.1))
+        self.assertEqual(results, ["a", "b", "c"])
+        self.assertLess(time.monotonic() - begin, 0.35)
+
+    def test_context_carries_to_workers(self):
+        var = contextvars.ContextVar("var", default="unset")
+        var.set("caller")
+        self.assertEqual(self.fan_out.gather(var.get, var.get), ["caller", "caller"])
+
+    def test_shared_deadline_and_errors(self):
+        with self.assertRaises(TimeoutError):
+            self.fan_out.gather(lambda: time.sleep(1), lambda: 1, timeout=0.1)
+
+        def boom():
+            raise ValueError("boom")
+        begin = time.monotonic()
+        with self.assertRaises(ValueError):
+            self.fan_out.gather(boom, lambda: time.sleep(1))
+        self.assertLess(time.monotonic() - begin, 0.5)
+
+    def test_nested_gather_runs_inline(self):
+        fan_out = FanOut(max_workers=1, timeout=1.0)
+        self.addCleanup(fan_out.shutdown)
+        inner = lambda: fan_out.gather(lambda: 1, lambda: 2)
+        self.assertEqual(fan_out.gather(inner, inner), [[1, 2], [1, 2]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import sys
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core import database
+from app.core import crud
+from app.services import coordination_service
+from app.services.coordination_service import LeaderElector, WakeListener
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+class CoordinationTestCase(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        database.Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine)
+        self.db = self.Session()
+        self.addCleanup(self.db.close)
+
+class TestLease(CoordinationTestCase):
+    def test_single_owner_until_expiry(self):
+        self.assertTrue(crud.acquire_lease(self.db, "leader", "a", ttl=10, now=100.0))
+        self.assertFalse(crud.acquire_lease(self.db, "leader", "b", ttl=10, now=105.0))
+        # The owner renews; the other worker only wins once it has expired
+        self.assertTrue(crud.acquire_lease(self.db, "leader", "a", ttl=10, address="127.0.0.1:1", now=108.0))
+        self.assertFalse(crud.acquire_lease(self.db, "leader", "b", ttl=10, now=117.0))
+        self.assertTrue(crud.acquire_lease(self.db, "leader", "b", ttl=10, now=119.0))
+        self.assertEqual(crud.get_lease(self.db, "leader", now=120.0).owner, "b")
+
+    def test_release(self):
+        crud.acquire_lease(self.db, "leader", "a", ttl=10)
+        crud.release_lease(self.db, "leader", "b")
+        self.assertIsNotNone(crud.get_lease(self.db, "leader"))
+        crud.release_lease(self.db, "leader", "a")
+        self.assertIsNone(crud.get_lease(self.db, "leader"))
+        self.assertTrue(crud.acquire_lease(self.db, "leader", "b", ttl=10))
+
+class TestLeaderElector(CoordinationTestCase):
+    def make(self, owner, events):
+        return LeaderElector(self.Session, owner, ttl=30,
+                             on_elected=lambda: events.append((owner, "elected")),
+                             on_demoted=lambda: events.append((owner, "demoted")))
+
+    def test_one_leader_and_handover(self):
+        events = []
+        first, second = self.make("a", events), self.make("b", events)
+        self.assertTrue(first.start())
+        self.assertFalse(second.start())
+        self.assertTrue(first.is_leader())
+        self.assertFalse(second.is_leader())
+
+        # A clean shutdown frees the lease for the next round
+        first.stop()
+        self.assertTrue(second.step())
+        second.stop()
+        self.assertEqual(events, [("a", "elected"), ("a", "demoted"), ("b", "elected"), ("b", "demoted")])
+
+    def test_steps_down_when_lease_is_taken(self):
+        events = []
+        elector = self.make("a", events)
+        self.assertTrue(elector.step())
+        # Lease expired and another worker took it
+        crud.acquire_lease(self.db, "leader", "b", ttl=30, now=time.time() + 60)
+        self.assertFalse(elector.step())
+        self.assertEqual(events, [("a", "elected"), ("a", "demoted")])
+
+class TestAlertClaims(CoordinationTestCase):
+    def test_alert_is_claimed_once(self):
+        for alert_type in ("long_open", "long_close"):
+            crud.create_alert(self.db, "BTCUSDT", alert_type, 100.0)
+        crud.create_alert(self.db, "ETHUSDT", "short_open", 10.0)
+
+        claimed = crud.claim_pending_alerts(self.db, "BTCUSDT", "a")
+        self.assertEqual([a.type for a in claimed], ["long_open", "long_close"])
+        self.assertEqual(crud.claim_pending_alerts(self.db, "BTCUSDT", "b"), [])
+        # The claimant sees its own unfinished claims again
+        self.assertEqual(len(crud.claim_pending_alerts(self.db, "BTCUSDT", "a")), 2)
+
+        crud.create_alert(self.db, "BTCUSDT", "short_open", 100.0)
+        self.assertEqual([a.type for a in crud.claim_pending_alerts(self.db, "BTCUSDT", "b")], ["short_open"])
+
+    def test_stale_claims_are_released(self):
+        crud.create_alert(self.db, "BTCUSDT", "long_open", 100.0)
+        crud.claim_pending_alerts(self.db, "BTCUSDT", "dead")
+        self.assertEqual(crud.release_alert_claims(self.db, before=datetime.utcnow() - timedelta(minutes=2)), 0)
+        self.assertEqual(crud.release_alert_claims(self.db, before=datetime.utcnow() + timedelta(seconds=1),
+                                                   exclude_owner="dead"), 0)
+        self.assertEqual(crud.release_alert_claims(self.db, before=datetime.utcnow() + timedelta(seconds=1)), 1)
+        self.assertEqual(len(crud.claim_pending_alerts(self.db, "BTCUSDT", "b")), 1)
+
+class TestJournalSlots(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.base = os.path.join(self.dir, "alerts.journal")
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def test_each_claim_gets_its_own_slot(self):
+        first = coordination_service.claim_journal_slot(self.base)
+        second = coordination_service.claim_journal_slot(self.base)
+        self.assertEqual((first, second), (self.base + ".0", self.base + ".1"))
+        # Only unheld slots are handed out for replay
+        open(self.base + ".3", "w").close()
+        self.assertEqual(coordination_service.orphaned_journal_slots(self.base), [self.base + ".3"])
+        for path in (first, second, self.base + ".3"):
+            coordination_service.release_journal_slot(path)
+        self.assertEqual(coordination_service.claim_journal_slot(self.base), first)
+        coordination_service.release_journal_slot(first)
+
+class TestWakeListener(unittest.TestCase):
+    def test_symbols_reach_the_handler(self):
+        received = []
+        listener = WakeListener(received.append)
+        listener.start()
+        self.addCleanup(listener.stop)
+        host, port = listener.address.rsplit(":", 1)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(sock.close)
+        sock.sendto(b"BTCUSDT", (host, int(port)))
+        sock.sendto(b"ETHUSDT", (host, int(port)))
+        self.assertTrue(wait_for(lambda: len(received) == 2))
+        self.assertEqual(received, ["BTCUSDT", "ETHUSDT"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -40,6 +40,11 @@ class TestDatabase(unittest.TestCase):
         logs = crud.get_logs(self.db)
         self.assertEqual(len(logs), 1)
 
+    def test_create_logs_batch(self):
+        rows = [{"datetime": datetime.utcnow(), "type": "info", "func": "f", "desc": f"line {i}"} for i in range(5)]
+        crud.create_logs(self.db, rows)
+        self.assertEqual(len(crud.get_logs(self.db)), 5)
+
     def test_create_alert_and_process(self):
         alert = crud.create_alert(self.db, "BTCUSDT", "long_open", 50000.0)
         self.assertFalse(alert.is_processed)
@@ -50,6 +55,32 @@ class TestDatabase(unittest.TestCase):
         updated_alert = self.db.query(Alert).filter(Alert.id == alert.id).first()
         self.assertTrue(updated_alert.is_processed)
 
+    def test_pending_alerts_by_symbol(self):
+        a1 = crud.create_alert(self.db, "BTCUSDT", "long_open", 50000.0)
+        crud.create_alert(self.db, "ETHUSDT", "short_open", 3000.0)
+        self.assertEqual(sorted(crud.get_pending_symbols(self.db)), ["BTCUSDT", "ETHUSDT"])
+
+        crud.mark_alerts_processed(self.db, [a1.id])
+        self.assertEqual(crud.get_pending_alerts(self.db, symbol="BTCUSDT"), [])
+        self.assertEqual(crud.get_pending_symbols(self.db), ["ETHUSDT"])
+
+    def test_journal_alerts_are_idempotent(self):
+        rows = [{"journal_id": "abc", "datetime": datetime.utcnow(), "symbol": "BTCUSDT", "type": "long_open", "price": 1.0}]
+        crud.create_alerts_from_journal(self.db, rows)
+        crud.create_alerts_from_journal(self.db, rows)
+        alerts = crud.get_pending_alerts(self.db)
+        self.assertEqual(len(alerts), 1)
+        self.assertFalse(alerts[0].is_processed)
+
+    def test_duplicate_dedupe_keys_are_skipped(self):
+        now = datetime.utcnow()
+        rows = [{"journal_id": j, "dedupe_key": "k:1", "datetime": now, "symbol": "BTCUSDT", "type": "long_open", "price": 1.0}
+                for j in ("a", "b")]
+        crud.create_alerts_from_journal(self.db, rows)
+        crud.create_alerts_from_journal(self.db, [dict(rows[0], journal_id="c")])
+        self.assertEqual([a.journal_id for a in crud.get_pending_alerts(self.db)], ["a"])
+        self.assertEqual(crud.get_recent_dedupe_keys(self.db, now), [("k:1", now)])
+
     def test_order_lifecycle(self):
         order = crud.create_order(self.db, "BTCUSDT", "LONG", 10, 0.1, 5000, 50000.0)
         self.assertTrue(order.is_open)
@@ -60,5 +91,37 @@ class TestDatabase(unittest.TestCase):
         self.assertFalse(updated_order.is_open)
         self.assertEqual(updated_order.exit_price, 51000.0)
 
+class TestMigrations(unittest.TestCase):
+    def test_init_db_upgrades_existing_file(self):
+        from sqlalchemy import create_engine, inspect, text
+        db_path = os.path.join(os.getcwd(), 'data', 'test_migrate.db')
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        engine = create_engine(f"sqlite:///{db_path}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE alerts (id INTEGER PRIMARY KEY, datetime DATETIME, symbol VARCHAR, type VARCHAR, price FLOAT, is_processed BOOLEAN)"))
+
+        database.init_db(bind=engine)
+        database.init_db(bind=engine) # Idempotent
+
+        inspector = inspect(engine)
+        self.assertIn("journal_id", {c["name"] for c in inspector.get_columns("alerts")})
+        self.assertIn("dedupe_key", {c["name"] for c in inspector.get_columns("alerts")})
+        self.assertIn("ix_alerts_dedupe_key", {i["name"] for i in inspector.get_indexes("alerts")})
+        self.assertIn("ix_alerts_journal_id", {i["name"] for i in inspector.get_indexes("alerts")})
+        self.assertIn("ix_alerts_pending", {i["name"] for i in inspector.get_indexes("alerts")})
+        self.assertIn("ix_orders_open", {i["name"] for i in inspector.get_indexes("orders")})
+        self.assertIn("ix_logs_datetime", {i["name"] for i in inspector.get_indexes("logs")})
+        self.assertIn("logs", inspector.get_table_names())
+        engine.dispose()
+        os.remove(db_path)
+
+    def test_engine_pragmas(self):
+        from sqlalchemy import text
+        with database.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            self.assertEqual(conn.execute(text("PRAGMA synchronous")).scalar(), 1) # NORMAL
+            self.assertEqual(conn.execute(text("PRAGMA busy_timeout")).scalar(), database.settings.DB_BUSY_TIMEOUT_MS)
+
 if __name__ == '__main__':
     unittest.main()
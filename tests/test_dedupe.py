@@ -0,0 +1,51 @@
+import sys
+import os
+import time
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.core.cache import TTLSet
+from app.services import tradingview_service
+
+class TestTTLSet(unittest.TestCase):
+    def test_duplicates_within_ttl(self):
+        keys = TTLSet(ttl=0.2)
+        self.assertTrue(keys.add("a"))
+        self.assertFalse(keys.add("a"))
+        time.sleep(0.25)
+        self.assertTrue(keys.add("a"))
+        self.assertEqual(keys.stats()["hits"], 1)
+
+    def test_bounded(self):
+        keys = TTLSet(ttl=60, max_size=3)
+        for k in "abcd":
+            self.assertTrue(keys.add(k))
+        self.assertEqual(len(keys), 3)
+        self.assertTrue(keys.add("a"))  # Oldest was evicted
+        self.assertFalse(keys.add("d"))
+
+    def test_age_and_discard(self):
+        keys = TTLSet(ttl=10)
+        self.assertTrue(keys.add("old", age=20))
+        self.assertTrue(keys.add("old"))
+        keys.discard("old")
+        self.assertTrue(keys.add("old"))
+
+class TestDedupeKey(unittest.TestCase):
+    def test_keys(self):
+        key, durable = tradingview_service.dedupe_key("BTCUSDT", "long_open", 100.0, idempotency_key="x1")
+        self.assertEqual((key, durable), ("k:x1", True))
+        a, durable = tradingview_service.dedupe_key("BTCUSDT", "long_open", 100.0, bar_time="1700000000")
+        self.assertTrue(durable)
+        b, _ = tradingview_service.dedupe_key("btcusdt", " LONG_OPEN", 100, bar_time="1700000000")
+        self.assertEqual(a, b)
+        c, _ = tradingview_service.dedupe_key("BTCUSDT", "long_open", 100.0, bar_time="1700000060")
+        self.assertNotEqual(a, c)
+        d, durable = tradingview_service.dedupe_key("BTCUSDT", "long_open", 100.0)
+        self.assertFalse(durable)
+        self.assertNotEqual(a, d)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+import sys
+import os
+import time
+import threading
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.services.dispatch_service import AlertDispatcher
+from app.services import tradingview_service
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+class Alert:
+    def __init__(self, type):
+        self.type = type
+
+class TestAlertDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.pending = []
+
+    def handler(self, symbol):
+        with self.lock:
+            self.calls.append((symbol, time.monotonic()))
+
+    def make(self, debounce):
+        d = AlertDispatcher(self.handler, lambda: list(self.pending), debounce=debounce, sweep_interval=60)
+        self.addCleanup(d.stop)
+        return d
+
+    def test_zero_debounce_dispatches_immediately(self):
+        d = self.make(0)
+        d.start()
+        d.notify("BTCUSDT")
+        self.assertTrue(wait_for(lambda: len(self.calls) == 1))
+
+    def test_window_starts_at_first_alert(self):
+        d = self.make(0.3)
+        d.start()
+        first = time.monotonic()
+        d.notify("BTCUSDT")
+        time.sleep(0.1)
+        d.notify("BTCUSDT")
+        d.notify("ETHUSDT")
+        self.assertTrue(wait_for(lambda: len(self.calls) == 2))
+        by_symbol = dict(self.calls)
+        # BTC fired ~0.3s after its first alert, not after the later one
+        self.assertLess(by_symbol["BTCUSDT"] - first, 0.38)
+        self.assertGreater(by_symbol["ETHUSDT"], by_symbol["BTCUSDT"])
+
+    def test_pending_alerts_drained_on_start(self):
+        self.pending = ["BTCUSDT", "ETHUSDT"]
+        d = self.make(0)
+        d.start()
+        self.assertTrue(wait_for(lambda: len(self.calls) == 2))
+
+    def test_handler_error_does_not_stop_dispatcher(self):
+        def failing(symbol):
+            self.handler(symbol)
+            raise RuntimeError("boom")
+        d = AlertDispatcher(failing, lambda: [], debounce=0, sweep_interval=60)
+        self.addCleanup(d.stop)
+        d.start()
+        d.notify("BTCUSDT")
+        self.assertTrue(wait_for(lambda: len(self.calls) == 1))
+        d.notify("BTCUSDT")
+        self.assertTrue(wait_for(lambda: len(self.calls) == 2))
+
+class TestWorkerPool(unittest.TestCase):
+    def test_symbols_run_in_parallel_and_same_symbol_is_ordered(self):
+        active = {}
+        overlap = []
+        started = []
+        lock = threading.Lock()
+
+        def handler(symbol):
+            with lock:
+                if active.get(symbol):
+                    overlap.append(symbol)
+                active[symbol] = True
+                started.append(symbol)
+            time.sleep(0.2)
+            with lock:
+                active[symbol] = False
+
+        d = AlertDispatcher(handler, lambda: [], debounce=0, sweep_interval=60, workers=4)
+        self.addCleanup(d.stop)
+        d.start()
+        begin = time.monotonic()
+        for symbol in ["A", "B", "C", "D"]:
+            d.notify(symbol)
+        self.assertTrue(wait_for(lambda: d.stats()["dispatched"] == 4))
+        # Four 0.2s runs in parallel, not ~0.8s in sequence
+        self.assertLess(time.monotonic() - begin, 0.6)
+
+        # A second window for a busy symbol waits for the in-flight run
+        d.notify("A")
+        time.sleep(0.05)
+        d.notify("A")
+        self.assertTrue(wait_for(lambda: d.stats()["dispatched"] == 6))
+        self.assertEqual(overlap, [])
+        self.assertIn("A", d.stats()["wait_times"])
+
+class TestNetting(unittest.TestCase):
+    def test_net_alerts(self):
+        net = tradingview_service.net_alerts
+        self.assertEqual(net([Alert("long_open")]), "long_open")
+        self.assertEqual(net([Alert("long_open"), Alert("long_close")]), "")
+        self.assertEqual(net([Alert("short_open"), Alert("short_open"), Alert("short_close")]), "short_open")
+        self.assertEqual(net([Alert("long_close")]), "long_close")
+
+    def test_table_nets_incrementally(self):
+        from app.core.netting import NettingTable
+        table = NettingTable()
+        for alert_id, alert_type in enumerate(["short_open", "short_open", "short_close"], 1):
+            table.add("BTCUSDT", alert_id, alert_type)
+        table.add("BTCUSDT", 3, "short_close")  # indexed twice
+        table.add("ETHUSDT", 4, "long_close")
+        entry = table.take("BTCUSDT")
+        self.assertEqual((entry.action, sorted(entry.ids)), ("short_open", [1, 2, 3]))
+        self.assertIsNone(table.take("BTCUSDT"))
+        self.assertEqual(table.take("ETHUSDT").action, "long_close")
+
+    def test_stale_symbols_and_rebuild(self):
+        from app.core.netting import NettingTable
+        table = NettingTable()
+        table.add("BTCUSDT", 1, "long_open")
+        table.add("ETHUSDT", 2, "long_open")
+        # Another worker indexed an ETH alert; the table only knows its own
+        self.assertEqual(table.reconcile({"BTCUSDT": 1, "ETHUSDT": 2}), ["ETHUSDT"])
+        self.assertIsNone(table.take("ETHUSDT"))
+
+        table.add("SOLUSDT", 9, "short_open")  # indexed while the rows below were read
+        table.load([(1, "BTCUSDT", "long_open"), (2, "ETHUSDT", "long_open"), (3, "ETHUSDT", "long_close")])
+        self.assertEqual(table.take("ETHUSDT").action, "")
+        self.assertEqual(table.take("SOLUSDT").action, "short_open")
+        self.assertEqual(table.stats()["symbols"], 1)
+
+class TestProcessSymbolAlerts(unittest.TestCase):
+    def setUp(self):
+        from unittest import mock
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+        from app.core import database
+        from app.core.netting import NettingTable
+
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        database.Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine)
+        self.trades = []
+        patches = [
+            mock.patch.object(tradingview_service, "SessionLocal", self.Session),
+            mock.patch.object(tradingview_service, "netting", NettingTable()),
+            mock.patch.object(tradingview_service.trade_service, "execute_trade_logic",
+                              side_effect=lambda symbol, action: self.trades.append((symbol, action))),
+            mock.patch.object(tradingview_service, "trigger_queue_processing"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def index(self, *types, symbol="BTCUSDT"):
+        import uuid
+        tradingview_service.index_journal_entries([
+            {"id": uuid.uuid4().hex, "ts": time.time(), "symbol": symbol, "type": t, "price": 1.0} for t in types])
+
+    def pending(self):
+        from app.core import crud
+        db = self.Session()
+        try:
+            return crud.count_unclaimed_alerts(db)
+        finally:
+            db.close()
+
+    def test_nets_from_the_table_without_loading_rows(self):
+        from unittest import mock
+        self.index("long_open", "long_open", "long_close")
+        with mock.patch.object(tradingview_service.crud, "claim_pending_alerts") as from_db:
+            tradingview_service.process_symbol_alerts("BTCUSDT")
+        from_db.assert_not_called()
+        self.assertEqual(self.trades, [("BTCUSDT", "long_open")])
+        self.assertEqual(self.pending(), {})
+
+    def test_rebuilds_stale_symbols_from_the_database(self):
+        from app.core import crud
+        self.index("short_open")
+        # Indexed by another worker: in the database only
+        db = self.Session()
+        crud.create_alert(db, "BTCUSDT", "short_close", 1.0)
+        crud.create_alert(db, "BTCUSDT", "short_close", 1.0)
+        db.close()
+        tradingview_service.sweep_pending_symbols()
+        tradingview_service.process_symbol_alerts("BTCUSDT")
+        self.assertEqual(self.trades, [("BTCUSDT", "short_close")])
+        self.assertEqual(self.pending(), {})
+
+        # After a restart the table is rebuilt from the pending rows
+        self.index("long_open", symbol="ETHUSDT")
+        tradingview_service.netting.clear()
+        tradingview_service.load_netting()
+        tradingview_service.process_symbol_alerts("ETHUSDT")
+        self.assertEqual(self.trades[-1], ("ETHUSDT", "long_open"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.core.journal import Journal
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "alerts.journal")
+        self.consumed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def consumer(self, entries):
+        self.consumed.extend(e["id"] for e in entries)
+
+    def test_append_is_durable_and_group_committed(self):
+        journal = Journal(self.path)
+        futures = []
+
+        def writer(n):
+            for i in range(50):
+                futures.append(journal.append({"id": f"{n}-{i}"}))
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        for f in futures:
+            self.assertTrue(f.result(timeout=5))
+        journal.stop()
+
+        with open(self.path, "rb") as f:
+            self.assertEqual(len(f.read().splitlines()), 200)
+        self.assertLessEqual(journal.fsyncs, 200)
+
+    def test_replay_after_restart(self):
+        journal = Journal(self.path)
+        for i in range(3):
+            journal.append({"id": str(i)}).result(timeout=5)
+        journal.stop()
+
+        # Nothing consumed yet: the next start replays everything
+        journal = Journal(self.path)
+        self.assertEqual(journal.start(self.consumer), 3)
+        journal.append({"id": "3"}).result(timeout=5)
+        journal.stop()
+        self.assertEqual(self.consumed, ["0", "1", "2", "3"])
+
+        # Checkpoint covers everything: no replay
+        journal = Journal(self.path)
+        self.assertEqual(journal.start(self.consumer), 0)
+        journal.stop()
+
+    def test_torn_tail_is_discarded(self):
+        with open(self.path, "wb") as f:
+            f.write(b'{"id":"a"}\n{"id":"b"}\n{"id":')
+        journal = Journal(self.path)
+        self.assertEqual(journal.start(self.consumer), 2)
+        journal.append({"id": "c"}).result(timeout=5)
+        journal.stop()
+        self.assertEqual(self.consumed, ["a", "b", "c"])
+
+    def test_failed_consumer_is_retried(self):
+        calls = []
+
+        def flaky(entries):
+            calls.append(len(entries))
+            if len(calls) == 1:
+                raise RuntimeError("db locked")
+            self.consumer(entries)
+
+        journal = Journal(self.path)
+        journal.append({"id": "x"}).result(timeout=5)
+        with self.assertRaises(RuntimeError):
+            journal.start(flaky)
+        journal.catch_up()
+        journal.stop()
+        self.assertEqual(self.consumed, ["x"])
+
+    def test_compaction_after_full_index(self):
+        journal = Journal(self.path, max_bytes=1)
+        journal.start(self.consumer)
+        journal.append({"id": "a"}).result(timeout=5)
+        journal.catch_up()
+        self.assertEqual(os.path.getsize(self.path), 0)
+        journal.append({"id": "b"}).result(timeout=5)
+        journal.stop()
+        self.assertEqual(self.consumed, ["a", "b"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import sys
+import os
+import gzip
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.core import database
+from app.core import crud
+from app.services import log_export_service
+
+class TestLogExport(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        database.Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.now = datetime(2026, 1, 1, 12, 0, 0)
+        rows = []
+        for i in range(5000):
+            rows.append({
+                "datetime": self.now - timedelta(seconds=i),
+                "type": "error" if i % 10 == 0 else "info",
+                "func": "execute_trade_logic" if i % 2 else "handle_update",
+                "desc": f"line {i}",
+            })
+        crud.create_logs(self.db, rows)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def lines(self, filters):
+        data, count = log_export_service.export_logs(self.db, filters, chunk_size=128)
+        lines = gzip.decompress(data).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), count)
+        return lines
+
+    def test_parse_filters(self):
+        f = log_export_service.parse_filters(["500", "error", "func=trade", "since=2h"], now=self.now)
+        self.assertEqual(f["limit"], 500)
+        self.assertEqual(f["level"], "error")
+        self.assertEqual(f["func"], "trade")
+        self.assertEqual(f["since"], self.now - timedelta(hours=2))
+        f = log_export_service.parse_filters(["until=2026-01-01T11:00:00", "lines=10000000"])
+        self.assertEqual(f["until"], datetime(2026, 1, 1, 11))
+        self.assertEqual(f["limit"], log_export_service.settings.LOG_EXPORT_MAX_LINES)
+        with self.assertRaises(ValueError):
+            log_export_service.parse_filters(["verbose"])
+
+    def test_export_streams_all_chunks_newest_first(self):
+        lines = self.lines(log_export_service.parse_filters(["4000"]))
+        self.assertEqual(len(lines), 4000)
+        self.assertTrue(lines[0].endswith("handle_update: line 0"))
+        self.assertTrue(lines[-1].endswith("line 3999"))
+
+    def test_filters(self):
+        lines = self.lines(log_export_service.parse_filters(
+            ["5000", "level=error", "func=handle", "since=2026-01-01T11:50:00"]))
+        # Every 10th row is an error (all even, so handle_update); since is inclusive: 0..600s back
+        self.assertEqual(len(lines), 61)
+        self.assertTrue(all("[ERROR] handle_update" in line for line in lines))
+
+    def test_build_export(self):
+        response = log_export_service.build_export(self.db, ["10"])
+        filename, data = response["document"]
+        self.assertTrue(filename.endswith(".txt.gz"))
+        self.assertEqual(len(gzip.decompress(data).splitlines()), 10)
+        self.assertIn("10 log lines", response["message"])
+        self.assertNotIn("document", log_export_service.build_export(self.db, ["bogus"]))
+        self.assertNotIn("document", log_export_service.build_export(self.db, ["func=nothing"]))
+
+if __name__ == '__main__':
+    unittest.main()
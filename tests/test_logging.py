@@ -0,0 +1,88 @@
+import sys
+import os
+import logging
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.core.logging import LogPipeline, PipelineHandler
+
+class MemorySink(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+class BatchDBSink:
+    level = logging.INFO
+
+    def __init__(self):
+        self.batches = []
+
+    def emit_batch(self, records):
+        self.batches.append([r.getMessage() for r in records])
+
+class TestLogPipeline(unittest.TestCase):
+    def make_logger(self, pipeline):
+        log = logging.getLogger(f"test-pipeline-{id(pipeline)}")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        log.addHandler(PipelineHandler(pipeline))
+        return log
+
+    def test_records_are_batched(self):
+        sink = MemorySink()
+        db = BatchDBSink()
+        pipeline = LogPipeline([sink], db_sink=db, maxsize=200, batch_size=50, flush_interval=0.1)
+        log = self.make_logger(pipeline)
+        for i in range(120):
+            log.info(f"chunk {i}")
+        # Nothing is written on the calling thread
+        self.assertEqual(sink.lines, [])
+        pipeline.flush()
+        self.assertEqual(len(sink.lines), 120)
+        self.assertEqual([len(b) for b in db.batches], [50, 50, 20])
+
+    def test_formatting_happens_on_the_writer(self):
+        sink = MemorySink()
+        pipeline = LogPipeline([sink], maxsize=10, batch_size=10, flush_interval=0.1)
+        handler = PipelineHandler(pipeline)
+        formatted = []
+        handler.format = lambda record: formatted.append(record) or ""
+        log = logging.getLogger(f"test-pipeline-format-{id(pipeline)}")
+        log.propagate = False
+        log.addHandler(handler)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("failed %s", "order")
+        self.assertEqual(formatted, [])
+        pipeline.flush()
+        self.assertTrue(sink.lines[0].startswith("failed order"))
+        self.assertIn("ValueError: boom", sink.lines[0])
+
+    def test_overload_drops_and_summarizes(self):
+        sink = MemorySink()
+        pipeline = LogPipeline([sink], maxsize=10, batch_size=100, flush_interval=0.1)
+        log = self.make_logger(pipeline)
+        for i in range(25):
+            log.info(f"line {i}")
+        self.assertEqual(pipeline.stats()["dropped"], 15)
+        pipeline.flush()
+        self.assertIn("Dropped 15 log records", sink.lines[-1])
+        self.assertEqual(len(sink.lines), 11)
+
+    def test_background_writer(self):
+        sink = MemorySink()
+        pipeline = LogPipeline([sink], maxsize=100, batch_size=10, flush_interval=0.05)
+        log = self.make_logger(pipeline)
+        pipeline.start()
+        log.info("hello %s", "world")
+        pipeline.stop()
+        self.assertEqual(sink.lines, ["hello world"])
+
+if __name__ == '__main__':
+    unittest.main()
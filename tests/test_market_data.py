@@ -0,0 +1,122 @@
+import sys
+import os
+import json
+import time
+import threading
+import unittest
+from unittest import mock
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import serve
+
+from app.services import binance_service
+from app.services.market_service import MarketDataCache
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+class FakeMarketStream:
+    """
+    Local stand-in for the futures market websocket: acks SUBSCRIBE requests
+    and records the subscribed stream names.
+    """
+    def __init__(self):
+        self.subscribed = []
+        self.clients = []
+        self.server = serve(self.handler, "127.0.0.1", 0)
+        self.port = self.server.socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def handler(self, ws):
+        self.clients.append(ws)
+        try:
+            for message in ws:
+                request = json.loads(message)
+                if request.get("method") == "SUBSCRIBE":
+                    self.subscribed.extend(request["params"])
+                    ws.send(json.dumps({"result": None, "id": request["id"]}))
+        except ConnectionClosed:
+            pass
+
+    def push(self, event):
+        for ws in list(self.clients):
+            try:
+                ws.send(json.dumps(event))
+            except Exception:
+                pass
+
+    def drop_clients(self):
+        for ws in list(self.clients):
+            ws.close()
+        self.clients = []
+
+    def close(self):
+        self.server.shutdown()
+
+class TestMarketDataCache(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeMarketStream()
+        self.addCleanup(self.server.close)
+        self.cache = MarketDataCache(ws_url=f"ws://127.0.0.1:{self.server.port}", max_age=3.0)
+        self.addCleanup(self.cache.stop)
+
+    def push_quote(self, symbol="BTCUSDT", price="50000.1", bid="50000.0", ask="50000.2"):
+        self.server.push({"e": "bookTicker", "s": symbol, "b": bid, "B": "3", "a": ask, "A": "4"})
+        self.server.push({"e": "markPriceUpdate", "s": symbol, "p": price})
+
+    def test_subscribes_on_first_use_and_serves_from_memory(self):
+        self.cache.start()
+        self.assertTrue(wait_for(lambda: self.cache._stream.connected))
+        self.assertIsNone(self.cache.get("BTCUSDT"))
+        self.assertTrue(wait_for(lambda: len(self.server.subscribed) == 2))
+        self.assertEqual(self.server.subscribed, ["btcusdt@bookTicker", "btcusdt@markPrice@1s"])
+
+        self.push_quote()
+        self.assertTrue(wait_for(lambda: self.cache.get("BTCUSDT") is not None))
+        info = self.cache.get("BTCUSDT")
+        self.assertEqual(info["price"], "50000.1")
+        self.assertEqual(info["bid"], "50000.0")
+        self.assertEqual(info["ask"], "50000.2")
+        self.assertEqual(info["order_book"]["bids"], [("50000.0", "3")])
+
+    def test_stale_quote_is_not_served(self):
+        self.cache.start()
+        self.assertTrue(wait_for(lambda: self.cache._stream.connected))
+        self.cache.track("BTCUSDT")
+        self.push_quote()
+        self.assertTrue(wait_for(lambda: self.cache.get("BTCUSDT") is not None))
+
+        real_monotonic = time.monotonic
+        with mock.patch("app.services.market_service.time.monotonic", side_effect=lambda: real_monotonic() + 5):
+            self.assertIsNone(self.cache.get("BTCUSDT"))
+
+    def test_resubscribes_after_reconnect(self):
+        self.cache.track("ETHUSDT")  # Tracked before the connection exists
+        self.cache.start()
+        self.assertTrue(wait_for(lambda: len(self.server.subscribed) == 2))
+        self.server.drop_clients()
+        self.assertTrue(wait_for(lambda: len(self.server.subscribed) == 4))
+        self.assertEqual(self.server.subscribed[2:], ["ethusdt@bookTicker", "ethusdt@markPrice@1s"])
+
+    def test_get_market_info_uses_cache_before_rest(self):
+        client = mock.Mock()
+        client.ticker_price.return_value = {"price": "10"}
+        client.depth.return_value = {"bids": [["9", "1"]], "asks": [["11", "1"]]}
+        cached = {"price": "50000.1", "bid": "50000.0", "ask": "50000.2", "order_book": {}}
+        with mock.patch.object(binance_service.BinanceService, "get_client", return_value=client), \
+             mock.patch("app.services.market_service.market_data.get", side_effect=[cached, None]):
+            self.assertEqual(binance_service.get_market_info("BTCUSDT")["price"], "50000.1")
+            client.ticker_price.assert_not_called()
+            # Stale: REST fallback
+            self.assertEqual(binance_service.get_market_info("BTCUSDT")["bid"], "9")
+            client.depth.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import sys
+import os
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.core.metrics import Registry, Counter, Gauge, Histogram
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_histogram_exposition(self):
+        h = self.registry.register(Histogram("stage_seconds", "Stage latency", ("symbol", "type"), buckets=(0.1, 1.0)))
+        h.observe(0.05, symbol="BTCUSDT", type="long_open")
+        h.observe(0.5, symbol="BTCUSDT", type="long_open")
+        h.observe(5, symbol="BTCUSDT", type="long_open")
+        text = self.registry.render()
+        self.assertIn("# TYPE stage_seconds histogram", text)
+        self.assertIn('stage_seconds_bucket{symbol="BTCUSDT",type="long_open",le="0.1"} 1', text)
+        self.assertIn('stage_seconds_bucket{symbol="BTCUSDT",type="long_open",le="1.0"} 2', text)
+        self.assertIn('stage_seconds_bucket{symbol="BTCUSDT",type="long_open",le="+Inf"} 3', text)
+        self.assertIn('stage_seconds_count{symbol="BTCUSDT",type="long_open"} 3', text)
+        self.assertEqual(h.snapshot(symbol="BTCUSDT", type="long_open")["sum"], 5.55)
+
+    def test_counter_and_gauges(self):
+        c = self.registry.register(Counter("errors_total", "Errors", ("endpoint",)))
+        c.inc(endpoint="new_order")
+        c.inc(endpoint="new_order")
+        self.registry.register(Gauge("depth", "Queue depth", fn=lambda: 3))
+        self.registry.register(Gauge("held_seconds", "Lock held", ("symbol",), fn=lambda: {"ETHUSDT": 0.5}))
+        text = self.registry.render()
+        self.assertIn('errors_total{endpoint="new_order"} 2', text)
+        self.assertIn("depth 3", text)
+        self.assertIn('held_seconds{symbol="ETHUSDT"} 0.5', text)
+
+    def test_label_values_are_escaped(self):
+        c = self.registry.register(Counter("x_total", "X", ("symbol",)))
+        c.inc(symbol='a"b')
+        self.assertIn(r'x_total{symbol="a\"b"} 1', self.registry.render())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import sys
+import os
+import unittest
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.core.precision import QuantityRules
+from benchmarks import precision as bench
+
+class TestQuantityRules(unittest.TestCase):
+    def test_units_and_format(self):
+        rules = QuantityRules("0.00100000", "0.00100000", "9000.00000000")
+        self.assertEqual((rules.decimals, rules.step, rules.min, rules.max), (3, 1, 1, 9000000))
+        self.assertEqual(rules.to_units(1.23456), 1234)
+        self.assertEqual(rules.to_units(1e-05), 0)
+        self.assertEqual(rules.to_units("12"), 12000)
+        self.assertEqual(rules.format(1500), "1.5")
+        self.assertEqual(rules.format(12000), "12")
+        self.assertEqual(rules.format(0), "0")
+        self.assertEqual(QuantityRules("10", "10", "1000").format(QuantityRules("10").floor(125)), "120")
+
+    def test_clamp(self):
+        rules = QuantityRules("0.01", "0.05", "10.005")
+        self.assertEqual(rules.format(rules.clamp(3.14159)), "3.14")
+        self.assertEqual(rules.format(rules.clamp(0.001)), "0.05")
+        self.assertEqual(rules.format(rules.clamp(99)), "10")
+
+    def test_split_and_shrink(self):
+        rules = QuantityRules("0.001", "0.001", "120")
+        self.assertEqual(rules.split(rules.to_units("250.5")), ["120", "120", "10.5"])
+        self.assertEqual(rules.split(rules.to_units("240.0005")), ["120", "120"])
+        self.assertEqual(rules.split(0), [])
+        self.assertEqual(rules.shrink("10.5"), "10.499")
+        self.assertEqual(rules.shrink("0.001"), "")
+
+    def test_matches_legacy_decimal_sizing(self):
+        self.assertEqual(bench.check(bench.make_cases(2000)), [])
+
+if __name__ == '__main__':
+    unittest.main()
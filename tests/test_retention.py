@@ -0,0 +1,99 @@
+import sys
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.core import database
+from app.core import crud
+from app.models.log import Log
+from app.services.retention_service import LogRetention
+
+class TestLogRetention(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.db_path = os.path.join(self.tmp, "bot.db")
+        self.engine = create_engine(f"sqlite:///{self.db_path}")
+        self.addCleanup(self.engine.dispose)
+        database.init_db(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.now = datetime(2026, 3, 15, 12, 0, 0)
+        rows = []
+        for day in range(20):
+            for i in range(300):
+                rows.append({
+                    "datetime": self.now - timedelta(days=day, seconds=i),
+                    "type": "error" if i % 3 == 0 else "info",
+                    "func": "worker",
+                    "desc": "x" * 200,
+                })
+        db = self.Session()
+        crud.create_logs(db, rows)
+        db.close()
+        self.archive = os.path.join(self.tmp, "archive")
+
+    def make(self, **kwargs):
+        return LogRetention(self.Session, retention_days=14, archive_dir=self.archive, batch_size=500, **kwargs)
+
+    def test_init_db_enables_incremental_vacuum(self):
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA auto_vacuum")).scalar(), 2)
+
+    def test_existing_file_is_converted_offline_only(self):
+        path = os.path.join(self.tmp, "old.db")
+        engine = create_engine(f"sqlite:///{path}")
+        self.addCleanup(engine.dispose)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE legacy (id INTEGER PRIMARY KEY)"))
+        # Startup leaves a pre-existing file alone (no full VACUUM)
+        database.init_db(bind=engine)
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA auto_vacuum")).scalar(), 0)
+        self.assertTrue(database.convert_incremental_vacuum(engine))
+        self.assertFalse(database.convert_incremental_vacuum(engine))
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA auto_vacuum")).scalar(), 2)
+
+    def test_expired_rows_are_archived_and_rolled_up(self):
+        retention = self.make()
+        moved = retention.run_once(now=self.now)
+        # Days 15..19 are entirely older than the cutoff; day 14 is cut mid-day
+        db = self.Session()
+        remaining = db.query(Log).count()
+        oldest = db.query(Log.datetime).order_by(Log.datetime).first()[0]
+        db.close()
+        self.assertEqual(moved + remaining, 6000)
+        self.assertGreaterEqual(oldest, self.now - timedelta(days=14))
+        self.assertEqual(retention.run_once(now=self.now), 0)
+
+        rollups = retention.rollups()
+        self.assertEqual(sum(r[3] for r in rollups), moved)
+        day19 = {r[2]: r[3] for r in rollups if r[0] == (self.now - timedelta(days=19)).date()}
+        self.assertEqual(day19, {"error": 100, "info": 200})
+
+        archived = 0
+        for name in os.listdir(self.archive):
+            with gzip.open(os.path.join(self.archive, name), "rt") as f:
+                archived += sum(1 for _ in f)
+        self.assertEqual(archived, moved)
+
+    def test_space_is_reclaimed(self):
+        retention = self.make(vacuum_pages=100)
+        size_before = os.path.getsize(self.db_path)
+        retention.run_once(now=self.now + timedelta(days=30))
+        with self.engine.connect() as conn:
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+            self.assertEqual(conn.execute(text("PRAGMA freelist_count")).scalar(), 0)
+        self.assertGreater(retention.stats()["pages_freed"], 0)
+        self.assertLess(os.path.getsize(self.db_path), size_before / 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import sys
+import os
+import time
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.services import binance_service
+
+EXCHANGE_INFO = {
+    "symbols": [
+        {
+            "symbol": "BTCUSDT",
+            "baseAsset": "BTC",
+            "quoteAsset": "USDT",
+            "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": "0.10", "maxPrice": "1000000", "tickSize": "0.10"},
+                {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+                {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": "120", "stepSize": "0.001"},
+            ],
+        },
+        {
+            "symbol": "ETHUSDT",
+            "baseAsset": "ETH",
+            "quoteAsset": "USDT",
+            "filters": [
+                {"filterType": "LOT_SIZE", "minQty": "0.01", "maxQty": "10000", "stepSize": "0.01"},
+            ],
+        },
+    ]
+}
+
+class TestSymbolIndex(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.exchange_info.return_value = EXCHANGE_INFO
+        self.client.leverage_brackets.side_effect = Exception("not needed")
+        self.patcher = mock.patch.object(binance_service.BinanceService, "get_client", return_value=self.client)
+        self.patcher.start()
+        self.index = binance_service.SymbolIndex(ttl=60)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_single_exchange_info_call(self):
+        self.assertEqual(self.index.get("BTCUSDT")["quote_asset"], "USDT")
+        self.assertEqual(self.index.get("ETHUSDT")["base_asset"], "ETH")
+        self.index.get("BTCUSDT")
+        self.assertEqual(self.client.exchange_info.call_count, 1)
+        self.assertEqual(self.index.stats()["hits"], 3)
+
+    def test_decimal_filters(self):
+        entry = self.index.get("BTCUSDT")
+        self.assertEqual(entry["lot_size"]["step_size"], Decimal("0.001"))
+        self.assertEqual(entry["market_lot_size"]["max_qty"], Decimal("120"))
+        self.assertEqual(entry["price_filter"]["tick_size"], Decimal("0.10"))
+        # Missing MARKET_LOT_SIZE falls back to LOT_SIZE for the string view
+        self.assertEqual(self.index.get("ETHUSDT")["market_max_qty"], "10000")
+
+    def test_unknown_symbol_counts_miss(self):
+        self.assertIsNone(self.index.get("XYZUSDT"))
+        self.assertEqual(self.index.stats()["misses"], 1)
+
+    def test_failed_refresh_keeps_snapshot(self):
+        self.index.get("BTCUSDT")
+        self.client.exchange_info.side_effect = Exception("down")
+        self.assertFalse(self.index.refresh())
+        self.assertIsNotNone(self.index.get("BTCUSDT"))
+        self.assertEqual(self.index.stats()["refresh_failures"], 1)
+
+    def test_stale_snapshot_refreshes_in_background(self):
+        self.index.ttl = 0
+        self.index.retry_interval = 0
+        self.index.get("BTCUSDT")
+        self.index.get("BTCUSDT")
+        deadline = time.time() + 2
+        while self.client.exchange_info.call_count < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertGreaterEqual(self.client.exchange_info.call_count, 2)
+
+    def test_get_symbol_info_uses_index(self):
+        with mock.patch.object(binance_service, "symbol_index", self.index):
+            info = binance_service.get_symbol_info("BTCUSDT")
+            binance_service.get_symbol_info("BTCUSDT")
+        self.assertEqual(info["market_max_qty"], "120")
+        self.assertEqual(info["step_size"], "0.001")
+        self.assertEqual(self.client.exchange_info.call_count, 1)
+
+class TestLeverageBracketStore(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.leverage_brackets.return_value = [
+            {"symbol": "BTCUSDT", "brackets": [{"initialLeverage": 125}, {"initialLeverage": 50}, {"initialLeverage": 1}]},
+            {"symbol": "ETHUSDT", "brackets": [{"initialLeverage": 100}, {"initialLeverage": 2}]},
+        ]
+        self.patcher = mock.patch.object(binance_service.BinanceService, "get_client", return_value=self.client)
+        self.patcher.start()
+        self.store = binance_service.LeverageBracketStore(ttl=60)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_bulk_load(self):
+        self.assertEqual(self.store.get("BTCUSDT"), ("1", "125"))
+        self.assertEqual(self.store.get("ETHUSDT"), ("2", "100"))
+        self.assertEqual(self.client.leverage_brackets.call_count, 1)
+        # Loaded for all symbols, not per symbol
+        self.assertNotIn("symbol", self.client.leverage_brackets.call_args.kwargs)
+
+    def test_failed_refresh_serves_last_good(self):
+        self.store.get("BTCUSDT")
+        self.client.leverage_brackets.side_effect = Exception("418")
+        self.assertFalse(self.store.refresh())
+        self.assertEqual(self.store.get("BTCUSDT"), ("1", "125"))
+
+    def test_symbol_info_leverage(self):
+        index = binance_service.SymbolIndex(ttl=60)
+        self.client.exchange_info.return_value = EXCHANGE_INFO
+        with mock.patch.object(binance_service, "symbol_index", index), \
+             mock.patch.object(binance_service, "leverage_brackets", self.store):
+            info = binance_service.get_symbol_info("BTCUSDT")
+        self.assertEqual(info["min_leverage"], "1")
+        self.assertEqual(info["max_leverage"], "125")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+import sys
+import os
+import time
+import threading
+import asyncio
+import unittest
+from unittest import mock
+from aiohttp import web
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from app.services.telegram_service import TelegramOutbox, _split_text, MESSAGE_LIMIT
+from app.services.telegram_api import BotAPIClient
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+class FakeBotAPI:
+    def __init__(self, responses=None):
+        self.calls = []
+        self.responses = list(responses or [])
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, method, payload):
+        self.entered.set()
+        self.gate.wait(5)
+        with self.lock:
+            self.calls.append((time.monotonic(), method, payload))
+            if self.responses:
+                return self.responses.pop(0)
+        return 200, {"ok": True}
+
+class TestTelegramOutbox(unittest.TestCase):
+    def make(self, api, **kwargs):
+        kwargs.setdefault("global_rate", 1000)
+        kwargs.setdefault("chat_rate", 1000)
+        outbox = TelegramOutbox(transport=api, **kwargs)
+        self.addCleanup(outbox.stop, 0.5)
+        return outbox
+
+    def test_queued_lines_are_packed(self):
+        api = FakeBotAPI()
+        api.gate.clear()  # Hold the first send so the rest queue up behind it
+        outbox = self.make(api)
+        outbox.send("1", "line 0")
+        self.assertTrue(api.entered.wait(5))
+        for i in range(1, 21):
+            outbox.send("1", f"line {i}")
+        api.gate.set()
+        self.assertTrue(wait_for(lambda: outbox.stats()["queued"] == 0 and outbox.stats()["sent"] >= 2))
+        texts = [c[2]["text"] for c in api.calls]
+        self.assertEqual(len(texts), 2)
+        self.assertEqual(texts[1].split("\n\n"), [f"line {i}" for i in range(1, 21)])
+
+    def test_packing_respects_limit_and_keyboards(self):
+        api = FakeBotAPI()
+        api.gate.clear()
+        outbox = self.make(api)
+        outbox.send("1", "first")
+        self.assertTrue(api.entered.wait(5))
+        outbox.send("1", "a" * 3000)
+        outbox.send("1", "b" * 3000)
+        outbox.send("1", "pick", reply_markup={"inline_keyboard": []})
+        outbox.send("1", "after")
+        api.gate.set()
+        self.assertTrue(wait_for(lambda: outbox.stats()["sent"] == 5))
+        texts = [c[2]["text"] for c in api.calls]
+        self.assertEqual(texts, ["first", "a" * 3000, "b" * 3000, "pick", "after"])
+        self.assertIn("reply_markup", api.calls[3][2])
+
+    def test_split_long_text(self):
+        text = "\n".join("x" * 100 for _ in range(100))
+        pieces = _split_text(text)
+        self.assertTrue(all(len(p) <= MESSAGE_LIMIT for p in pieces))
+        self.assertEqual("\n".join(pieces), text)
+
+    def test_retry_after_pauses_only_that_chat(self):
+        api = FakeBotAPI(responses=[(429, {"ok": False, "parameters": {"retry_after": 0.3}})])
+        outbox = self.make(api)
+        outbox.send("1", "slow chat")
+        self.assertTrue(wait_for(lambda: outbox.stats()["rate_limited"] == 1))
+        outbox.send("2", "other chat")
+        self.assertTrue(wait_for(lambda: outbox.stats()["sent"] == 2))
+        order = [(c[2]["chat_id"], c[0]) for c in api.calls]
+        self.assertEqual([o[0] for o in order], ["1", "2", "1"])
+        self.assertGreaterEqual(order[2][1] - order[0][1], 0.3)
+
+    def test_chat_rate_limit(self):
+        api = FakeBotAPI()
+        outbox = self.make(api, chat_rate=20, chat_burst=1)
+        for i in range(3):
+            outbox.send("1", "x" * 3000)  # Too big to pack together
+        self.assertTrue(wait_for(lambda: outbox.stats()["sent"] == 3))
+        self.assertGreaterEqual(api.calls[2][0] - api.calls[0][0], 0.09)
+
+    def test_server_errors_are_retried(self):
+        api = FakeBotAPI(responses=[(502, {}), (400, {"description": "Bad Request"})])
+        outbox = self.make(api)
+        with mock.patch("app.services.telegram_service.DELAY_RETRY", 0.01):
+            outbox.send("1", "hello")
+            self.assertTrue(wait_for(lambda: outbox.stats()["dropped"] == 1))
+        self.assertEqual(outbox.stats()["retries"], 1)
+        outbox.call("answerCallbackQuery", {"callback_query_id": "1"})
+        self.assertTrue(wait_for(lambda: outbox.stats()["sent"] == 1))
+        self.assertEqual(api.calls[-1][1], "answerCallbackQuery")
+
+    def test_chats_are_sent_concurrently_in_order(self):
+        api = FakeBotAPI()
+        api.gate.clear()
+        outbox = self.make(api, max_in_flight=4)
+        outbox.send("1", "a" * 3000)
+        outbox.send("1", "b" * 3000)
+        outbox.send("2", "c")
+        outbox.send("3", "d")
+        # One request per chat in flight; chat 1's second message waits its turn
+        self.assertTrue(wait_for(lambda: outbox.stats()["in_flight"] == 3))
+        self.assertEqual(outbox.stats()["queued"], 1)
+        api.gate.set()
+        self.assertTrue(wait_for(lambda: outbox.stats()["sent"] == 4))
+        chat1 = [c[2]["text"][0] for c in api.calls if c[2]["chat_id"] == "1"]
+        self.assertEqual(chat1, ["a", "b"])
+
+    def test_document_is_not_packed(self):
+        api = FakeBotAPI()
+        api.gate.clear()
+        outbox = self.make(api)
+        outbox.send("1", "first")
+        self.assertTrue(api.entered.wait(5))
+        outbox.send("1", "before")
+        outbox.send_document("1", "logs.txt.gz", b"data", caption="logs")
+        outbox.send("1", "after")
+        api.gate.set()
+        self.assertTrue(wait_for(lambda: outbox.stats()["sent"] == 4))
+        self.assertEqual([c[1] for c in api.calls], ["sendMessage", "sendMessage", "sendDocument", "sendMessage"])
+        self.assertEqual(api.calls[2][2]["document"], ("logs.txt.gz", b"data"))
+        self.assertEqual(api.calls[2][2]["caption"], "logs")
+
+class FakeBotServer:
+    """
+    Local Bot API stub on its own loop; records requests and client connections.
+    """
+    def __init__(self, delay=0.0, updates=None):
+        self.delay = delay
+        self.updates = list(updates or [])
+        self.calls = []
+        self.peers = set()
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        self.ready.wait(5)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        if request.content_type.startswith("multipart/"):
+            form = await request.post()
+            payload = {k: (v.filename, v.file.read()) if hasattr(v, "file") else v for k, v in form.items()}
+        else:
+            payload = await request.json()
+        self.calls.append((method, payload))
+        self.peers.add(request.transport.get_extra_info("peername"))
+        if method == "getUpdates":
+            if self.updates:
+                return web.json_response({"ok": True, "result": [self.updates.pop(0)]})
+            await asyncio.sleep(0.05)
+            return web.json_response({"ok": True, "result": []})
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        await asyncio.sleep(self.delay)
+        self.concurrent -= 1
+        return web.json_response({"ok": True, "result": True})
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+class TestTelegramService(unittest.TestCase):
+    def test_restart_does_not_revive_the_stopped_run(self):
+        from app.services import telegram_service
+        runs = []
+        patches = [
+            mock.patch.object(telegram_service, "start_telegram_bot",
+                              side_effect=lambda: runs.append(threading.current_thread())),
+            mock.patch.object(telegram_service, "WAIT_TIME", 0.05),
+            mock.patch.object(telegram_service.TelegramService, "stop_client"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        first = telegram_service.start_telegram_service()
+        self.assertTrue(wait_for(lambda: runs))
+        # Re-elected while the first run is still waiting to retry
+        telegram_service.stop_telegram_service()
+        second = telegram_service.start_telegram_service()
+        self.addCleanup(second.join, 1)
+        self.addCleanup(telegram_service.stop_telegram_service)
+        first.join(1)
+        self.assertFalse(first.is_alive())
+        self.assertTrue(wait_for(lambda: runs[-1] is second))
+        self.assertTrue(second.is_alive())
+
+class TestBotAPIClient(unittest.TestCase):
+    def make(self, server, **kwargs):
+        self.addCleanup(server.close)
+        client = BotAPIClient("TOKEN", base_url=server.url, **kwargs)
+        self.addCleanup(client.stop)
+        return client
+
+    def test_connections_are_reused(self):
+        server = FakeBotServer()
+        client = self.make(server)
+        for i in range(5):
+            self.assertEqual(client.call("sendMessage", {"chat_id": 1, "text": str(i)})[0], 200)
+        self.assertEqual(len(server.peers), 1)
+
+    def test_document_upload(self):
+        server = FakeBotServer()
+        client = self.make(server)
+        status, _ = client.call("sendDocument", {"chat_id": 1, "caption": "logs", "document": ("a.gz", b"\x1f\x8b")})
+        self.assertEqual(status, 200)
+        method, payload = server.calls[-1]
+        self.assertEqual(method, "sendDocument")
+        self.assertEqual(payload["document"], ("a.gz", b"\x1f\x8b"))
+        self.assertEqual(payload["chat_id"], "1")
+
+    def test_requests_run_concurrently(self):
+        server = FakeBotServer(delay=0.2)
+        client = self.make(server, max_connections=4)
+        start = time.monotonic()
+        futures = [client.submit("sendMessage", {"chat_id": i, "text": "x"}) for i in range(4)]
+        self.assertTrue(all(f.result(5)[0] == 200 for f in futures))
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(server.max_concurrent, 4)
+
+    def test_polling_and_probe(self):
+        update = {"update_id": 7, "message": {"message_id": 1, "date": 0, "text": "/ping",
+                                               "chat": {"id": 5, "type": "private"},
+                                               "from": {"id": 5, "is_bot": False, "first_name": "a"}}}
+        server = FakeBotServer(updates=[update])
+        client = self.make(server)
+        received = []
+        poller = threading.Thread(target=client.poll_forever, args=(received.extend,), daemon=True)
+        poller.start()
+        self.assertTrue(wait_for(lambda: received))
+        self.assertEqual(received[0]["update_id"], 7)
+        self.assertTrue(wait_for(lambda: any(p.get("offset") == 8 for m, p in server.calls if m == "getUpdates")))
+        self.assertGreater(client.probe(), 0)
+        self.assertIsNotNone(client.stats()["rtt_last_ms"])
+        client.stop()
+        poller.join(5)
+        self.assertFalse(poller.is_alive())
+
+    def test_ping_does_not_block_the_handler(self):
+        from telebot import types
+        from app.services import telegram_service, transaction_service  # noqa: F401
+        server = FakeBotServer(delay=0.5)
+        client = self.make(server)
+        client.start()
+        update = types.Update.de_json({"update_id": 1, "message": {
+            "message_id": 1, "date": 0, "text": "/ping", "chat": {"id": 5, "type": "private"},
+            "from": {"id": 5, "is_bot": False, "first_name": "a"}}})
+        with mock.patch.object(telegram_service.TelegramService, "get_client", return_value=client), \
+             mock.patch.object(telegram_service, "send_message") as send:
+            start = time.monotonic()
+            telegram_service.handle_update([update.message])
+            self.assertLess(time.monotonic() - start, 0.3)
+            self.assertTrue(wait_for(lambda: send.called))
+        self.assertTrue(send.call_args.args[0].startswith("pong (Bot API RTT"))
+        self.assertEqual(send.call_args.kwargs["chat_id"], 5)
+
+if __name__ == '__main__':
+    unittest.main()
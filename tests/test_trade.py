@@ -0,0 +1,209 @@
+import sys
+import os
+import time
+import unittest
+from unittest import mock
+
+# Ensure app path
+sys.path.append(os.getcwd())
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core import database
+from app.models.order import Order
+from app.services import binance_service
+from app.services import trade_service
+
+SYMBOL_INFO = {
+    'base_asset': 'BTC', 'quote_asset': 'USDT',
+    'min_qty': '0.001', 'max_qty': '1000', 'step_size': '0.001', 'tick_size': '0.10',
+    'min_leverage': '1', 'max_leverage': '125',
+    'market_max_qty': '1', 'market_step_size': '0.001'
+}
+
+# Unpatched lookup, for tests that go through the request budget
+get_market_info = binance_service.get_market_info
+
+def fill(order, price="100.0"):
+    return {"orderId": 1, "executedQty": order["quantity"], "avgPrice": price}
+
+class TradeTestCase(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        database.Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine)
+
+        self.client = mock.Mock()
+        self.client.new_batch_order.side_effect = lambda batchOrders: [fill(o) for o in batchOrders]
+        self.client.new_order.side_effect = lambda **kw: fill(kw)
+        self.client.balance.return_value = []
+
+        binance_service._prepared.clear()
+        patches = [
+            mock.patch.object(binance_service.BinanceService, "get_client", return_value=self.client),
+            mock.patch.object(binance_service, "get_symbol_info", return_value=SYMBOL_INFO),
+            mock.patch.object(binance_service, "get_market_info", return_value={"price": "100.0"}),
+            mock.patch.object(binance_service, "get_wallet_info", return_value=[{"asset": "USDT", "balance": "1200"}]),
+            mock.patch.object(trade_service, "SessionLocal", self.Session),
+            mock.patch.object(trade_service, "close_order", return_value=False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def orders(self):
+        db = self.Session()
+        try:
+            return db.query(Order).all()
+        finally:
+            db.close()
+
+class TestBatchExecution(TradeTestCase):
+    def test_open_chunks_are_batched(self):
+        # 1200 USDT * 2x / 100 = 24 BTC, market max 1 BTC -> 24 chunks -> 5 batch requests
+        with mock.patch.object(trade_service.settings, "ORDER_LEVERAGE", 2):
+            self.assertTrue(trade_service.execute_trade_logic("BTCUSDT.P", "long_open"))
+        self.assertEqual(self.client.new_batch_order.call_count, 5)
+        sizes = [len(c.kwargs["batchOrders"]) for c in self.client.new_batch_order.call_args_list]
+        self.assertEqual(sizes, [5, 5, 5, 5, 4])
+        # Leverage/margin applied once per trade, not per chunk
+        self.assertEqual(self.client.change_leverage.call_count, 1)
+        self.assertEqual(len(self.orders()), 24)
+        self.assertEqual(self.orders()[0].entry_price, 100.0)
+
+    def test_only_failed_legs_are_retried(self):
+        calls = []
+
+        def batch(batchOrders):
+            calls.append([o["quantity"] for o in batchOrders])
+            if len(calls) == 1:
+                res = [fill(o) for o in batchOrders]
+                res[2] = {"code": -2019, "msg": "Margin is insufficient."}
+                return res
+            return [fill(o) for o in batchOrders]
+
+        self.client.new_batch_order.side_effect = batch
+        with mock.patch.object(trade_service.settings, "ORDER_LEVERAGE", 1), \
+             mock.patch.object(binance_service, "get_wallet_info", return_value=[{"asset": "USDT", "balance": "500"}]):
+            self.assertTrue(trade_service.execute_trade_logic("BTCUSDT", "short_open"))
+        # 5 chunks in one batch; the single failed leg retried alone, one step smaller
+        self.assertEqual(calls, [["1", "1", "1", "1", "1"]])
+        self.assertEqual(self.client.new_order.call_args.kwargs["quantity"], "0.999")
+        self.assertEqual(len(self.orders()), 5)
+
+    def test_filter_errors_are_not_shrunk(self):
+        def batch(batchOrders):
+            res = [fill(o) for o in batchOrders]
+            res[0] = {"code": -4164, "msg": "Order's notional must be no smaller than 5."}
+            return res
+
+        self.client.new_batch_order.side_effect = batch
+        with mock.patch.object(trade_service.settings, "ORDER_LEVERAGE", 1), \
+             mock.patch.object(binance_service, "get_wallet_info", return_value=[{"asset": "USDT", "balance": "500"}]):
+            trade_service.execute_trade_logic("BTCUSDT", "short_open")
+        # A smaller leg would be rejected the same way: no retry
+        self.client.new_order.assert_not_called()
+        self.assertEqual(len(self.orders()), 4)
+
+class TestReadOwnWrites(TradeTestCase):
+    def test_close_right_after_open_sees_the_fill(self):
+        from app.services import account_service
+        filled = []
+
+        def batch(batchOrders):
+            filled.extend(float(o["quantity"]) for o in batchOrders if o.get("reduceOnly") != "true")
+            return [fill(o) for o in batchOrders]
+
+        self.client.new_batch_order.side_effect = batch
+        self.client.get_position_risk.side_effect = lambda **kw: [
+            {"symbol": "BTCUSDT", "positionAmt": str(sum(filled)), "leverage": "2"}]
+        state = account_service.AccountState(lambda: self.client)
+        state.reconcile()
+        for p in (mock.patch.object(account_service, "account_state", state),
+                  mock.patch.object(state, "is_live", return_value=True)):
+            p.start()
+            self.addCleanup(p.stop)
+
+        with mock.patch.object(trade_service.settings, "ORDER_LEVERAGE", 1), \
+             mock.patch.object(binance_service, "get_wallet_info", return_value=[{"asset": "USDT", "balance": "250"}]):
+            self.assertTrue(trade_service.execute_trade_logic("BTCUSDT", "long_open"))
+        # No ACCOUNT_UPDATE in between: the close still sizes from the filled position
+        self.assertTrue(binance_service.close_order("BTCUSDT", "LONG"))
+        close = self.client.new_batch_order.call_args.kwargs["batchOrders"]
+        self.assertTrue(all(o["reduceOnly"] == "true" for o in close))
+        self.assertAlmostEqual(sum(float(o["quantity"]) for o in close), sum(filled))
+
+class TestTradePriority(TradeTestCase):
+    def test_saturated_budget_does_not_hold_back_the_trade(self):
+        # Weight used past the normal share: lookups outside the trade path wait for the next minute (~2s)
+        started = time.monotonic()
+        budget = binance_service.RequestBudget(4, 1000, 2400, clock=lambda: 58.0 + time.monotonic() - started)
+        budget.record_response(mock.Mock(status_code=200, headers={"X-MBX-USED-WEIGHT-1M": "2300"}))
+        self.client.ticker_price.return_value = {"price": "100.0"}
+        self.client.depth.return_value = {"bids": [], "asks": []}
+        client = binance_service.BudgetedClient(self.client, budget)
+        with mock.patch.object(binance_service.BinanceService, "get_client", return_value=client), \
+             mock.patch.object(binance_service, "get_market_info", get_market_info), \
+             mock.patch("app.services.market_service.market_data.get", return_value=None), \
+             mock.patch.object(trade_service.settings, "ORDER_LEVERAGE", 1), \
+             mock.patch.object(binance_service, "get_wallet_info", return_value=[{"asset": "USDT", "balance": "250"}]):
+            self.assertTrue(trade_service.execute_trade_logic("BTCUSDT", "long_open"))
+        self.client.ticker_price.assert_called_once_with(symbol="BTCUSDT")
+        self.assertEqual(self.client.new_batch_order.call_args.kwargs["batchOrders"][0]["quantity"], "1")
+        self.assertEqual(budget.stats()["deferred"], 0)
+
+class TestOrderPlan(TradeTestCase):
+    def test_plan_is_computed_without_orders(self):
+        # 1200 USDT * 2x / 120 = 20 BTC in market-max chunks of 1
+        with mock.patch.object(trade_service.settings, "ORDER_LEVERAGE", 2), \
+             mock.patch.object(binance_service, "get_market_info", return_value={"price": "120.0"}):
+            plan = trade_service.plan_trade("BTCUSDT.P", "long_open")
+        self.assertEqual((plan.symbol, plan.position_side, plan.order_side), ("BTCUSDT", "LONG", "BUY"))
+        self.assertEqual(plan.quantity, "20")
+        self.assertEqual(plan.chunks, ("1",) * 20)
+        self.assertEqual(plan.retries, ("0.999",) * 20)
+        self.assertAlmostEqual(plan.notional, 2400.0)
+        self.assertFalse(plan.reduce_only)
+        with self.assertRaises(AttributeError):
+            plan.quantity = "1"
+        self.client.new_batch_order.assert_not_called()
+        self.client.change_leverage.assert_not_called()
+
+    def test_dry_run_sends_nothing(self):
+        with mock.patch.object(trade_service.settings, "ORDER_DRY_RUN", True):
+            self.assertTrue(trade_service.execute_trade_logic("BTCUSDT", "short_open"))
+        self.assertTrue(trade_service.execute_trade_logic("BTCUSDT", "long_open", dry_run=True))
+        self.client.new_batch_order.assert_not_called()
+        self.client.new_order.assert_not_called()
+        trade_service.close_order.assert_not_called()
+        self.assertEqual(self.orders(), [])
+
+    def test_unsizeable_plan(self):
+        with mock.patch.object(binance_service, "get_wallet_info", return_value=[{"asset": "USDT", "balance": "5"}]):
+            self.assertIsNone(trade_service.plan_trade("BTCUSDT", "long_open"))
+            self.assertFalse(trade_service.execute_trade_logic("BTCUSDT", "long_open"))
+        self.client.new_batch_order.assert_not_called()
+
+    def test_close_plan(self):
+        self.client.get_position_risk.return_value = [{"symbol": "BTCUSDT", "positionAmt": "2.5"}]
+        plan = trade_service.plan_trade("BTCUSDT", "long_close")
+        self.assertEqual((plan.order_side, plan.reduce_only), ("SELL", True))
+        self.assertEqual(plan.chunks, ("1", "1", "0.5"))
+        self.assertEqual(plan.retries, ("0.999", "0.999", "0.499"))
+        self.assertAlmostEqual(plan.notional, 250.0)
+        self.client.new_batch_order.assert_not_called()
+
+class TestBatchClose(TradeTestCase):
+    def test_close_in_reduce_only_batches(self):
+        self.client.get_position_risk.return_value = [{"symbol": "BTCUSDT", "positionAmt": "-7.5"}]
+        self.assertTrue(binance_service.close_order("BTCUSDT", "SHORT"))
+        orders = self.client.new_batch_order.call_args_list[0].kwargs["batchOrders"]
+        self.assertEqual([o["quantity"] for o in orders], ["1"] * 5)
+        self.assertTrue(all(o["reduceOnly"] == "true" and o["side"] == "BUY" for o in orders))
+        second = self.client.new_batch_order.call_args_list[1].kwargs["batchOrders"]
+        self.assertEqual([o["quantity"] for o in second], ["1", "1", "0.5"])
+
+if __name__ == '__main__':
+    unittest.main()